@@ -0,0 +1,65 @@
+"""
+Shared setup for the benchmark scripts in this directory.
+
+Every benchmark runs against a throwaway SQLite file so the development
+database is never touched. Run the scripts from the project root, e.g.
+``python benchmarks/index_plans.py``.
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def setup_django(db_path=None, migrate=True):
+    """Point Django at a scratch database, migrate it and return its path."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'disaster_relief.settings')
+    from django.conf import settings
+
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='relief-bench-'), 'bench.sqlite3')
+    settings.DATABASES['default']['NAME'] = db_path
+    # Uploads made by a benchmark land next to its database, not in the project
+    settings.MEDIA_ROOT = os.path.join(os.path.dirname(db_path), 'media')
+    # Measure production behaviour: no per-query debug log, test client host allowed
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['*']
+    # A few benchmark users write far faster than the rate limits allow; opt in with RATELIMIT_ENABLED=1
+    settings.RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED') == '1'
+
+    import django
+    django.setup()
+
+    if migrate:
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+    return db_path
+
+
+def best_of(fn, repeat=5):
+    """Fastest wall time of ``repeat`` calls, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values`` (milliseconds), or None if empty."""
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(int(len(values) * pct / 100), len(values) - 1)], 2)
+
+
+def seed_volumes(**volumes):
+    """Bulk-insert linked rows (see core.seeding) and return the created users."""
+    from core.seeding import seed_relief_data
+
+    return seed_relief_data(**volumes)
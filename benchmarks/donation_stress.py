@@ -0,0 +1,125 @@
+"""
+Concurrency stress test for the donation endpoint on SQLite.
+
+Spawns writer processes that POST donations and reader processes that load
+the donor dashboard, all against one scratch database, then reports
+throughput and how many requests failed with "database is locked".
+
+    python benchmarks/donation_stress.py --profile default
+    python benchmarks/donation_stress.py --profile production
+
+The production profile is the one enabled by DJANGO_DB_PROFILE=production
+in disaster_relief/settings.py.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+from _common import percentile, setup_django
+
+
+def worker(kind, index, db_path, disaster_id, duration):
+    setup_django(db_path, migrate=False)
+
+    from django.db import OperationalError
+    from django.test import Client
+    from django.urls import reverse
+    from core.models import User
+
+    client = Client()
+    client.force_login(User.objects.get(username=f'donor{index}'))
+    donate_url = reverse('donate_to_disaster', args=[disaster_id])
+    dashboard_url = reverse('donor_dashboard')
+
+    ok = locked = failed = 0
+    latencies = []
+    deadline = time.perf_counter() + duration
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+        start = time.perf_counter()
+        try:
+            if kind == 'writer':
+                response = client.post(donate_url, {
+                    'amount': '100',
+                    'payment_channel': 'upi',
+                    'transaction_id': f'UTR{index:04d}{n:08d}',
+                    'message': 'stress',
+                })
+                success = response.status_code == 302
+            else:
+                success = client.get(dashboard_url).status_code == 200
+        except OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            locked += 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+        if success:
+            ok += 1
+        else:
+            failed += 1
+    return {'kind': kind, 'ok': ok, 'locked': locked, 'failed': failed, 'latencies': latencies}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', choices=['default', 'production'], default='production')
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds each worker runs.')
+    parser.add_argument('--db', help='SQLite file to create (defaults to a temp file).')
+    args = parser.parse_args()
+
+    # Workers are spawned, so they read the profile from the environment too
+    if args.profile == 'production':
+        os.environ['DJANGO_DB_PROFILE'] = 'production'
+    else:
+        os.environ.pop('DJANGO_DB_PROFILE', None)
+
+    db_path = setup_django(args.db)
+
+    from django.db import connections
+    from core.models import User, Disaster
+
+    organiser = User.objects.create_user('organiser', password='adminpass123', role='organiser')
+    User.objects.bulk_create([
+        User(username=f'donor{i}', role='donor') for i in range(args.writers + args.readers)
+    ])
+    disaster = Disaster.objects.create(
+        organiser=organiser, title='Flood', description='Stress test appeal', location='Kodagu',
+        urgency_level='high', bank_account_name='Relief Fund', bank_account_number='000111222333',
+        ifsc_code='SBIN0000001',
+    )
+    connections.close_all()
+
+    jobs = [('writer', i) for i in range(args.writers)]
+    jobs += [('reader', args.writers + i) for i in range(args.readers)]
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(len(jobs)) as pool:
+        results = pool.starmap(
+            worker, [(kind, index, db_path, disaster.pk, args.duration) for kind, index in jobs]
+        )
+
+    report = {'profile': args.profile, 'duration_s': args.duration}
+    for kind in ('writer', 'reader'):
+        rows = [r for r in results if r['kind'] == kind]
+        latencies = [ms for r in rows for ms in r['latencies']]
+        ok = sum(r['ok'] for r in rows)
+        report[f'{kind}s'] = {
+            'workers': len(rows),
+            'ok': ok,
+            'failed': sum(r['failed'] for r in rows),
+            'lock_errors': sum(r['locked'] for r in rows),
+            'per_second': round(ok / args.duration, 1),
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
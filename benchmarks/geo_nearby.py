@@ -0,0 +1,113 @@
+"""
+Radius searches over 1M disasters with and without the geohash index.
+
+Seeds a scratch SQLite database with 1M disasters (scaled by --scale)
+scattered around the gazetteer's places, then times core.geo.nearby for
+several points and radii against a scan that filters the latitude/longitude
+bounding box over the whole table and measures the same exact distances.
+Both return the same rows; the plan of the indexed query is printed once.
+"nearest ms" asks nearby() for only the closest 50, as the nearby page does.
+
+    python benchmarks/geo_nearby.py [--scale 1.0] [--db /tmp/bench.sqlite3]
+"""
+import argparse
+import random
+import time
+
+from _common import best_of, seed_volumes, setup_django
+
+NEAREST = 50
+# (label, latitude, longitude, radius km)
+SEARCHES = [
+    ('Mysuru', 12.2958, 76.6394, 10),
+    ('Mysuru', 12.2958, 76.6394, 50),
+    ('Mysuru', 12.2958, 76.6394, 200),
+    ('Delhi', 28.6139, 77.2090, 25),
+    ('Guwahati', 26.1445, 91.7362, 100),
+    ('Central India', 23.5000, 80.0000, 50),
+    ('Port Blair', 11.6234, 92.7265, 500),
+]
+
+
+def seed_disasters(count, batch_size=5000, seed=1):
+    from django.db import transaction
+
+    from core.models import Disaster
+    from core.seeding import bulk_insert, relaxed_pragmas, scattered_location
+
+    rng = random.Random(seed)
+    organiser_ids, _ = seed_volumes(
+        organisers=50, donors=0, disasters=0, donations=0, messages=0, feedback=0,
+    )
+    with relaxed_pragmas(), transaction.atomic():
+        bulk_insert(
+            Disaster,
+            (Disaster(
+                organiser_id=rng.choice(organiser_ids),
+                title=f'Appeal {i}',
+                description='Relief needed for affected families.',
+                urgency_level=rng.choice(['low', 'medium', 'high']),
+                bank_account_name='Relief Fund',
+                bank_account_number='000111222333',
+                ifsc_code='SBIN0000001',
+                **scattered_location(rng),
+            ) for i in range(count)),
+            batch_size,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for 1M disasters.')
+    parser.add_argument('--db', help='SQLite file to create (defaults to a temp file).')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    db_path = setup_django(args.db)
+    count = int(1_000_000 * args.scale)
+    print(f"Seeding {db_path} with {count} disasters ...")
+    start = time.perf_counter()
+    seed_disasters(count)
+    print(f"Seeded in {time.perf_counter() - start:.0f} s")
+
+    from django.db import connection
+    from core import geo
+    from core.models import Disaster
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    def indexed(latitude, longitude, radius):
+        return geo.nearby(Disaster.objects.all(), latitude, longitude, radius)
+
+    def scan(latitude, longitude, radius):
+        south, north, west, east = geo.bounding_box(latitude, longitude, radius)
+        rows = Disaster.objects.filter(latitude__range=(south, north), longitude__range=(west, east))
+        hits = []
+        for pk, lat, lon in rows.values_list('pk', 'latitude', 'longitude').iterator():
+            distance = geo.distance_km(latitude, longitude, lat, lon)
+            if distance <= radius:
+                hits.append((distance, pk))
+        return sorted(hits)
+
+    _, latitude, longitude, radius = SEARCHES[1]
+    cells = geo.covering_cells(latitude, longitude, radius)
+    query = Disaster.objects.filter(geo.in_cells(cells)).values_list('pk', 'latitude', 'longitude')
+    print(f"\nPlan for {SEARCHES[1][0]} within {radius} km ({len(cells)} cells):")
+    print(query.explain())
+
+    print(f"\n{'search':<28}{'cells':>6}{'matches':>9}{'scan ms':>10}{'geohash ms':>12}{'speed-up':>10}"
+          f"{'nearest ms':>12}")
+    for label, latitude, longitude, radius in SEARCHES:
+        matches = indexed(latitude, longitude, radius)
+        assert matches == scan(latitude, longitude, radius), label
+        scanned = best_of(lambda: scan(latitude, longitude, radius), args.repeat)
+        fast = best_of(lambda: indexed(latitude, longitude, radius), args.repeat)
+        nearest = best_of(lambda: geo.nearby(Disaster.objects.all(), latitude, longitude, radius, NEAREST), args.repeat)
+        cells = len(geo.covering_cells(latitude, longitude, radius))
+        print(f"{f'{label} {radius} km':<28}{cells:>6}{len(matches):>9}{scanned:>10.2f}{fast:>12.2f}"
+              f"{scanned / fast:>9.1f}x{nearest:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Show that the composite indexes on core models are used by the view queries.
+
+Seeds a scratch SQLite database, then runs each view's query twice: once with
+the composite indexes from the models' Meta dropped and once with them in
+place. For both runs it prints SQLite's EXPLAIN QUERY PLAN and the best-of-N
+time to fetch the first page of rows.
+
+    python benchmarks/index_plans.py [--scale 1.0] [--db /tmp/bench.sqlite3]
+"""
+import argparse
+
+from _common import best_of, seed_volumes, setup_django
+
+PAGE = 50
+
+
+def view_queries(organiser_id, donor_id, disaster_id):
+    from core.models import Disaster, Donation, Message, Feedback, Conversation
+
+    return [
+        ('donor feed', Disaster.objects.order_by('-priority_score', '-id')),
+        ('donor feed, newest', Disaster.objects.order_by('-posted_at', '-id')),
+        ('donor feed, least funded', Disaster.objects.order_by('total_raised', 'id')),
+        ('donor feed, high urgency', Disaster.objects.filter(urgency_level='high').order_by('-posted_at', '-id')),
+        ('organiser disasters', Disaster.objects.filter(organiser_id=organiser_id).order_by('-posted_at')),
+        ('donor donations', Donation.objects.filter(donor_id=donor_id).order_by('-donated_at')),
+        ('organiser donations',
+         Donation.objects.filter(disaster__organiser_id=organiser_id).order_by('-donated_at')),
+        ('disaster donations', Donation.objects.filter(disaster_id=disaster_id).order_by('-donated_at', '-id')),
+        ('inbox', Message.objects.filter(recipient_id=organiser_id).order_by('-timestamp')),
+        ('organiser conversations',
+         Conversation.objects.filter(organiser_id=organiser_id).order_by('-last_message_at')),
+        ('donor conversations', Conversation.objects.filter(donor_id=donor_id).order_by('-last_message_at')),
+        ('thread', Message.objects.filter(disaster_id=disaster_id).order_by('timestamp')),
+        ('organiser feedback', Feedback.objects.filter(organiser_id=organiser_id).order_by('-submitted_at')),
+        ('donor feedback', Feedback.objects.filter(donor_id=donor_id).order_by('-submitted_at')),
+    ]
+
+
+def composite_indexes():
+    from django.apps import apps
+
+    return [(model, index) for model in apps.get_app_config('core').get_models() for index in model._meta.indexes]
+
+
+def run(label, queries, repeat):
+    print(f"\n=== {label} ===")
+    results = {}
+    for name, queryset in queries:
+        page = queryset[:PAGE]
+        elapsed = best_of(lambda: list(page.all()), repeat)
+        results[name] = elapsed
+        print(f"\n-- {name}: {elapsed:.2f} ms")
+        for line in page.explain().splitlines():
+            print(f"   {line}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for the default seed volumes.')
+    parser.add_argument('--db', help='SQLite file to create (defaults to a temp file).')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    db_path = setup_django(args.db)
+    print(f"Seeding {db_path} ...")
+    scale = args.scale
+    seed_volumes(
+        organisers=max(int(50 * scale), 1), donors=max(int(2000 * scale), 1),
+        disasters=int(5000 * scale), donations=int(200_000 * scale),
+        messages=int(100_000 * scale), feedback=int(20_000 * scale),
+    )
+
+    from django.db import connection
+    from django.db.models import Count
+    from core.models import User, Disaster, Donation
+
+    organiser_id = (
+        User.objects.filter(role='organiser').annotate(n=Count('disaster')).order_by('-n')
+        .values_list('pk', flat=True).first()
+    )
+    donor_id = (
+        User.objects.filter(role='donor').annotate(n=Count('donation')).order_by('-n')
+        .values_list('pk', flat=True).first()
+    )
+    disaster_id = Donation.objects.values_list('disaster_id', flat=True).first() or Disaster.objects.first().pk
+    queries = view_queries(organiser_id, donor_id, disaster_id)
+    indexes = composite_indexes()
+
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.remove_index(model, index)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    before = run('without composite indexes', queries, args.repeat)
+
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.add_index(model, index)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    after = run('with composite indexes', queries, args.repeat)
+
+    print("\n=== summary (ms, best of %d) ===" % args.repeat)
+    print(f"{'query':<28}{'before':>10}{'after':>10}{'speedup':>10}")
+    for name, _ in queries:
+        speedup = before[name] / after[name] if after[name] else float('inf')
+        print(f"{name:<28}{before[name]:>10.2f}{after[name]:>10.2f}{speedup:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
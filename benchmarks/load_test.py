@@ -0,0 +1,304 @@
+"""
+Load test the donor and organiser flows with concurrent workers.
+
+Seeds a scratch SQLite database (volumes scale with --scale), then runs
+--workers processes for --duration seconds. Each worker drives the project's
+WSGI or ASGI application in-process through Django's test clients, looping
+over a weighted mix of scenarios:
+
+    browse     donor dashboard, "load more" feed page, search
+    donate     donation form, then a POST with a proof image upload
+    message    message thread, post a message, poll for new ones
+    feedback   feedback form, then submit a rating
+    organiser  organiser dashboard, donations, feedback and inbox
+
+Prints a JSON report with requests per second and p50/p95/p99 latency, in
+total and per step. Save it with --output and compare two runs with
+--compare, e.g. before and after a change:
+
+    python benchmarks/load_test.py --output before.json
+    python benchmarks/load_test.py --compare before.json
+    python benchmarks/load_test.py --app asgi --workers 8 --mix browse:3,organiser:1
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import re
+import subprocess
+import time
+from io import BytesIO
+
+from _common import ROOT, percentile, seed_volumes, setup_django
+
+DEFAULT_MIX = 'browse:4,donate:1,message:2,feedback:1,organiser:2'
+SEARCH_TERMS = ['relief', 'families', 'Kodagu', 'Wayanad', 'appeal']
+_CURSOR = re.compile(r'data-cursor="([^"]+)"')
+
+
+class Request:
+    def __init__(self, step, method, path, data=None, expect=(200,)):
+        self.step = step
+        self.method = method
+        self.path = path
+        self.data = data
+        self.expect = expect
+
+
+# ----------------------------
+# Scenarios
+# ----------------------------
+# Each scenario is a generator of Requests; the driver sends every response
+# back in, so a step can use what the previous page returned.
+
+def browse(ctx):
+    from django.urls import reverse
+
+    response = yield Request('browse:dashboard', 'get', reverse('donor_dashboard'))
+    match = _CURSOR.search(response.content.decode())
+    if match:
+        yield Request('browse:feed_page', 'get', reverse('donor_disaster_feed'), {'cursor': match.group(1)})
+    yield Request('browse:search', 'get', reverse('search'), {'q': ctx.rng.choice(SEARCH_TERMS)})
+
+
+def donate(ctx):
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.urls import reverse
+
+    url = reverse('donate_to_disaster', args=[ctx.rng.choice(ctx.disaster_ids)])
+    yield Request('donate:form', 'get', url)
+    ctx.sequence += 1
+    yield Request('donate:submit', 'post', url, {
+        'amount': str(ctx.rng.randint(1, 500) * 10),
+        'payment_channel': 'upi',
+        'transaction_id': f'LT{ctx.worker:04d}{ctx.sequence:010d}',
+        'message': 'Load test donation',
+        'proof_image': SimpleUploadedFile('proof.png', ctx.proof_png, content_type='image/png'),
+    }, expect=(302,))
+
+
+def message(ctx):
+    from django.urls import reverse
+
+    disaster_id = ctx.rng.choice(ctx.disaster_ids)
+    yield Request('message:thread', 'get', reverse('message_thread', args=[disaster_id]))
+    yield Request('message:post', 'post', reverse('message_thread', args=[disaster_id]),
+                  {'content': 'Any update on supplies?'}, expect=(200, 302))
+    yield Request('message:poll', 'get', reverse('message_thread_poll', args=[disaster_id]))
+
+
+def feedback(ctx):
+    from django.urls import reverse
+
+    url = reverse('submit_feedback', args=[ctx.rng.choice(ctx.disaster_ids)])
+    yield Request('feedback:form', 'get', url)
+    yield Request('feedback:submit', 'post', url, {'rating': ctx.rng.randint(1, 5), 'comment': 'Thank you'},
+                  expect=(302,))
+
+
+def organiser(ctx):
+    from django.urls import reverse
+
+    for name in ('organiser_dashboard', 'organiser_donations', 'organiser_feedback', 'organiser_messages'):
+        yield Request(f'organiser:{name.split("_", 1)[1]}', 'get', reverse(name))
+
+
+SCENARIOS = {
+    'browse': browse,
+    'donate': donate,
+    'message': message,
+    'feedback': feedback,
+    'organiser': organiser,
+}
+ORGANISER_SCENARIOS = {'organiser'}
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition(':')
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def proof_image():
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', (640, 480), (200, 80, 40)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+# ----------------------------
+# Workers
+# ----------------------------
+
+class Context:
+    def __init__(self, worker, disaster_ids, seed):
+        self.worker = worker
+        self.disaster_ids = disaster_ids
+        self.rng = random.Random(seed)
+        self.sequence = 0
+        self.proof_png = proof_image()
+
+
+def worker(index, app, db_path, donor_id, organiser_id, disaster_ids, mix, warmup, duration):
+    setup_django(db_path, migrate=False)
+
+    from django.test import AsyncClient, Client
+    from core.models import User
+
+    ctx = Context(index, disaster_ids, seed=index)
+    client_class = AsyncClient if app == 'asgi' else Client
+    donor_client, organiser_client = client_class(), client_class()
+    donor_client.force_login(User.objects.get(pk=donor_id))
+    organiser_client.force_login(User.objects.get(pk=organiser_id))
+
+    deck = [name for name, weight in mix.items() for _ in range(weight)]
+    latencies, errors = {}, {}
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+
+    def perform(client, request):
+        call = getattr(client, request.method)
+        return call(request.path, request.data or {})
+
+    if app == 'asgi':
+        import asyncio
+
+        async def send(client, request):
+            return await perform(client, request)
+
+        loop = asyncio.new_event_loop()
+        execute = lambda client, request: loop.run_until_complete(send(client, request))  # noqa: E731
+    else:
+        execute = perform
+
+    while time.perf_counter() < deadline:
+        name = ctx.rng.choice(deck)
+        client = organiser_client if name in ORGANISER_SCENARIOS else donor_client
+        steps = SCENARIOS[name](ctx)
+        response = None
+        while True:
+            try:
+                request = steps.send(response)
+            except StopIteration:
+                break
+            start = time.perf_counter()
+            response = execute(client, request)
+            finished = time.perf_counter()
+            if start < measure_from or finished > deadline:
+                continue
+            latencies.setdefault(request.step, []).append((finished - start) * 1000)
+            if response.status_code not in request.expect:
+                errors[request.step] = errors.get(request.step, 0) + 1
+    return latencies, errors
+
+
+def summarise(latencies, errors, duration):
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'per_second': round(len(latencies) / duration, 1),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, report):
+    print(f"\n{'step':<28}{'req/s':>18}{'p95 ms':>22}")
+    for step in ['total'] + sorted(report['steps']):
+        old = baseline['total'] if step == 'total' else baseline['steps'].get(step)
+        new = report['total'] if step == 'total' else report['steps'][step]
+        if not old or not old['per_second'] or not old['p95_ms']:
+            continue
+        rps = (new['per_second'] - old['per_second']) / old['per_second'] * 100
+        p95 = (new['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100
+        print(f"{step:<28}{old['per_second']:>7} → {new['per_second']:<7}{rps:+5.0f}%"
+              f"{old['p95_ms']:>9} → {new['p95_ms']:<7}{p95:+5.0f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app', choices=['wsgi', 'asgi'], default='wsgi')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=20.0, help='Measured seconds per worker.')
+    parser.add_argument('--warmup', type=float, default=3.0, help='Unmeasured seconds before that.')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'Scenario weights (default {DEFAULT_MIX}).')
+    parser.add_argument('--scale', type=float, default=0.2, help='Multiplier for the default seed volumes.')
+    parser.add_argument('--profile', choices=['default', 'production'], default='production')
+    parser.add_argument('--db', help='SQLite file to create (defaults to a temp file).')
+    parser.add_argument('--output', help='Also write the JSON report to this file.')
+    parser.add_argument('--compare', help='Report from an earlier run to compare against.')
+    args = parser.parse_args()
+
+    if args.profile == 'production':
+        os.environ['DJANGO_DB_PROFILE'] = 'production'
+    else:
+        os.environ.pop('DJANGO_DB_PROFILE', None)
+
+    db_path = setup_django(args.db)
+    scale = args.scale
+    volumes = {
+        'organisers': max(int(50 * scale), 1), 'donors': max(int(2000 * scale), args.workers),
+        'disasters': max(int(5000 * scale), 1), 'donations': int(200_000 * scale),
+        'messages': int(100_000 * scale), 'feedback': int(20_000 * scale),
+    }
+    organiser_ids, donor_ids = seed_volumes(**volumes)
+
+    from django.db import connections
+    from core.models import Disaster
+
+    disaster_ids = list(Disaster.objects.order_by('-posted_at').values_list('pk', flat=True)[:200])
+    connections.close_all()
+
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(args.workers) as pool:
+        results = pool.starmap(worker, [
+            (i, args.app, db_path, donor_ids[i], organiser_ids[i % len(organiser_ids)], disaster_ids,
+             args.mix, args.warmup, args.duration)
+            for i in range(args.workers)
+        ])
+
+    steps = {}
+    for latencies, errors in results:
+        for step, values in latencies.items():
+            steps.setdefault(step, ([], 0))
+            steps[step] = (steps[step][0] + values, steps[step][1] + errors.get(step, 0))
+    everything = [ms for values, _ in steps.values() for ms in values]
+    report = {
+        'revision': git_revision(),
+        'app': args.app,
+        'profile': args.profile,
+        'workers': args.workers,
+        'duration_s': args.duration,
+        'mix': args.mix,
+        'volumes': volumes,
+        'total': summarise(everything, sum(e for _, e in steps.values()), args.duration),
+        'steps': {step: summarise(values, errors, args.duration) for step, (values, errors) in sorted(steps.items())},
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    if args.compare:
+        with open(args.compare) as handle:
+            compare(json.load(handle), report)
+
+
+if __name__ == '__main__':
+    main()
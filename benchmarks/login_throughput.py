@@ -0,0 +1,78 @@
+"""
+Login and registration throughput for each password hasher setup.
+
+For every configuration, creates a donor whose password is hashed with it and
+posts the login form --logins times, then posts --registrations new donors
+through the registration form (which hashes once and runs the password
+validators). Runs in one process, so the numbers are per CPU core.
+
+    baseline    Django's PBKDF2 default (1,000,000 iterations)
+    pbkdf2      core.passwords with PASSWORD_PBKDF2_ITERATIONS
+    scrypt      core.passwords with PASSWORD_SCRYPT_* (the default here)
+    argon2      core.passwords with PASSWORD_ARGON2_*, if argon2-cffi is installed
+
+    python benchmarks/login_throughput.py [--logins 20] [--registrations 10]
+"""
+import argparse
+import time
+from importlib.util import find_spec
+
+from _common import setup_django
+
+CONFIGURATIONS = {
+    'baseline': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'pbkdf2': 'core.passwords.TunedPBKDF2PasswordHasher',
+    'scrypt': 'core.passwords.TunedScryptPasswordHasher',
+    'argon2': 'core.passwords.TunedArgon2PasswordHasher',
+}
+
+
+def per_second(fn, count):
+    start = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=20)
+    parser.add_argument('--registrations', type=int, default=10)
+    parser.add_argument('--db', help='SQLite file to create (defaults to a temp file).')
+    args = parser.parse_args()
+
+    setup_django(args.db)
+
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from core.models import User
+
+    print(f"{'hasher':<10}{'logins/s':>10}{'registrations/s':>18}")
+    for name, hasher in CONFIGURATIONS.items():
+        if name == 'argon2' and not find_spec('argon2'):
+            print(f"{name:<10}{'(argon2-cffi not installed)':>28}")
+            continue
+        with override_settings(PASSWORD_HASHERS=[hasher]):
+            User.objects.create_user(f'{name}-donor', password='river-camp-2024', role='donor')
+
+            def log_in(i):
+                response = Client().post(reverse('login'), {
+                    'username': f'{name}-donor', 'password': 'river-camp-2024',
+                })
+                assert response.status_code == 302, response.status_code
+
+            def register(i):
+                response = Client().post(reverse('register'), {
+                    'username': f'{name}-new{i}', 'email': f'{name}{i}@example.com', 'phone': '9876543210',
+                    'role': 'donor', 'password1': 'river-camp-2024', 'password2': 'river-camp-2024',
+                })
+                assert response.status_code == 302, response.status_code
+
+            logins = per_second(log_in, args.logins)
+            registrations = per_second(register, args.registrations)
+        print(f"{name:<10}{logins:>10.1f}{registrations:>18.1f}")
+
+
+if __name__ == '__main__':
+    main()
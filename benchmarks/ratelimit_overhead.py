@@ -0,0 +1,75 @@
+"""
+Measure what the write rate limiter adds to a request.
+
+Times core.ratelimit.check() for one user and IP (two buckets) against each
+bucket store, with --keys distinct users so the local store is realistically
+full, and then a throttled POST view against the same view undecorated,
+called directly through RequestFactory so only the decorator differs.
+
+    python benchmarks/ratelimit_overhead.py [--calls 100000] [--keys 50000]
+"""
+import argparse
+import time
+
+from _common import setup_django
+
+
+def per_call_us(fn, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=100_000)
+    parser.add_argument('--keys', type=int, default=50_000, help='Distinct users spread over the calls.')
+    args = parser.parse_args()
+
+    setup_django(migrate=False)
+
+    from django.conf import settings
+    from django.contrib.auth.models import AnonymousUser
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+
+    from core import ratelimit
+
+    settings.RATELIMIT_ENABLED = True
+    # Generous enough that no call is refused, so every call does the full work
+    settings.RATELIMITS = {'bench': {'user': f'{args.calls}/s', 'ip': f'{args.calls}/s'}}
+
+    class BenchUser(AnonymousUser):
+        is_authenticated = True
+
+    requests = []
+    for i in range(args.keys):
+        request = RequestFactory().post('/bench/', REMOTE_ADDR=f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}')
+        request.user = BenchUser()
+        request.user.pk = i
+        requests.append(request)
+
+    print(f"{'store':<20}{'check() µs':>12}")
+    for store in ('core.ratelimit.LocalBucketStore', 'core.ratelimit.CacheBucketStore'):
+        settings.RATELIMIT_STORE = store
+        ratelimit.get_store.cache_clear()
+        ratelimit.get_store().clear()
+        elapsed = per_call_us(lambda i: ratelimit.check(requests[i % args.keys], 'bench'), args.calls)
+        print(f"{store.rsplit('.', 1)[1]:<20}{elapsed:>12.2f}")
+
+    settings.RATELIMIT_STORE = 'core.ratelimit.LocalBucketStore'
+    ratelimit.get_store.cache_clear()
+
+    def view(request):
+        return HttpResponse()
+
+    throttled = ratelimit.ratelimit('bench')(view)
+    bare = per_call_us(lambda i: view(requests[i % args.keys]), args.calls)
+    wrapped = per_call_us(lambda i: throttled(requests[i % args.keys]), args.calls)
+    print(f"\nview undecorated {bare:.2f} µs, with @ratelimit {wrapped:.2f} µs "
+          f"(+{wrapped - bare:.2f} µs per POST)")
+
+
+if __name__ == '__main__':
+    main()
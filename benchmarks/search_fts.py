@@ -0,0 +1,120 @@
+"""
+Compare FTS5 search with icontains filtering on disasters and messages.
+
+Seeds a scratch SQLite database with 100k disasters and 1M messages of
+generated text (scaled by --scale), then times one results page for common,
+rare and missing terms: once through core.search (FTS5 MATCH ranked by bm25)
+and once with the icontains filter a search box would otherwise use.
+
+    python benchmarks/search_fts.py [--scale 1.0] [--db /tmp/bench.sqlite3]
+"""
+import argparse
+import random
+import time
+
+from _common import best_of, seed_volumes, setup_django
+
+PAGE = 20
+WORDS = (
+    'flood rain river shelter food water blankets medicine clinic rescue boat road '
+    'village families children volunteers supplies tents power school bridge relief '
+    'camp doctors kits rice cooking hygiene transport donation update urgent help'
+).split()
+# Each rare word appears in about one row in this many
+RARE_WORDS = {'landslide': 500, 'cyclone': 5000, 'tsunami': 50_000}
+TERMS = ['supplies', 'landslide', 'cyclone', 'tsunami', 'earthquake', 'flood shelter']
+PLACES = ['Kodagu', 'Udupi', 'Mysuru', 'Wayanad', 'Chennai', 'Guwahati', 'Puri', 'Shimla']
+
+
+def sentence(rng, length):
+    words = rng.choices(WORDS, k=length)
+    for word, rarity in RARE_WORDS.items():
+        if rng.randrange(rarity) == 0:
+            words[rng.randrange(length)] = word
+    return ' '.join(words).capitalize() + '.'
+
+
+def seed_text(disasters, messages, batch_size=5000, seed=1):
+    from django.db import transaction
+
+    from core.models import Disaster, Message, User
+    from core.seeding import bulk_insert
+
+    rng = random.Random(seed)
+    organiser_ids, donor_ids = seed_volumes(
+        organisers=50, donors=2000, disasters=0, donations=0, messages=0, feedback=0,
+    )
+    with transaction.atomic():
+        bulk_insert(
+            Disaster,
+            (Disaster(
+                organiser_id=rng.choice(organiser_ids),
+                title=sentence(rng, 4),
+                description=' '.join(sentence(rng, 12) for _ in range(4)),
+                location=rng.choice(PLACES),
+                urgency_level=rng.choice(['low', 'medium', 'high']),
+                bank_account_name='Relief Fund',
+                bank_account_number='000111222333',
+                ifsc_code='SBIN0000001',
+            ) for _ in range(disasters)),
+            batch_size,
+        )
+        disaster_rows = list(Disaster.objects.values_list('pk', 'organiser_id'))
+
+        def message(rng):
+            disaster_id, organiser_id = rng.choice(disaster_rows)
+            donor_id = rng.choice(donor_ids)
+            sender, recipient = (donor_id, organiser_id) if rng.random() < 0.5 else (organiser_id, donor_id)
+            return Message(sender_id=sender, recipient_id=recipient, disaster_id=disaster_id,
+                           content=sentence(rng, 10))
+
+        bulk_insert(Message, (message(rng) for _ in range(messages)), batch_size)
+    return User.objects.get(pk=rng.choice(organiser_ids))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier for 100k disasters / 1M messages.')
+    parser.add_argument('--db', help='SQLite file to create (defaults to a temp file).')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    db_path = setup_django(args.db)
+    disasters, messages = int(100_000 * args.scale), int(1_000_000 * args.scale)
+    print(f"Seeding {db_path} with {disasters} disasters and {messages} messages ...")
+    start = time.perf_counter()
+    organiser = seed_text(disasters, messages)
+    print(f"Seeded in {time.perf_counter() - start:.0f} s (FTS index maintained by triggers)")
+
+    from django.db.models import Q
+    from core.models import Disaster, Message
+    from core.search import search_disasters, search_messages
+
+    def icontains_disasters(text):
+        rows = Disaster.objects.all()
+        for term in text.split():
+            rows = rows.filter(Q(title__icontains=term) | Q(description__icontains=term)
+                               | Q(location__icontains=term))
+        return list(rows.order_by('-posted_at', '-id')[:PAGE])
+
+    def icontains_messages(text):
+        rows = Message.objects.filter(Q(sender=organiser) | Q(recipient=organiser))
+        for term in text.split():
+            rows = rows.filter(content__icontains=term)
+        return list(rows.order_by('-timestamp')[:PAGE])
+
+    print(f"\n{'query':<42}{'matches':>9}{'icontains ms':>15}{'fts5 ms':>10}{'speed-up':>10}")
+    for label, fts, icontains in [
+        ('disasters', lambda t: search_disasters(t)[0], icontains_disasters),
+        (f"messages of {organiser.username}", lambda t: search_messages(organiser, t)[0], icontains_messages),
+    ]:
+        for term in TERMS:
+            matches = len(fts(term))
+            scan = best_of(lambda: icontains(term), args.repeat)
+            indexed = best_of(lambda: fts(term), args.repeat)
+            print(f"{label + ': ' + term:<42}{matches:>9}{scan:>15.2f}{indexed:>10.2f}{scan / indexed:>9.1f}x")
+    print(f"\nmatches = rows on the first page (at most {PAGE}).")
+
+
+if __name__ == '__main__':
+    main()
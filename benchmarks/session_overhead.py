@@ -0,0 +1,89 @@
+"""
+Queries and throughput per request for each session and user setup.
+
+Seeds a scratch database, then for every configuration signs in a donor and
+an organiser with a fresh test client and requests each dashboard view
+--requests times after one warm-up request. Reports the queries each request
+makes (split into session and user lookups and the rest) and requests per
+second, in one process.
+
+    baseline        db sessions, Django's AuthenticationMiddleware
+    db              db sessions, core.auth.CachedAuthenticationMiddleware
+    cached_db       cached_db sessions in the "sessions" LRU, cached user
+    signed_cookies  signed cookie sessions, cached user
+
+    python benchmarks/session_overhead.py [--requests 200] [--scale 0.1]
+"""
+import argparse
+import time
+
+from _common import seed_volumes, setup_django
+
+CACHED_AUTH = 'core.auth.CachedAuthenticationMiddleware'
+DJANGO_AUTH = 'django.contrib.auth.middleware.AuthenticationMiddleware'
+CONFIGURATIONS = {
+    'baseline': ('django.contrib.sessions.backends.db', DJANGO_AUTH),
+    'db': ('django.contrib.sessions.backends.db', CACHED_AUTH),
+    'cached_db': ('django.contrib.sessions.backends.cached_db', CACHED_AUTH),
+    'signed_cookies': ('django.contrib.sessions.backends.signed_cookies', CACHED_AUTH),
+}
+VIEWS = {
+    'donor': ['donor_dashboard', 'donor_donations', 'donor_messages'],
+    'organiser': ['organiser_dashboard', 'organiser_donations', 'organiser_messages'],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per view and configuration.')
+    parser.add_argument('--scale', type=float, default=0.1, help='Multiplier for the default seed volumes.')
+    parser.add_argument('--db', help='SQLite file to create (defaults to a temp file).')
+    args = parser.parse_args()
+
+    setup_django(args.db)
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+
+    from core.models import User
+
+    organiser_ids, donor_ids = seed_volumes(
+        organisers=50, donors=int(2000 * args.scale), disasters=int(5000 * args.scale),
+        donations=int(200_000 * args.scale), messages=int(100_000 * args.scale), feedback=int(20_000 * args.scale),
+    )
+    users = {'donor': User.objects.get(pk=donor_ids[0]), 'organiser': User.objects.get(pk=organiser_ids[0])}
+
+    print(f"{'configuration':<16}{'queries/req':>12}{'session':>9}{'user':>6}{'req/s':>9}")
+    for name, (engine, auth) in CONFIGURATIONS.items():
+        middleware = [auth if entry == CACHED_AUTH else entry for entry in settings.MIDDLEWARE]
+        # One process, so the per-process user cache is safe here
+        with override_settings(SESSION_ENGINE=engine, MIDDLEWARE=middleware, AUTH_USER_CACHE_PER_PROCESS=True):
+            queries = sessions = lookups = requests = 0
+            elapsed = 0.0
+            for role, names in VIEWS.items():
+                # A new client builds its middleware with this configuration
+                client = Client()
+                client.force_login(users[role])
+                for url in map(reverse, names):
+                    assert client.get(url).status_code == 200, (name, url)
+                    with CaptureQueriesContext(connection) as captured:
+                        client.get(url)
+                    sql = [q['sql'] for q in captured]
+                    queries += len(sql)
+                    sessions += sum('django_session' in s for s in sql)
+                    lookups += sum('FROM "core_user" WHERE "core_user"."id" =' in s for s in sql)
+                    requests += 1
+
+                    start = time.perf_counter()
+                    for _ in range(args.requests):
+                        client.get(url)
+                    elapsed += time.perf_counter() - start
+            print(f"{name:<16}{queries / requests:>12.1f}{sessions / requests:>9.1f}{lookups / requests:>6.1f}"
+                  f"{requests * args.requests / elapsed:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
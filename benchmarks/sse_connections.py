@@ -0,0 +1,139 @@
+"""
+Hold thousands of idle message streams open on one ASGI worker.
+
+Drives the project's ASGI application in-process (no network server needed):
+opens ``--connections`` event streams on one disaster thread, reports memory
+per connection, then posts a message and measures how long the fan-out takes
+to reach every open stream.
+
+    python benchmarks/sse_connections.py --connections 3000
+"""
+import argparse
+import asyncio
+import json
+import resource
+import time
+
+from _common import setup_django
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StreamConnection:
+    """One fake HTTP client speaking ASGI to the application."""
+
+    def __init__(self, app, path, cookie, port):
+        self.scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'cookie', cookie.encode())],
+            'client': ('127.0.0.1', port), 'server': ('localhost', 80),
+        }
+        self.app = app
+        self.requested = False
+        self.disconnected = asyncio.Event()
+        self.opened = asyncio.Event()
+        self.delivered = asyncio.Event()
+        self.status = None
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+        elif message['type'] == 'http.response.body':
+            body = message.get('body', b'')
+            if body.startswith(b'retry:'):
+                self.opened.set()
+            elif b'event: message' in body:
+                self.delivered.set()
+            if not message.get('more_body'):
+                self.opened.set()
+
+    def start(self):
+        return asyncio.ensure_future(self.app(self.scope, self.receive, self.send))
+
+
+async def run(connections, batch):
+    from asgiref.sync import sync_to_async
+    from django.core.asgi import get_asgi_application
+    from django.test import Client
+    from django.urls import reverse
+    from core.models import User, Disaster, Message
+    from core.pubsub import get_broker
+
+    def prepare():
+        organiser = User.objects.create_user('organiser', role='organiser')
+        donor = User.objects.create_user('donor', role='donor')
+        disaster = Disaster.objects.create(
+            organiser=organiser, title='Flood', description='Load test', location='Kodagu',
+            urgency_level='high', bank_account_name='Relief Fund', bank_account_number='000111222333',
+            ifsc_code='SBIN0000001',
+        )
+        client = Client()
+        client.force_login(donor)
+        return organiser, donor, disaster, f"sessionid={client.cookies['sessionid'].value}"
+
+    organiser, donor, disaster, cookie = await sync_to_async(prepare)()
+    app = get_asgi_application()
+    path = reverse('message_thread_stream', args=[disaster.pk])
+
+    baseline = rss_mb()
+    clients, tasks = [], []
+    start = time.perf_counter()
+    for offset in range(0, connections, batch):
+        opened = []
+        for i in range(offset, min(offset + batch, connections)):
+            conn = StreamConnection(app, path, cookie, 10000 + i)
+            clients.append(conn)
+            tasks.append(conn.start())
+            opened.append(conn.opened.wait())
+        await asyncio.gather(*opened)
+    connect_s = time.perf_counter() - start
+    failed = sum(1 for c in clients if c.status != 200)
+    held_rss = rss_mb()
+
+    start = time.perf_counter()
+    await sync_to_async(Message.objects.create)(
+        sender=organiser, recipient=donor, disaster=disaster, content='Boats arriving at 6pm'
+    )
+    await asyncio.wait_for(asyncio.gather(*(c.delivered.wait() for c in clients)), timeout=60)
+    fanout_ms = (time.perf_counter() - start) * 1000
+
+    for conn in clients:
+        conn.disconnected.set()
+    await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=60)
+
+    return {
+        'connections': connections,
+        'failed': failed,
+        'connect_seconds': round(connect_s, 2),
+        'rss_baseline_mb': round(baseline, 1),
+        'rss_held_mb': round(held_rss, 1),
+        'kb_per_connection': round((held_rss - baseline) * 1024 / connections, 1),
+        'fanout_ms': round(fanout_ms, 1),
+        'subscribers_after_disconnect': get_broker().subscriber_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--connections', type=int, default=3000)
+    parser.add_argument('--batch', type=int, default=200, help='Connections opened concurrently per step.')
+    parser.add_argument('--db', help='SQLite file to create (defaults to a temp file).')
+    args = parser.parse_args()
+
+    setup_django(args.db)
+    print(json.dumps(asyncio.run(run(args.connections, args.batch)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+# ----------------------------
+# Signed-in User Cache
+# ----------------------------
+# Django's AuthenticationMiddleware loads the User row on every request that
+# touches request.user. CachedAuthenticationMiddleware keeps the resolved user
+# (role and unread count included) in the cache named by
+# settings.AUTH_USER_CACHE_ALIAS for AUTH_USER_CACHE_TIMEOUT seconds. A cached
+# user is only used while the session still names its backend and carries its
+# current session hash, so a password change still ends other sessions; a
+# mismatch or miss falls back to Django's own lookup. Saving a user, or
+# changing their unread count, drops the entry (see core/signals.py).
+#
+# Dropping an entry only reaches the workers that share the cache, and a stale
+# copy would keep serving an old role, is_active flag or password hash. So a
+# per-process (local memory) cache is only used when AUTH_USER_CACHE_PER_PROCESS
+# declares a single-worker deployment; otherwise users are cached only in a
+# shared backend (CACHE_BACKEND=file, or a cache server).
+
+USER_PREFIX = 'authuser'
+
+
+def get_user_cache():
+    """The cache signed-in users are kept in, or None if they are not cached."""
+    if not getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 0):
+        return None
+    cache = caches[getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')]
+    if isinstance(cache, LocMemCache) and not getattr(settings, 'AUTH_USER_CACHE_PER_PROCESS', False):
+        return None
+    return cache
+
+
+def _user_key(pk):
+    return f'{USER_PREFIX}:{pk}'
+
+
+def forget_user(*pks):
+    """Drop cached users, now and again once the current transaction commits."""
+    cache = get_user_cache()
+    if cache is None:
+        return
+    keys = [_user_key(pk) for pk in pks if pk is not None]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def resolve_user(request):
+    """The request's user, from the cache when its session still checks out."""
+    cache = get_user_cache()
+    user_id = request.session.get(SESSION_KEY)
+    if cache is None or user_id is None:
+        return auth.get_user(request)
+    user = cache.get(_user_key(user_id))
+    if (
+        user is not None
+        and request.session.get(BACKEND_SESSION_KEY) in settings.AUTHENTICATION_BACKENDS
+        and constant_time_compare(request.session.get(HASH_SESSION_KEY) or '', user.get_session_auth_hash())
+    ):
+        return user
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(_user_key(user.pk), user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+def get_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = resolve_user(request)
+    return request._cached_user
+
+
+async def auser(request):
+    if not hasattr(request, '_acached_user'):
+        request._acached_user = await sync_to_async(resolve_user)(request)
+    return request._acached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+        request.auser = partial(auser, request)
@@ -0,0 +1,132 @@
+import hashlib
+import threading
+import time
+from collections import defaultdict, namedtuple
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+# ----------------------------
+# Fragment & Response Caching
+# ----------------------------
+# Cached fragments are keyed by a version number per scope: "disasters" for
+# the public feed, or a (kind, user id) pair such as ("feedback", 7) for one
+# organiser's feedback cards. Signals bump only the versions a write affects,
+# so old entries are never looked up again and simply expire, and other
+# users' fragments stay cached. Hits and misses are counted per fragment name
+# for this process.
+#
+# A fragment can also depend on versions that are only known while it
+# renders, such as one per disaster listed in a donation history. depends_on()
+# records them and a cached entry is served only while they are unchanged, so
+# editing one disaster invalidates just the fragments that show it.
+
+VERSION_PREFIX = 'fragver'
+FRAGMENT_PREFIX = 'fragment'
+
+# A cached value and the {version key: version} it was rendered under
+Tracked = namedtuple('Tracked', 'value versions')
+
+_dependencies = ContextVar('fragment_dependencies', default=None)
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[getattr(settings, 'FRAGMENT_CACHE_ALIAS', 'default')]
+
+
+def fragment_timeout():
+    return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 300)
+
+
+def _version_key(scope, owner=None):
+    return f'{VERSION_PREFIX}:{scope}' if owner is None else f'{VERSION_PREFIX}:{scope}:{owner}'
+
+
+def scope_version(scope, owner=None):
+    cache = get_cache()
+    key = _version_key(scope, owner)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock, not 1, so an evicted version never revives old entries
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump(scope, *owners):
+    """Invalidate every fragment cached under ``scope`` (for each of ``owners``, if given)."""
+    cache = get_cache()
+    keys = [_version_key(scope, owner) for owner in owners if owner is not None] if owners else [_version_key(scope)]
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def fragment_key(name, scope, owner=None, vary=()):
+    digest = hashlib.md5(repr(tuple(vary)).encode(), usedforsecurity=False).hexdigest()
+    return f'{FRAGMENT_PREFIX}:{name}:{owner}:{scope_version(scope, owner)}:{digest}'
+
+
+def _count(name, outcome):
+    with _stats_lock:
+        _stats[name][outcome] += 1
+
+
+def depends_on(scope, owner=None):
+    """Make the fragment being computed depend on this scope's version as well."""
+    versions = _dependencies.get()
+    key = _version_key(scope, owner)
+    if versions is not None and key not in versions:
+        versions[key] = scope_version(scope, owner)
+
+
+def _compute_tracked(compute):
+    versions = {}
+    token = _dependencies.set(versions)
+    try:
+        return compute(), versions
+    finally:
+        _dependencies.reset(token)
+
+
+def get_or_compute(name, scope, compute, owner=None, vary=()):
+    """Cached value of ``compute()`` for this fragment name, scope version and vary values."""
+    cache = get_cache()
+    key = fragment_key(name, scope, owner, vary)
+    value = cache.get(key)
+    if isinstance(value, Tracked):
+        # Served only while every version it depends on is unchanged
+        value, versions = value if cache.get_many(list(value.versions)) == value.versions else (None, {})
+    else:
+        versions = {}
+    if value is None:
+        _count(name, 'misses')
+        value, versions = _compute_tracked(compute)
+        cache.set(key, Tracked(value, versions) if versions else value, fragment_timeout())
+    else:
+        _count(name, 'hits')
+    # An enclosing fragment depends on whatever this one does
+    outer = _dependencies.get()
+    if outer is not None:
+        outer.update(versions)
+    return value
+
+
+def cache_stats():
+    """{fragment name: {'hits', 'misses', 'hit_ratio'}} since this process started."""
+    with _stats_lock:
+        snapshot = {name: dict(counts) for name, counts in _stats.items()}
+    for counts in snapshot.values():
+        total = counts['hits'] + counts['misses']
+        counts['hit_ratio'] = round(counts['hits'] / total, 3) if total else None
+    return snapshot
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -98,9 +98,10 @@ import re
 class ManualDonationForm(forms.ModelForm):
     class Meta:
         model = Donation
-        fields = ['amount', 'transaction_id', 'proof_image', 'message']
+        fields = ['amount', 'payment_channel', 'transaction_id', 'proof_image', 'message']
         widgets = {
             'amount': forms.NumberInput(attrs={'class': 'form-control'}),
+            'payment_channel': forms.Select(attrs={'class': 'form-control'}),
             'transaction_id': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Enter valid transaction ID'}),
             'proof_image': forms.ClearableFileInput(attrs={'class': 'form-control'}),
             'message': forms.Textarea(attrs={'class': 'form-control', 'placeholder': 'Optional message'}),
@@ -112,3 +113,17 @@ class ManualDonationForm(forms.ModelForm):
             raise forms.ValidationError("Transaction ID must be at least 8 characters and alphanumeric.")
         return txn_id
 
+    def clean(self):
+        cleaned_data = super().clean()
+        channel = cleaned_data.get('payment_channel')
+        txn_id = cleaned_data.get('transaction_id')
+        if channel and txn_id and Donation.transaction_exists(channel, txn_id, exclude_pk=self.instance.pk):
+            self.add_error('transaction_id', "A donation with this transaction ID has already been recorded.")
+        return cleaned_data
+
+
+class StatementUploadForm(forms.Form):
+    statement = forms.FileField(
+        help_text="CSV export of your bank or UPI statement with a UTR/reference and an amount column.",
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'}),
+    )
@@ -0,0 +1,233 @@
+import csv
+import functools
+import math
+import re
+from collections import namedtuple
+from pathlib import Path
+
+from django.db.models import Q
+
+# ----------------------------
+# Disaster Locations & Nearby Search
+# ----------------------------
+# Disaster.location stays free text for people to read. On save it is
+# resolved against a gazetteer bundled with the app (core/data/gazetteer.csv,
+# no network lookups) and the match is stored in latitude/longitude plus a
+# geohash: a base-32 string naming a cell of a recursively halved lat/lon
+# grid, so nearby points share a prefix and every cell, at any size, is one
+# contiguous range of the indexed geohash column.
+#
+# A radius search picks the finest precision whose cells cover the search
+# circle's bounding box in at most MAX_COVER_CELLS, turns each cell into an
+# index range scan, and only measures the exact distance for the rows those
+# scans return. The work grows with the number of disasters near the point,
+# not with the size of the table; asking for only the nearest few also keeps
+# it small when the radius is wide.
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'gazetteer.csv'
+GEOHASH_PRECISION = 9  # cells of about 5 m x 5 m
+MAX_COVER_CELLS = 32
+MAX_RADIUS_KM = 500
+FIRST_RING_KM = 10
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Sorts after every geohash character, so cell + CELL_END bounds the cell's range
+CELL_END = '{'
+
+Place = namedtuple('Place', 'name state latitude longitude')
+
+_NOT_WORD = re.compile(r'[^\w]+', re.UNICODE)
+
+
+def normalize(text):
+    """Lower-case words separated by single spaces, for gazetteer lookups."""
+    return _NOT_WORD.sub(' ', text or '').strip().lower()
+
+
+@functools.cache
+def gazetteer(path=GAZETTEER_PATH):
+    """Normalized place name or alias -> Place."""
+    places = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            place = Place(row['name'], row['state'], float(row['latitude']), float(row['longitude']))
+            for name in [row['name'], *filter(None, row['aliases'].split('|'))]:
+                places.setdefault(normalize(name), place)
+    return places
+
+
+def place_names():
+    return sorted({place.name for place in gazetteer().values()})
+
+
+def resolve(location):
+    """
+    The gazetteer Place a free-text location refers to, or None.
+
+    Tries the whole text, then each comma-separated part ("Madikeri, Kodagu,
+    Karnataka"), then runs of up to three words ("Floods in Wayanad
+    district"), so the most specific match wins.
+    """
+    places = gazetteer()
+    parts = [normalize(location)] + [normalize(part) for part in (location or '').split(',')]
+    for part in parts:
+        if part in places:
+            return places[part]
+    words = normalize(location).split()
+    for length in (3, 2, 1):
+        for start in range(len(words) - length + 1):
+            place = places.get(' '.join(words[start:start + length]))
+            if place:
+                return place
+    return None
+
+
+def locate(location):
+    """(latitude, longitude, geohash) for a free-text location, or Nones if it is unknown."""
+    place = resolve(location)
+    if place is None:
+        return None, None, None
+    return place.latitude, place.longitude, encode(place.latitude, place.longitude)
+
+
+# ----------------------------
+# Geohash Cells
+# ----------------------------
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        bounds, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (bounds[0] + bounds[1]) / 2
+        if coordinate >= middle:
+            value = value << 1 | 1
+            bounds[0] = middle
+        else:
+            value <<= 1
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell at this precision."""
+    bits = 5 * precision
+    return 180 / 2 ** (bits // 2), 360 / 2 ** ((bits + 1) // 2)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(south, north, west, east) in degrees around a point; west > east across the antimeridian."""
+    dlat = radius_km / KM_PER_DEGREE
+    south, north = max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)
+    # The circle's widest point lies a little poleward of its centre
+    spread = math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude))
+    if north == 90.0 or south == -90.0 or spread >= 1:
+        return south, north, -180.0, 180.0
+    dlon = math.degrees(math.asin(spread))
+    west = (longitude - dlon + 180) % 360 - 180
+    east = (longitude + dlon + 180) % 360 - 180
+    return south, north, west, east
+
+
+def _steps(low, high, step):
+    """Points from low to high no further apart than step, both ends included."""
+    count = math.ceil((high - low) / step)
+    return [low + (high - low) * i / count for i in range(count)] + [high] if count else [low]
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Fewest-rows set of geohash cells (at most MAX_COVER_CELLS) covering the search circle."""
+    south, north, west, east = bounding_box(latitude, longitude, radius_km)
+    spans = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = math.ceil((north - south) / height) + 1
+        columns = sum(math.ceil((e - w) / width) + 1 for w, e in spans)
+        if rows * columns <= MAX_COVER_CELLS or precision == 1:
+            break
+    return sorted({
+        encode(min(lat, 90 - 1e-9), min(lon, 180 - 1e-9), precision)
+        for lat in _steps(south, north, height)
+        for w, e in spans
+        for lon in _steps(w, e, width)
+    })
+
+
+def in_cells(cells):
+    """Filter for rows whose geohash lies in any of the cells: one index range scan each."""
+    condition = Q()
+    for cell in cells:
+        condition |= Q(geohash__gte=cell, geohash__lt=cell + CELL_END)
+    return condition
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle (haversine) distance between two points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def nearby(queryset, latitude, longitude, radius_km, limit=None):
+    """
+    [(distance_km, pk)] of the disasters in queryset within radius_km of the
+    point, nearest first.
+
+    With a limit, the search starts FIRST_RING_KM out and widens until the
+    circle holds enough disasters, so the nearest few in a crowded area do
+    not cost as much as everything within a wide radius.
+    """
+    radius_km = min(radius_km, MAX_RADIUS_KM)
+    if limit is None:
+        return _within(queryset, latitude, longitude, radius_km)
+    search_km = min(FIRST_RING_KM, radius_km)
+    while True:
+        hits = _within(queryset, latitude, longitude, search_km)
+        if len(hits) >= limit or search_km >= radius_km:
+            return hits[:limit]
+        search_km = min(search_km * 4, radius_km)
+
+
+def _within(queryset, latitude, longitude, radius_km):
+    south, north, west, east = bounding_box(latitude, longitude, radius_km)
+    candidates = queryset.filter(
+        in_cells(covering_cells(latitude, longitude, radius_km)), latitude__range=(south, north),
+    )
+    if west <= east:
+        candidates = candidates.filter(longitude__range=(west, east))
+    hits = []
+    for pk, lat, lon in candidates.values_list('pk', 'latitude', 'longitude').iterator():
+        distance = distance_km(latitude, longitude, lat, lon)
+        if distance <= radius_km:
+            hits.append((distance, pk))
+    hits.sort()
+    return hits
+
+
+def locate_disasters(queryset):
+    """
+    Resolve and store the coordinates of every disaster in queryset; return
+    how many were placed. Appeals share a handful of place names, so this is
+    one update per distinct location rather than one per row.
+    """
+    located = 0
+    locations = queryset.order_by().values_list('location', flat=True).distinct()
+    for location in list(locations):
+        latitude, longitude, geohash = locate(location)
+        updated = queryset.filter(location=location).update(
+            latitude=latitude, longitude=longitude, geohash=geohash,
+        )
+        if geohash is not None:
+            located += updated
+    return located
@@ -0,0 +1,167 @@
+import hashlib
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import connections
+from PIL import Image, ImageOps
+
+from .auth import forget_user
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Uploaded Image Processing
+# ----------------------------
+# After an upload commits, the image is re-encoded without its metadata, stored
+# under a name derived from its SHA-256, and resized copies are written to
+# thumbnails/<digest>-<width>.webp/.jpg in the "thumbnails" storage. Templates
+# can tell a processed image by its name (a 20-character digest, where raw
+# uploads carry the full 64) and use the thumbnails; unprocessed ones fall back
+# to the upload. The raw upload stays on disk until `manage.py
+# collect_media_garbage` finds no row pointing at it.
+
+IMAGE_FIELDS = {
+    'core.User': 'profile_picture',
+    'core.Disaster': 'image',
+    'core.Donation': 'proof_image',
+}
+THUMBNAIL_WIDTHS = (160, 480, 1024)
+THUMBNAIL_FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+DIGEST_LENGTH = 20
+
+_PROCESSED_NAME = re.compile(rf'^[0-9a-f]{{{DIGEST_LENGTH}}}\.(jpg|png|webp)$')
+_KEEP_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+
+def is_processed(name):
+    return bool(name) and bool(_PROCESSED_NAME.match(PurePosixPath(name).name))
+
+
+def thumbnail_storage():
+    return storages['thumbnails']
+
+
+def thumbnail_name(name, width, extension='webp'):
+    digest = PurePosixPath(name).stem
+    return f'thumbnails/{digest}-{width}.{extension}'
+
+
+def _encode(image, image_format):
+    buffer = BytesIO()
+    if image_format == 'JPEG':
+        if image.mode != 'RGB':
+            # JPEG has no alpha: flatten transparent areas onto white
+            background = Image.new('RGB', image.size, 'white')
+            rgba = image.convert('RGBA')
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            image = background
+        image.save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+    elif image_format == 'WEBP':
+        image.save(buffer, 'WEBP', quality=80, method=4)
+    else:
+        image.save(buffer, image_format, optimize=True)
+    return buffer.getvalue()
+
+
+def process_field_file(field_file):
+    """
+    Strip metadata from an uploaded image, store it under a content-hashed
+    name, write its thumbnails and return the new name.
+    """
+    storage = field_file.storage
+    with field_file.open('rb') as source:
+        image = Image.open(source)
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    if image_format not in _KEEP_FORMATS:
+        image_format = 'JPEG'
+    if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    # Re-encoding without passing exif/icc/info drops all metadata
+    clean = _encode(image, image_format)
+    digest = hashlib.sha256(clean).hexdigest()[:DIGEST_LENGTH]
+    directory = PurePosixPath(field_file.name).parent
+    name = str(directory / f'{digest}.{_KEEP_FORMATS[image_format]}')
+
+    if not storage.exists(name):
+        storage.save(name, ContentFile(clean))
+
+    thumbnails = thumbnail_storage()
+    for width in THUMBNAIL_WIDTHS:
+        resized = image
+        if image.width > width:
+            resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        for extension, thumb_format in THUMBNAIL_FORMATS.items():
+            thumb = thumbnail_name(name, width, extension)
+            if not thumbnails.exists(thumb):
+                thumbnails.save(thumb, ContentFile(_encode(resized, thumb_format)))
+    return name
+
+
+def process_instance(model_label, pk, field_name):
+    """Process one stored image and point the row at its hashed name."""
+    model = apps.get_model(model_label)
+    row = model.objects.filter(pk=pk).only(field_name).first()
+    if row is None:
+        return None
+    field_file = getattr(row, field_name)
+    old_name = field_file.name
+    if not old_name or is_processed(old_name):
+        return old_name
+
+    new_name = process_field_file(field_file)
+    # Only swap the name if nobody uploaded a different image meanwhile
+    swapped = model.objects.filter(pk=pk, **{field_name: old_name}).update(**{field_name: new_name})
+    if swapped and model is get_user_model():
+        # update() sends no post_save, and the cached signed-in user still names the old file
+        forget_user(pk)
+    # The raw upload is left for collect_media_garbage: deleting it here would
+    # race a request that saves the same name between a check and the delete
+    return new_name
+
+
+def referenced_names():
+    """Every media name some row points at, across all image fields."""
+    names = set()
+    for label, field_name in IMAGE_FIELDS.items():
+        rows = apps.get_model(label).objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+        names.update(rows.values_list(field_name, flat=True).iterator())
+    return names
+
+
+@cache
+def _executor():
+    return ThreadPoolExecutor(
+        max_workers=getattr(settings, 'IMAGE_PROCESSING_WORKERS', 2),
+        thread_name_prefix='image-processing',
+    )
+
+
+def _run(model_label, pk, field_name):
+    try:
+        process_instance(model_label, pk, field_name)
+    except Exception:
+        logger.exception("Processing %s.%s for #%s failed", model_label, field_name, pk)
+    finally:
+        # Worker threads hold their own connections; don't leak them
+        connections.close_all()
+
+
+def schedule(model_label, pk, field_name):
+    """Queue an image for processing (inline when IMAGE_PROCESSING_SYNC is set)."""
+    if getattr(settings, 'IMAGE_PROCESSING_SYNC', False):
+        process_instance(model_label, pk, field_name)
+    else:
+        _executor().submit(_run, model_label, pk, field_name)
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Disaster
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare each disaster's stored donation totals (total raised, donation count, last "
+        "donation) with its donation rows, in primary-key batches. Run it periodically; "
+        "--fix recounts the disasters that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Recount the disasters that do not match.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        expected = {f'expected_{field}': value for field, value in Disaster.donation_totals().items()}
+        fields = list(Disaster.donation_totals())
+        last_pk = 0
+        scanned = 0
+        drifted = []
+        while True:
+            batch = list(
+                Disaster.objects.filter(pk__gt=last_pk).order_by('pk').annotate(**expected)
+                .values('pk', 'title', *fields, *expected)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            for row in batch:
+                wrong = [field for field in fields if row[field] != row[f'expected_{field}']]
+                if wrong:
+                    drifted.append(row['pk'])
+                    self.stdout.write(f"#{row['pk']} {row['title']}: " + ', '.join(
+                        f"{field} {row[field]} (should be {row[f'expected_{field}']})" for field in wrong
+                    ))
+            scanned += len(batch)
+            last_pk = batch[-1]['pk']
+
+        if drifted and options['fix']:
+            for start in range(0, len(drifted), options['batch_size']):
+                with transaction.atomic():
+                    Disaster.objects.filter(pk__in=drifted[start:start + options['batch_size']]).update(
+                        **Disaster.donation_totals()
+                    )
+            self.stdout.write(self.style.SUCCESS(f"Recounted {len(drifted)} of {scanned} disasters."))
+            return
+        style = self.style.WARNING if drifted else self.style.SUCCESS
+        self.stdout.write(style(f"Checked {scanned} disasters: {len(drifted)} with wrong donation totals."))
@@ -0,0 +1,67 @@
+import time
+from pathlib import PurePosixPath
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core.images import IMAGE_FIELDS, referenced_names, thumbnail_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete uploaded files and thumbnails that no row references any more, e.g. "
+        "images and payment proofs left behind when a disaster is deleted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='List orphans without deleting them.')
+        parser.add_argument(
+            '--grace-minutes', type=int, default=60,
+            help='Keep files younger than this, so uploads whose row is not committed yet survive.',
+        )
+
+    def handle(self, *args, **options):
+        referenced = referenced_names()
+        referenced_digests = {PurePosixPath(name).stem for name in referenced}
+        cutoff = time.time() - options['grace_minutes'] * 60
+
+        directories = {
+            apps.get_model(label)._meta.get_field(field_name).upload_to.rstrip('/')
+            for label, field_name in IMAGE_FIELDS.items()
+        }
+        candidates = [
+            (default_storage, name)
+            for directory in sorted(directories)
+            for name in self.walk(default_storage, directory)
+            if name not in referenced
+        ]
+        # Thumbnails are named <digest>-<width>.<ext> after the image they were cut from
+        thumbnails = thumbnail_storage()
+        candidates += [
+            (thumbnails, name)
+            for name in self.walk(thumbnails, 'thumbnails')
+            if PurePosixPath(name).stem.rsplit('-', 1)[0] not in referenced_digests
+        ]
+
+        removed = 0
+        for storage, name in candidates:
+            if storage.get_modified_time(name).timestamp() > cutoff:
+                continue
+            if options['dry_run']:
+                self.stdout.write(f"would delete {name}")
+            else:
+                storage.delete(name)
+            removed += 1
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f"{verb} {removed} orphaned files."))
+
+    def walk(self, storage, directory):
+        if not storage.exists(directory):
+            return
+        subdirectories, files = storage.listdir(directory)
+        for name in files:
+            yield f'{directory}/{name}'
+        for subdirectory in subdirectories:
+            yield from self.walk(storage, f'{directory}/{subdirectory}')
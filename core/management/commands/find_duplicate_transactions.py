@@ -0,0 +1,49 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from core.models import Donation, normalize_transaction_id
+
+
+class Command(BaseCommand):
+    help = (
+        "Report donations that claim the same transaction id (UTR) on the same payment "
+        "channel. Rows are read in primary-key batches, so the table is never loaded at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        claims = defaultdict(list)
+        last_pk = 0
+        scanned = 0
+        while True:
+            batch = list(
+                Donation.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', 'payment_channel', 'transaction_id')[:batch_size]
+            )
+            if not batch:
+                break
+            for pk, channel, transaction_id in batch:
+                claims[(channel, normalize_transaction_id(transaction_id))].append(pk)
+            scanned += len(batch)
+            last_pk = batch[-1][0]
+
+        duplicates = {key: pks for key, pks in claims.items() if key[1] and len(pks) > 1}
+        for (channel, ref), pks in sorted(duplicates.items()):
+            details = (
+                Donation.objects.filter(pk__in=pks).select_related('donor', 'disaster').order_by('pk')
+            )
+            self.stdout.write(f"{ref} ({channel}): {len(pks)} donations")
+            for donation in details:
+                self.stdout.write(
+                    f"  #{donation.pk} {donation.donated_at:%Y-%m-%d %H:%M} {donation.donor.username} "
+                    f"→ {donation.disaster.title} ₹{donation.amount}"
+                )
+
+        style = self.style.WARNING if duplicates else self.style.SUCCESS
+        self.stdout.write(style(
+            f"Scanned {scanned} donations: {len(duplicates)} transaction ids claimed more than once."
+        ))
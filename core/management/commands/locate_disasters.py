@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.geo import locate_disasters
+from core.models import Disaster
+
+
+class Command(BaseCommand):
+    help = (
+        "Resolve disaster locations against the bundled gazetteer and store their coordinates. "
+        "Saving a disaster already does this; run it after adding places to core/data/gazetteer.csv."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-resolve every disaster, not just unplaced ones.')
+
+    def handle(self, *args, **options):
+        disasters = Disaster.objects.all()
+        if not options['all']:
+            disasters = disasters.filter(geohash__isnull=True)
+        total = disasters.count()
+        located = locate_disasters(disasters)
+        self.stdout.write(self.style.SUCCESS(f"Placed {located} of {total} disasters."))
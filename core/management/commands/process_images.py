@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+
+from core.images import IMAGE_FIELDS, is_processed, process_instance
+
+
+class Command(BaseCommand):
+    help = (
+        "Strip metadata, hash-name and thumbnail every uploaded image that has not "
+        "been processed yet (disaster images, donation proofs and profile pictures)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--legacy-root', default=str(settings.BASE_DIR),
+            help='Where to look for images missing from MEDIA_ROOT (uploads saved before '
+                 'MEDIA_ROOT was set live in the project root). Defaults to BASE_DIR.',
+        )
+
+    def handle(self, *args, **options):
+        legacy_root = Path(options['legacy_root'])
+        processed = imported = missing = 0
+
+        for label, field_name in IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            storage = model._meta.get_field(field_name).storage
+            rows = (
+                model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                .values_list('pk', field_name)
+            )
+            for pk, name in list(rows):
+                if is_processed(name):
+                    continue
+                if not storage.exists(name):
+                    legacy = legacy_root / name
+                    if not legacy.is_file():
+                        self.stderr.write(f"{label} #{pk}: {name} not found, skipped")
+                        missing += 1
+                        continue
+                    with legacy.open('rb') as source:
+                        stored = storage.save(name, File(source))
+                    model.objects.filter(pk=pk).update(**{field_name: stored})
+                    imported += 1
+                process_instance(label, pk, field_name)
+                processed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {processed} images ({imported} imported from {legacy_root}, {missing} missing)."
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import User, OrganiserSummary
+
+
+class Command(BaseCommand):
+    help = "Recompute every organiser's dashboard summary from the source tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organiser', type=int, help='Only rebuild the organiser with this user id.')
+
+    def handle(self, *args, **options):
+        organisers = User.objects.filter(role='organiser')
+        if options['organiser']:
+            organisers = organisers.filter(pk=options['organiser'])
+
+        rebuilt = 0
+        for organiser_id in organisers.values_list('pk', flat=True).iterator():
+            with transaction.atomic():
+                OrganiserSummary.rebuild(organiser_id)
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} organiser summaries."))
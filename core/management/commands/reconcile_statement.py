@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Donation
+from core.reconciliation import StatementError, open_statement, reconcile
+
+
+class Command(BaseCommand):
+    help = "Verify manual donations against a bank or UPI statement exported as CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('statement', help='Path to the statement CSV.')
+        parser.add_argument('--organiser', type=int, help="Only match this organiser's donations (user id).")
+        parser.add_argument('--txn-column', help='Statement column holding the UTR/transaction id.')
+        parser.add_argument('--amount-column', help='Statement column holding the credited amount.')
+        parser.add_argument('--channel-column', help='Statement column holding the payment channel (UPI, NEFT, ...).')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report matches without saving them.')
+
+    def handle(self, *args, **options):
+        donations = Donation.objects.all()
+        if options['organiser']:
+            donations = donations.filter(disaster__organiser_id=options['organiser'])
+
+        try:
+            with open(options['statement'], 'rb') as statement:
+                result = reconcile(
+                    open_statement(statement), donations,
+                    txn_column=options['txn_column'], amount_column=options['amount_column'],
+                    channel_column=options['channel_column'],
+                    batch_size=options['batch_size'], dry_run=options['dry_run'],
+                )
+        except (OSError, StatementError) as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            f"{result.rows} statement rows: {result.verified} verified, "
+            f"{result.amount_mismatch} amount mismatches, {result.already_verified} already verified, "
+            f"{result.repeated} repeated, {result.unmatched} unmatched, {result.ambiguous} ambiguous, "
+            f"{result.invalid} invalid."
+        )
+        if result.unmatched_sample:
+            self.stdout.write("Unmatched references: " + ", ".join(result.unmatched_sample))
+        if result.ambiguous_sample:
+            self.stdout.write("Claimed on several channels: " + ", ".join(result.ambiguous_sample))
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("Dry run: nothing was saved."))
@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Donation, User, normalize_transaction_id
+from core.seeding import DEFAULT_ANCHOR, SEED_PASSWORD, seed_reference, seed_relief_data
+
+
+def _anchor(value):
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise CommandError(f"--anchor must be an ISO date, got {value!r}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate linked organisers, donors, disasters, donations, messages and feedback "
+        "for benchmarks and load tests. The same --seed and --anchor always produce the same rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organisers', type=int, default=50)
+        parser.add_argument('--donors', type=int, default=2000)
+        parser.add_argument('--disasters', type=int, default=5000)
+        parser.add_argument('--donations', type=int, default=200_000)
+        parser.add_argument('--messages', type=int, default=100_000)
+        parser.add_argument('--feedback', type=int, default=20_000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--anchor', type=_anchor, default=DEFAULT_ANCHOR,
+                            help='Timestamps are spread over the year before this date (default 2025-01-01).')
+        parser.add_argument('--prefix', default='', help='Prepended to usernames and transaction ids.')
+
+    def handle(self, *args, **options):
+        if options['organisers'] < 1 or options['donors'] < 1:
+            raise CommandError("Need at least one organiser and one donor.")
+        prefix = options['prefix']
+        taken = User.objects.filter(username__in=[f'{prefix}organiser0', f'{prefix}donor0']).exists()
+        if taken:
+            raise CommandError(f"Users named {prefix}organiser0/{prefix}donor0 already exist; pass another --prefix.")
+        # References are stored normalized, so "b-" and "b" would produce the same ones
+        reference = normalize_transaction_id(seed_reference(prefix, options['seed'], 0))
+        if options['donations'] and Donation.objects.filter(transaction_ref=reference).exists():
+            raise CommandError(f"Donation {reference} already exists; pass another --prefix or --seed.")
+
+        def progress(model, count):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  {model._meta.verbose_name_plural}: {count}")
+
+        seed_relief_data(
+            organisers=options['organisers'], donors=options['donors'], disasters=options['disasters'],
+            donations=options['donations'], messages=options['messages'], feedback=options['feedback'],
+            batch_size=options['batch_size'], seed=options['seed'], anchor=options['anchor'],
+            prefix=prefix, progress=progress,
+        )
+        total = sum(options[key] for key in ('organisers', 'donors', 'disasters', 'donations', 'messages', 'feedback'))
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {total} rows (seed {options['seed']}). Every user's password is {SEED_PASSWORD!r}."
+        ))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.models import Disaster
+from core.ranking import rescore_dirty
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the feed priority score of disasters whose urgency, donations or messages "
+        "changed since the last run. Run it from cron, or keep it running with --every."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rescore every disaster (e.g. after changing weights).')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--every', type=float, metavar='SECONDS', help='Repeat at this interval until stopped.')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            Disaster.objects.update(score_dirty=True)
+        while True:
+            rescored = rescore_dirty(options['batch_size'])
+            if rescored or not options['every']:
+                self.stdout.write(self.style.SUCCESS(f"Rescored {rescored} disasters."))
+            if not options['every']:
+                return
+            time.sleep(options['every'])
@@ -0,0 +1,295 @@
+import bisect
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+
+from .caching import cache_stats
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Request Instrumentation
+# ----------------------------
+# MetricsMiddleware times each request and, through an execute wrapper on every
+# database connection and the TimedDjangoTemplates backend (settings.TEMPLATES),
+# the SQL and templates it ran. Both find the request via a context variable, so
+# sync views, and async views running queries in worker threads, both report. The
+# numbers go into in-process histograms labelled by URL name and method, which
+# /metrics serves in the Prometheus text format. Every worker process keeps its
+# own store, so scrape each worker (or run one) for complete numbers.
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        """(le, cumulative count) pairs, ending with +Inf."""
+        running = 0
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            running += count
+            yield bound, running
+
+
+class MetricsStore:
+    """Histograms and counters keyed by metric name and label values."""
+
+    HISTOGRAMS = {
+        'relief_request_duration_seconds': ('Wall time spent in the view and middleware.', SECONDS_BUCKETS),
+        'relief_request_db_queries': ('SQL queries run per request.', QUERY_BUCKETS),
+        'relief_request_db_duration_seconds': ('Time spent executing SQL per request.', SECONDS_BUCKETS),
+        'relief_request_template_duration_seconds': ('Time spent rendering templates per request.', SECONDS_BUCKETS),
+        'relief_response_size_bytes': ('Size of non-streaming response bodies.', BYTES_BUCKETS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._requests = {}
+
+    def record(self, view, method, status, observations):
+        with self._lock:
+            key = (view, method, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            for name, value in observations.items():
+                histogram = self._histograms.get((name, view, method))
+                if histogram is None:
+                    histogram = self._histograms[(name, view, method)] = Histogram(self.HISTOGRAMS[name][1])
+                histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._requests.clear()
+
+    def render(self):
+        """Everything recorded so far, in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                '# HELP relief_requests_total Requests handled, by URL name, method and status.',
+                '# TYPE relief_requests_total counter',
+            ]
+            for (view, method, status), count in sorted(self._requests.items()):
+                lines.append(f'relief_requests_total{{{_labels(view=view, method=method, status=status)}}} {count}')
+
+            for name, (help_text, _) in self.HISTOGRAMS.items():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for (metric, view, method), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    labels = _labels(view=view, method=method)
+                    for bound, count in histogram.samples():
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+        fragments = cache_stats()
+        for outcome in ('hits', 'misses'):
+            lines += [
+                f'# HELP relief_fragment_cache_{outcome}_total Fragment cache {outcome}, by fragment name.',
+                f'# TYPE relief_fragment_cache_{outcome}_total counter',
+            ]
+            for fragment, counts in sorted(fragments.items()):
+                lines.append(f'relief_fragment_cache_{outcome}_total{{{_labels(fragment=fragment)}}} {counts[outcome]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(**labels):
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels.items()
+    )
+    return ','.join(f'{key}="{value}"' for key, value in escaped)
+
+
+store = MetricsStore()
+
+
+class SlowRequestLog:
+    """Keeps the N slowest requests seen and logs each one that makes the list."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def offer(self, duration, describe):
+        limit = getattr(settings, 'METRICS_SLOW_REQUESTS', 0)
+        if not limit:
+            return
+        with self._lock:
+            entry = (duration, next(self._sequence))
+            if len(self._heap) < limit:
+                heapq.heappush(self._heap, entry)
+            elif duration > self._heap[0][0]:
+                heapq.heapreplace(self._heap, entry)
+            else:
+                return
+        logger.warning(describe())
+
+    def reset(self):
+        with self._lock:
+            self._heap.clear()
+
+
+slow_requests = SlowRequestLog()
+
+
+class RequestMetrics:
+    """What one request spent its time on; filled in by the wrappers below."""
+
+    def __init__(self, capture_sql):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.capture_sql = capture_sql
+        self.statements = []
+
+    def record_query(self, elapsed, sql):
+        self.queries += 1
+        self.db_time += elapsed
+        if self.capture_sql:
+            self.statements.append((elapsed, sql))
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(time.perf_counter() - start, sql)
+
+
+def _attach(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django's template backend, with each top-level render timed for the current request."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+def install():
+    """Hook query timing in; called once from CoreConfig.ready()."""
+    connection_created.connect(_attach, dispatch_uid='core.metrics')
+    for connection in connections.all(initialized_only=True):
+        _attach(None, connection)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    # Unnamed routes are labelled by their pattern rather than the view's dotted path
+    return match.view_name if match.url_name else match.route
+
+
+def _response_size(response):
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    """Record per-view timings into ``store``; see the module comment above."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    def start(self):
+        metrics = RequestMetrics(capture_sql=bool(getattr(settings, 'METRICS_SLOW_REQUESTS', 0)))
+        return metrics, _current.set(metrics), time.perf_counter()
+
+    def finish(self, request, response, metrics, start):
+        duration = time.perf_counter() - start
+        observations = {
+            'relief_request_duration_seconds': duration,
+            'relief_request_db_queries': metrics.queries,
+            'relief_request_db_duration_seconds': metrics.db_time,
+            'relief_request_template_duration_seconds': metrics.template_time,
+        }
+        size = _response_size(response)
+        if size is not None:
+            observations['relief_response_size_bytes'] = size
+        view = _view_name(request)
+        store.record(view, request.method, response.status_code, observations)
+        slow_requests.offer(duration, lambda: _describe(request, view, duration, metrics))
+        return response
+
+
+def _describe(request, view, duration, metrics):
+    lines = [
+        f"Slow request {request.method} {request.get_full_path()} ({view}): {duration * 1000:.1f} ms, "
+        f"{metrics.queries} queries in {metrics.db_time * 1000:.1f} ms, "
+        f"templates {metrics.template_time * 1000:.1f} ms"
+    ]
+    lines += [f"  {elapsed * 1000:7.2f} ms  {sql}" for elapsed, sql in metrics.statements]
+    return '\n'.join(lines)
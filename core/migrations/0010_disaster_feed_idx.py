@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_donation_proof_image_donation_transaction_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='disaster',
+            index=models.Index(fields=['-posted_at', '-id'], name='disaster_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_organisersummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='disaster',
+            index=models.Index(fields=['urgency_level', '-posted_at', '-id'], name='disaster_urgency_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disaster',
+            index=models.Index(fields=['organiser', '-posted_at'], name='disaster_organiser_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['donor', '-donated_at'], name='donation_donor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['disaster', '-donated_at', '-id'], name='donation_disaster_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['organiser', '-submitted_at'], name='feedback_organiser_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['donor', '-submitted_at'], name='feedback_donor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['recipient', '-timestamp'], name='message_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['disaster', 'timestamp'], name='message_thread_idx'),
+        ),
+    ]
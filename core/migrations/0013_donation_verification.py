@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donation',
+            name='verification_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('verified', 'Verified'), ('amount_mismatch', 'Amount mismatch')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='verified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:45
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def normalize_transaction_id(value):
+    # Frozen copy of core.models.normalize_transaction_id
+    return ''.join(ch for ch in str(value) if ch.isalnum()).upper()
+
+
+def fill_transaction_refs(apps, schema_editor):
+    """
+    Store the normalized id of existing donations in batches. Only the oldest
+    donation of a duplicated UTR gets it; later ones stay NULL so the unique
+    constraint can be added, and `manage.py find_duplicate_transactions`
+    reports them. Donation.save() keeps them NULL while the oldest one holds
+    the reference.
+    """
+    Donation = apps.get_model('core', 'Donation')
+    seen = set()
+    batch = []
+    rows = Donation.objects.order_by('pk').values_list('pk', 'payment_channel', 'transaction_id')
+    for pk, channel, transaction_id in rows.iterator(chunk_size=BATCH_SIZE):
+        key = (channel, normalize_transaction_id(transaction_id))
+        if not key[1] or key in seen:
+            continue
+        seen.add(key)
+        batch.append(Donation(pk=pk, transaction_ref=key[1]))
+        if len(batch) >= BATCH_SIZE:
+            Donation.objects.bulk_update(batch, ['transaction_ref'])
+            batch = []
+    Donation.objects.bulk_update(batch, ['transaction_ref'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_donation_verification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='donation',
+            name='payment_channel',
+            field=models.CharField(choices=[('bank_transfer', 'Bank transfer (NEFT/IMPS/RTGS)'), ('upi', 'UPI')], default='bank_transfer', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='transaction_ref',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True),
+        ),
+        migrations.RunPython(fill_transaction_refs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='donation',
+            constraint=models.UniqueConstraint(fields=('payment_channel', 'transaction_ref'), name='donation_unique_txn'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+from django.db import migrations
+
+# External-content FTS5 tables: the text lives only in core_disaster and
+# core_message, the FTS tables hold just the inverted index. Triggers keep them
+# in sync for every write path (forms, bulk_create, queryset update/delete),
+# which post_save signals would miss.
+
+TOKENIZER = "porter unicode61 remove_diacritics 2"
+
+FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE core_disaster_fts USING fts5(
+        title, description, location,
+        content='core_disaster', content_rowid='id', tokenize='{TOKENIZER}'
+    )
+    """,
+    """
+    CREATE TRIGGER core_disaster_fts_insert AFTER INSERT ON core_disaster BEGIN
+        INSERT INTO core_disaster_fts(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END
+    """,
+    """
+    CREATE TRIGGER core_disaster_fts_delete AFTER DELETE ON core_disaster BEGIN
+        INSERT INTO core_disaster_fts(core_disaster_fts, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+    END
+    """,
+    """
+    CREATE TRIGGER core_disaster_fts_update AFTER UPDATE OF title, description, location ON core_disaster BEGIN
+        INSERT INTO core_disaster_fts(core_disaster_fts, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+        INSERT INTO core_disaster_fts(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END
+    """,
+    "INSERT INTO core_disaster_fts(core_disaster_fts) VALUES ('rebuild')",
+    f"""
+    CREATE VIRTUAL TABLE core_message_fts USING fts5(
+        content,
+        content='core_message', content_rowid='id', tokenize='{TOKENIZER}'
+    )
+    """,
+    """
+    CREATE TRIGGER core_message_fts_insert AFTER INSERT ON core_message BEGIN
+        INSERT INTO core_message_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER core_message_fts_delete AFTER DELETE ON core_message BEGIN
+        INSERT INTO core_message_fts(core_message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER core_message_fts_update AFTER UPDATE OF content ON core_message BEGIN
+        INSERT INTO core_message_fts(core_message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO core_message_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    "INSERT INTO core_message_fts(core_message_fts) VALUES ('rebuild')",
+]
+
+BACKWARD = [
+    "DROP TRIGGER IF EXISTS core_message_fts_update",
+    "DROP TRIGGER IF EXISTS core_message_fts_delete",
+    "DROP TRIGGER IF EXISTS core_message_fts_insert",
+    "DROP TABLE IF EXISTS core_message_fts",
+    "DROP TRIGGER IF EXISTS core_disaster_fts_update",
+    "DROP TRIGGER IF EXISTS core_disaster_fts_delete",
+    "DROP TRIGGER IF EXISTS core_disaster_fts_insert",
+    "DROP TABLE IF EXISTS core_disaster_fts",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_donation_transaction_ref'),
+    ]
+
+    operations = [
+        migrations.RunSQL(FORWARD, BACKWARD),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:07
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+# Adding NOT NULL columns makes SQLite rebuild core_disaster, which drops the
+# full-text search triggers from 0015_search_index; put them back (also after
+# migrating backwards, which rebuilds it again).
+SEARCH_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS core_disaster_fts_insert AFTER INSERT ON core_disaster BEGIN
+        INSERT INTO core_disaster_fts(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_disaster_fts_delete AFTER DELETE ON core_disaster BEGIN
+        INSERT INTO core_disaster_fts(core_disaster_fts, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_disaster_fts_update
+    AFTER UPDATE OF title, description, location ON core_disaster BEGIN
+        INSERT INTO core_disaster_fts(core_disaster_fts, rowid, title, description, location)
+        VALUES ('delete', old.id, old.title, old.description, old.location);
+        INSERT INTO core_disaster_fts(rowid, title, description, location)
+        VALUES (new.id, new.title, new.description, new.location);
+    END
+    """,
+]
+
+
+def fill_donation_totals(apps, schema_editor):
+    """Count each disaster's existing donations in one UPDATE with correlated subqueries."""
+    Disaster = apps.get_model('core', 'Disaster')
+    Donation = apps.get_model('core', 'Donation')
+    donations = Donation.objects.filter(disaster=models.OuterRef('pk')).order_by().values('disaster')
+    Disaster.objects.update(
+        total_raised=Coalesce(
+            models.Subquery(donations.annotate(total=models.Sum('amount')).values('total')), 0,
+            output_field=models.DecimalField(max_digits=14, decimal_places=2),
+        ),
+        donation_count=Coalesce(models.Subquery(donations.annotate(count=models.Count('id')).values('count')), 0),
+        last_donation_at=models.Subquery(donations.annotate(last=models.Max('donated_at')).values('last')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_search_index'),
+    ]
+
+    operations = [
+        # Removing the columns again rebuilds the table too
+        migrations.RunSQL(migrations.RunSQL.noop, SEARCH_TRIGGERS),
+        migrations.AddField(
+            model_name='disaster',
+            name='donation_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='disaster',
+            name='last_donation_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='disaster',
+            name='total_raised',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.RunSQL(SEARCH_TRIGGERS, migrations.RunSQL.noop),
+        migrations.RunPython(fill_donation_totals, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='disaster',
+            index=models.Index(fields=['total_raised', 'id'], name='disaster_funding_idx'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:11
+
+import math
+from datetime import datetime, timedelta, timezone
+from importlib import import_module
+
+from django.db import migrations, models
+
+# The new columns rebuild core_disaster again; see 0016 for the search triggers
+SEARCH_TRIGGERS = import_module('core.migrations.0016_disaster_donation_totals').SEARCH_TRIGGERS
+BATCH_SIZE = 2000
+
+# Frozen copy of core.ranking.priority_score and its weights as of this migration
+URGENCY_WEIGHTS = {'high': 4.0, 'medium': 2.0, 'low': 1.0}
+HALF_LIFE = timedelta(days=3)
+ACTIVITY_LAG = timedelta(days=1)
+FUNDING_SCALE = 10_000
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def priority_score(urgency_level, posted_at, total_raised=0, last_activity_at=None):
+    freshness = posted_at
+    if last_activity_at is not None:
+        freshness = max(freshness, last_activity_at - ACTIVITY_LAG)
+    half_lives = (freshness - EPOCH) / HALF_LIFE
+    return (
+        half_lives * math.log(2)
+        + math.log(URGENCY_WEIGHTS.get(urgency_level, 1.0))
+        - math.log1p(float(total_raised) / FUNDING_SCALE)
+    )
+
+
+def score_existing_disasters(apps, schema_editor):
+    """Rank existing disasters now rather than on the first update_priority_scores run."""
+    Disaster = apps.get_model('core', 'Disaster')
+    Message = apps.get_model('core', 'Message')
+    last_message = models.Subquery(
+        Message.objects.filter(disaster=models.OuterRef('pk')).order_by().values('disaster')
+        .annotate(last=models.Max('timestamp')).values('last')
+    )
+    rows = (
+        Disaster.objects.order_by('pk').annotate(last_message_at=last_message)
+        .only('urgency_level', 'posted_at', 'total_raised', 'last_donation_at')
+    )
+    batch = []
+    for disaster in rows.iterator(chunk_size=BATCH_SIZE):
+        activity = [at for at in (disaster.last_donation_at, disaster.last_message_at) if at]
+        disaster.priority_score = priority_score(
+            disaster.urgency_level, disaster.posted_at, disaster.total_raised, max(activity) if activity else None,
+        )
+        disaster.score_dirty = False
+        batch.append(disaster)
+        if len(batch) >= BATCH_SIZE:
+            Disaster.objects.bulk_update(batch, ['priority_score', 'score_dirty'])
+            batch = []
+    Disaster.objects.bulk_update(batch, ['priority_score', 'score_dirty'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_disaster_donation_totals'),
+    ]
+
+    operations = [
+        migrations.RunSQL(migrations.RunSQL.noop, SEARCH_TRIGGERS),
+        migrations.AddField(
+            model_name='disaster',
+            name='priority_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='disaster',
+            name='score_dirty',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.RunSQL(SEARCH_TRIGGERS, migrations.RunSQL.noop),
+        migrations.RunPython(score_existing_disasters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='disaster',
+            index=models.Index(fields=['-priority_score', '-id'], name='disaster_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disaster',
+            index=models.Index(condition=models.Q(('score_dirty', True)), fields=['id'], name='disaster_rescore_idx'),
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:16
+
+import csv
+import re
+from pathlib import Path
+
+from django.db import migrations, models
+
+# Frozen copy of the core.geo gazetteer lookup and geohash encoding as of this
+# migration; only the bundled place list is read from the app.
+GAZETTEER_PATH = Path(__file__).resolve().parent.parent / 'data' / 'gazetteer.csv'
+GEOHASH_PRECISION = 9
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+_NOT_WORD = re.compile(r'[^\w]+', re.UNICODE)
+
+
+def normalize(text):
+    return _NOT_WORD.sub(' ', text or '').strip().lower()
+
+
+def read_gazetteer():
+    """Normalized place name or alias -> (latitude, longitude)."""
+    places = {}
+    with open(GAZETTEER_PATH, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            point = (float(row['latitude']), float(row['longitude']))
+            for name in [row['name'], *filter(None, row['aliases'].split('|'))]:
+                places.setdefault(normalize(name), point)
+    return places
+
+
+def resolve(places, location):
+    parts = [normalize(location)] + [normalize(part) for part in (location or '').split(',')]
+    for part in parts:
+        if part in places:
+            return places[part]
+    words = normalize(location).split()
+    for length in (3, 2, 1):
+        for start in range(len(words) - length + 1):
+            point = places.get(' '.join(words[start:start + length]))
+            if point:
+                return point
+    return None
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        bounds, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (bounds[0] + bounds[1]) / 2
+        if coordinate >= middle:
+            value = value << 1 | 1
+            bounds[0] = middle
+        else:
+            value <<= 1
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def locate_existing_disasters(apps, schema_editor):
+    """Place existing disasters: one update per distinct location."""
+    Disaster = apps.get_model('core', 'Disaster')
+    places = read_gazetteer()
+    locations = Disaster.objects.order_by().values_list('location', flat=True).distinct()
+    for location in list(locations):
+        point = resolve(places, location)
+        if point is not None:
+            latitude, longitude = point
+            Disaster.objects.filter(location=location).update(
+                latitude=latitude, longitude=longitude, geohash=encode(latitude, longitude),
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_disaster_priority_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='disaster',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='disaster',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='disaster',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(locate_existing_disasters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='disaster',
+            index=models.Index(fields=['geohash', 'latitude', 'longitude'], name='disaster_geohash_idx'),
+        ),
+    ]
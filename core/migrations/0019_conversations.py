@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def build_conversations(apps, schema_editor):
+    """One conversation per disaster and donor that have messages; earlier messages count as read."""
+    Message = apps.get_model('core', 'Message')
+    Conversation = apps.get_model('core', 'Conversation')
+    latest = {}
+    rows = Message.objects.order_by('pk').values_list(
+        'pk', 'sender_id', 'recipient_id', 'disaster_id', 'disaster__organiser_id', 'timestamp'
+    )
+    for pk, sender_id, recipient_id, disaster_id, organiser_id, timestamp in rows.iterator(chunk_size=BATCH_SIZE):
+        donor_id = recipient_id if sender_id == organiser_id else sender_id
+        latest[disaster_id, donor_id] = (organiser_id, pk, timestamp)
+    Conversation.objects.bulk_create(
+        (Conversation(disaster_id=disaster_id, donor_id=donor_id, organiser_id=organiser_id,
+                      last_message_id=pk, last_message_at=timestamp)
+         for (disaster_id, donor_id), (organiser_id, pk, timestamp) in latest.items()),
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_disaster_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='unread_messages',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('donor_unread', models.PositiveIntegerField(default=0)),
+                ('organiser_unread', models.PositiveIntegerField(default=0)),
+                ('disaster', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.disaster')),
+                ('donor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='donor_conversations', to=settings.AUTH_USER_MODEL)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.message')),
+                ('organiser', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='organiser_conversations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organiser', '-last_message_at'], name='conversation_organiser_idx'), models.Index(fields=['donor', '-last_message_at'], name='conversation_donor_idx')],
+                'constraints': [models.UniqueConstraint(fields=('disaster', 'donor'), name='conversation_unique_donor')],
+            },
+        ),
+        migrations.RunPython(build_conversations, migrations.RunPython.noop),
+    ]
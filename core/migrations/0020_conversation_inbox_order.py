@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_conversations'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='conversation',
+            name='conversation_organiser_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='conversation',
+            name='conversation_donor_idx',
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['organiser', '-last_message_at', '-id'], name='conversation_organiser_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['donor', '-last_message_at', '-id'], name='conversation_donor_idx'),
+        ),
+    ]
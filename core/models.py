@@ -1,6 +1,10 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.utils import timezone
+
+from . import geo, ranking
 
 # ----------------------------
 # Custom User Model
@@ -13,6 +17,8 @@ class User(AbstractUser):
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
     phone = models.CharField(max_length=15, blank=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    # ✅ Unread messages over all the user's conversations, for the sidebar badge
+    unread_messages = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f"{self.username} ({self.role})"
@@ -41,24 +47,153 @@ class Disaster(models.Model):
     ifsc_code = models.CharField(max_length=15)
     upi_id = models.CharField(max_length=50, blank=True)
 
+    # ✅ Donation totals, kept current by the signal handlers in core/signals.py
+    total_raised = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    donation_count = models.PositiveIntegerField(default=0, editable=False)
+    last_donation_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    # ✅ Coordinates resolved from location (see core/geo.py); empty for unknown places
+    latitude = models.FloatField(blank=True, null=True, editable=False)
+    longitude = models.FloatField(blank=True, null=True, editable=False)
+    geohash = models.CharField(max_length=12, blank=True, null=True, editable=False)
+
+    # ✅ Feed ranking (see core/ranking.py); score_dirty marks rows to recompute
+    priority_score = models.FloatField(default=0, editable=False)
+    score_dirty = models.BooleanField(default=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Backs the keyset-paginated donor feed: ORDER BY posted_at DESC, id DESC
+            models.Index(fields=['-posted_at', '-id'], name='disaster_feed_idx'),
+            # Feed sorted by funding: ORDER BY total_raised, id
+            models.Index(fields=['total_raised', 'id'], name='disaster_funding_idx'),
+            # Default feed order: ORDER BY priority_score DESC, id DESC
+            models.Index(fields=['-priority_score', '-id'], name='disaster_priority_idx'),
+            # Finds the few disasters whose score needs recomputing
+            models.Index(fields=['id'], condition=models.Q(score_dirty=True), name='disaster_rescore_idx'),
+            # Nearby search: one range scan per geohash cell, covering the coordinates
+            models.Index(fields=['geohash', 'latitude', 'longitude'], name='disaster_geohash_idx'),
+            # Feed filtered by urgency
+            models.Index(fields=['urgency_level', '-posted_at', '-id'], name='disaster_urgency_feed_idx'),
+            # Organiser dashboard, profile and donations page
+            models.Index(fields=['organiser', '-posted_at'], name='disaster_organiser_idx'),
+        ]
+
+    TOTAL_FIELDS = ('total_raised', 'donation_count', 'last_donation_at')
+    # Written by queryset updates elsewhere, never by save() of an existing row
+    MAINTAINED_FIELDS = TOTAL_FIELDS + ('priority_score',)
+    GEO_FIELDS = ('latitude', 'longitude', 'geohash')
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'location' in update_fields:
+            self.latitude, self.longitude, self.geohash = geo.locate(self.location)
+            if update_fields is not None:
+                kwargs['update_fields'] = [*update_fields, *self.GEO_FIELDS]
+        if self._state.adding:
+            # A new appeal has no donations or messages yet, so it can be ranked right away
+            self.priority_score = ranking.priority_score(self.urgency_level, self.posted_at or timezone.now())
+            self.score_dirty = False
+        else:
+            self.score_dirty = True
+            # Donations update the totals with F() expressions; saving an
+            # instance loaded before them must not write its stale copies back
+            if kwargs.get('update_fields') is None:
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in self.MAINTAINED_FIELDS
+                ]
+            elif 'score_dirty' not in kwargs['update_fields']:
+                kwargs['update_fields'] = [*kwargs['update_fields'], 'score_dirty']
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def donation_totals():
+        """Subqueries recounting the donation total fields from the donation rows, for update()."""
+        donations = Donation.objects.filter(disaster=models.OuterRef('pk')).order_by().values('disaster')
+        return {
+            'total_raised': Coalesce(
+                models.Subquery(donations.annotate(total=models.Sum('amount')).values('total')), 0,
+                output_field=models.DecimalField(max_digits=14, decimal_places=2),
+            ),
+            'donation_count': Coalesce(models.Subquery(donations.annotate(count=models.Count('id')).values('count')), 0),
+            'last_donation_at': models.Subquery(donations.annotate(last=models.Max('donated_at')).values('last')),
+        }
+
     def __str__(self):
         return f"{self.title} ({self.urgency_level})"
 
 # ----------------------------
 # Donation Model
 # ----------------------------
+def normalize_transaction_id(value):
+    """Canonical form of a UTR/transaction reference: no spaces or dashes, upper case."""
+    return ''.join(ch for ch in str(value) if ch.isalnum()).upper()
+
 class Donation(models.Model):
+    VERIFICATION_CHOICES = [
+        ('pending', 'Pending'),
+        ('verified', 'Verified'),
+        ('amount_mismatch', 'Amount mismatch'),
+    ]
+    CHANNEL_CHOICES = [
+        ('bank_transfer', 'Bank transfer (NEFT/IMPS/RTGS)'),
+        ('upi', 'UPI'),
+    ]
+
     donor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     disaster = models.ForeignKey(Disaster, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
 
     # ✅ Manual payment details
+    payment_channel = models.CharField(max_length=20, choices=CHANNEL_CHOICES, default='bank_transfer')
     transaction_id = models.CharField(max_length=100)
+    # Normalized transaction_id, unique per channel (set in save())
+    transaction_ref = models.CharField(max_length=100, blank=True, null=True, editable=False)
     proof_image = models.ImageField(upload_to='donation_proofs/', blank=True, null=True)
 
     message = models.TextField(blank=True)
     donated_at = models.DateTimeField(auto_now_add=True)
 
+    # ✅ Set by bank statement reconciliation
+    verification_status = models.CharField(max_length=20, choices=VERIFICATION_CHOICES, default='pending')
+    verified_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Donor history: filter by donor, newest first
+            models.Index(fields=['donor', '-donated_at'], name='donation_donor_idx'),
+            # Organiser donations, grouped per disaster, newest first
+            models.Index(fields=['disaster', '-donated_at', '-id'], name='donation_disaster_idx'),
+        ]
+        constraints = [
+            # A UTR can only be claimed once per channel; the index also serves the form's pre-check
+            models.UniqueConstraint(fields=['payment_channel', 'transaction_ref'], name='donation_unique_txn'),
+        ]
+
+    def save(self, *args, **kwargs):
+        ref = normalize_transaction_id(self.transaction_id) or None
+        if (
+            ref and not self._state.adding and self.transaction_ref is None
+            and Donation.transaction_exists(self.payment_channel, self.transaction_id, exclude_pk=self.pk)
+        ):
+            # A legacy duplicate that migration 0014 left unclaimed; keep it NULL
+            ref = None
+        self.transaction_ref = ref
+        # The disaster's totals are updated by a post_save handler; commit both or neither
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def transaction_exists(cls, payment_channel, transaction_id, exclude_pk=None):
+        matches = cls.objects.filter(
+            payment_channel=payment_channel,
+            transaction_ref=normalize_transaction_id(transaction_id),
+        )
+        if exclude_pk is not None:
+            matches = matches.exclude(pk=exclude_pk)
+        return matches.exists()
+
     def __str__(self):
         return f"{self.donor.username} → {self.disaster.title} (₹{self.amount})"
 
@@ -72,9 +207,118 @@ class Message(models.Model):
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Inboxes: filter by recipient, newest first
+            models.Index(fields=['recipient', '-timestamp'], name='message_inbox_idx'),
+            # Threads: filter by disaster, oldest first
+            models.Index(fields=['disaster', 'timestamp'], name='message_thread_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The conversation and unread counters are updated by a post_save handler; commit all or none
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.sender.username} → {self.recipient.username} ({self.disaster.title})"
 
+# ----------------------------
+# Conversation Model
+# ----------------------------
+class Conversation(models.Model):
+    """
+    One row per disaster and donor writing about it, kept current by the
+    signal handlers in core/signals.py: the latest message and how many
+    messages each side has not read yet. Inboxes list these rows instead of
+    every message, and User.unread_messages holds the sum for the badge.
+    """
+    disaster = models.ForeignKey(Disaster, on_delete=models.CASCADE)
+    donor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='donor_conversations')
+    organiser = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='organiser_conversations'
+    )
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    last_message_at = models.DateTimeField(blank=True, null=True)
+    donor_unread = models.PositiveIntegerField(default=0)
+    organiser_unread = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['disaster', 'donor'], name='conversation_unique_donor'),
+        ]
+        indexes = [
+            # Inboxes: the user's conversations, latest activity first, keyset-paged on (last_message_at, id)
+            models.Index(fields=['organiser', '-last_message_at', '-id'], name='conversation_organiser_idx'),
+            models.Index(fields=['donor', '-last_message_at', '-id'], name='conversation_donor_idx'),
+        ]
+
+    @classmethod
+    def record(cls, message):
+        """Count a new message as the latest, unread one in its conversation."""
+        organiser_id = message.disaster.organiser_id
+        if message.sender_id == organiser_id:
+            donor_id, unread = message.recipient_id, 'donor_unread'
+        else:
+            donor_id, unread = message.sender_id, 'organiser_unread'
+        conversation = cls.objects.filter(disaster_id=message.disaster_id, donor_id=donor_id)
+        changes = {'last_message': message, 'last_message_at': message.timestamp, unread: models.F(unread) + 1}
+        if not conversation.update(**changes):
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        disaster_id=message.disaster_id, donor_id=donor_id, organiser_id=organiser_id,
+                        last_message=message, last_message_at=message.timestamp, **{unread: 1},
+                    )
+            except IntegrityError:
+                # Another first message in the same conversation won the insert
+                conversation.update(**changes)
+        User.objects.filter(pk=message.recipient_id).update(unread_messages=models.F('unread_messages') + 1)
+
+    @classmethod
+    def from_messages(cls, messages):
+        """Conversations (not saved, nothing unread) for a queryset of messages, latest message each."""
+        latest = {}
+        rows = messages.order_by('pk').values_list(
+            'pk', 'sender_id', 'recipient_id', 'disaster_id', 'disaster__organiser_id', 'timestamp'
+        )
+        for pk, sender_id, recipient_id, disaster_id, organiser_id, timestamp in rows.iterator():
+            donor_id = recipient_id if sender_id == organiser_id else sender_id
+            latest[disaster_id, donor_id] = (organiser_id, pk, timestamp)
+        return [
+            cls(disaster_id=disaster_id, donor_id=donor_id, organiser_id=organiser_id,
+                last_message_id=pk, last_message_at=timestamp)
+            for (disaster_id, donor_id), (organiser_id, pk, timestamp) in latest.items()
+        ]
+
+    @classmethod
+    def unread_total(cls):
+        """Expression recounting User.unread_messages from the user's conversations, for update()."""
+        def side(field):
+            rows = cls.objects.filter(**{field: models.OuterRef('pk')}).order_by().values(field)
+            return Coalesce(models.Subquery(rows.annotate(total=models.Sum(f'{field}_unread')).values('total')), 0)
+        return side('organiser') + side('donor')
+
+    @classmethod
+    def mark_read(cls, user, disaster):
+        """
+        Mark the user's conversations about the disaster read. Returns whether
+        anything was unread; user.unread_messages is refreshed if so.
+        """
+        if not user.unread_messages:
+            return False
+        side = 'organiser' if disaster.organiser_id == user.pk else 'donor'
+        unread = f'{side}_unread'
+        cleared = cls.objects.filter(disaster=disaster, **{side: user, f'{unread}__gt': 0}).update(**{unread: 0})
+        if cleared:
+            # Recounted rather than decremented, so concurrent reads of the same thread cannot go negative
+            User.objects.filter(pk=user.pk).update(unread_messages=cls.unread_total())
+            user.refresh_from_db(fields=['unread_messages'])
+        return bool(cleared)
+
+    def __str__(self):
+        return f"Conversation on disaster #{self.disaster_id} with donor #{self.donor_id}"
+
 # ----------------------------
 # Feedback Model
 # ----------------------------
@@ -86,5 +330,68 @@ class Feedback(models.Model):
     comment = models.TextField(blank=True)
     submitted_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['organiser', '-submitted_at'], name='feedback_organiser_idx'),
+            models.Index(fields=['donor', '-submitted_at'], name='feedback_donor_idx'),
+        ]
+
     def __str__(self):
         return f"{self.donor.username} → {self.organiser.username} ({self.rating}★)"
+
+# ----------------------------
+# Organiser Summary
+# ----------------------------
+class OrganiserSummary(models.Model):
+    """
+    Dashboard counters for one organiser, kept current by the signal handlers
+    in core/signals.py so the dashboard reads a single row instead of
+    aggregating over disasters, donations and feedback on every visit.
+    """
+    organiser = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='summary'
+    )
+    disaster_count = models.PositiveIntegerField(default=0)
+    high_urgency_count = models.PositiveIntegerField(default=0)
+    donation_count = models.PositiveIntegerField(default=0)
+    donation_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+
+    @property
+    def avg_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else 0
+
+    @classmethod
+    def compute(cls, organiser_id):
+        """Recount an organiser's summary from the source tables (not saved)."""
+        disasters = Disaster.objects.filter(organiser_id=organiser_id).aggregate(
+            disaster_count=models.Count('id'),
+            high_urgency_count=models.Count('id', filter=models.Q(urgency_level='high')),
+        )
+        donations = Donation.objects.filter(disaster__organiser_id=organiser_id).aggregate(
+            donation_count=models.Count('id'),
+            donation_total=models.Sum('amount', default=0),
+        )
+        feedback = Feedback.objects.filter(organiser_id=organiser_id).aggregate(
+            rating_sum=models.Sum('rating', default=0),
+            rating_count=models.Count('id'),
+        )
+        return cls(organiser_id=organiser_id, **disasters, **donations, **feedback)
+
+    @classmethod
+    def rebuild(cls, organiser_id):
+        summary = cls.compute(organiser_id)
+        summary.save()
+        return summary
+
+    @classmethod
+    def for_organiser(cls, organiser):
+        """Return the organiser's summary, building it on first use."""
+        try:
+            return cls.objects.get(organiser=organiser)
+        except cls.DoesNotExist:
+            return cls.rebuild(organiser.pk)
+
+    def __str__(self):
+        return f"Summary for organiser #{self.organiser_id}"
@@ -0,0 +1,76 @@
+import base64
+import math
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+# ----------------------------
+# Keyset (cursor) Pagination
+# ----------------------------
+# Pages are addressed by the sort value and id of the last row already shown,
+# so every page is one indexed range scan no matter how deep the donor
+# scrolls, unlike OFFSET which reads and throws away all earlier rows.
+
+# Feed orders: sort field, whether it is descending, and how to read it back
+# from a cursor. Each has a (field, id) index on Disaster.
+FEED_ORDERS = {
+    'priority': ('priority_score', True, float),
+    'newest': ('posted_at', True, datetime.fromisoformat),
+    'least_funded': ('total_raised', False, Decimal),
+}
+# Inbox order: latest activity first, on Conversation's (side, -last_message_at, -id) indexes
+INBOX_ORDERS = {
+    'recent': ('last_message_at', True, datetime.fromisoformat),
+}
+
+
+def encode_cursor(value, pk):
+    value = value.isoformat() if isinstance(value, datetime) else value
+    raw = f"{value}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, parse=datetime.fromisoformat):
+    """Return (value, pk) for a cursor, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        value = parse(value)
+        # float() and Decimal() both accept NaN and Infinity, which no row sorts against
+        if isinstance(value, (float, Decimal)) and not math.isfinite(value):
+            return None
+        return value, int(pk)
+    except (ValueError, UnicodeDecodeError, InvalidOperation):
+        return None
+
+
+def keyset_page(queryset, cursor=None, page_size=20, order='newest', orders=FEED_ORDERS):
+    """
+    Return (rows, next_cursor) for a queryset in one of `orders` (the feed's
+    FEED_ORDERS by default).
+
+    One extra row is fetched to know whether another page exists; next_cursor
+    is None on the last page.
+    """
+    field, descending, parse = orders[order]
+    if descending:
+        queryset = queryset.order_by(f'-{field}', '-id')
+        after, id_after = f'{field}__lt', 'id__lt'
+    else:
+        queryset = queryset.order_by(field, 'id')
+        after, id_after = f'{field}__gt', 'id__gt'
+    position = decode_cursor(cursor, parse)
+    if position:
+        value, pk = position
+        queryset = queryset.filter(Q(**{after: value}) | Q(**{field: value, id_after: pk}))
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return rows, next_cursor
@@ -0,0 +1,85 @@
+import functools
+import gzip
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import hashers, password_validation
+
+# ----------------------------
+# Password Hashing & Validation
+# ----------------------------
+# The hashers below are Django's own with their cost read from settings, so
+# it can be tuned per deployment. They keep Django's algorithm names, which
+# means existing hashes still verify, and Django rehashes a password on the
+# next successful login whenever the preferred hasher or its cost changes.
+# settings.PASSWORD_HASHERS puts the chosen one first.
+
+
+class TunedPBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        # Never below Django's own count, or logins would rehash stored passwords weaker
+        return max(settings.PASSWORD_PBKDF2_ITERATIONS, hashers.PBKDF2PasswordHasher.iterations)
+
+
+class TunedScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    # Django's scrypt profile is OWASP's 16 MiB one: N=2**14 with parallelism
+    # 5, which multiplies the CPU work per hash without raising its memory.
+    # Neither setting is allowed below it, for the same reason as pbkdf2.
+
+    @property
+    def work_factor(self):
+        return max(settings.PASSWORD_SCRYPT_WORK_FACTOR, hashers.ScryptPasswordHasher.work_factor)
+
+    @property
+    def parallelism(self):
+        return max(settings.PASSWORD_SCRYPT_PARALLELISM, hashers.ScryptPasswordHasher.parallelism)
+
+    @property
+    def maxmem(self):
+        # OpenSSL refuses more than 32 MiB by default; scrypt needs 128 * r * N bytes
+        return 2 * 128 * self.block_size * self.work_factor
+
+
+class TunedArgon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Needs the argon2-cffi package. Costs never drop below Django's own."""
+
+    @property
+    def time_cost(self):
+        return max(settings.PASSWORD_ARGON2_TIME_COST, hashers.Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return max(settings.PASSWORD_ARGON2_MEMORY_COST, hashers.Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return max(settings.PASSWORD_ARGON2_PARALLELISM, hashers.Argon2PasswordHasher.parallelism)
+
+
+DEFAULT_PASSWORD_LIST = Path(password_validation.__file__).resolve().parent / 'common-passwords.txt.gz'
+
+
+@functools.cache
+def common_passwords(path=DEFAULT_PASSWORD_LIST):
+    """The (lowercased) password list at ``path``, read once per process."""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return frozenset(line.strip() for line in f)
+    except OSError:
+        with open(path) as f:
+            return frozenset(line.strip() for line in f)
+
+
+class CommonPasswordValidator(password_validation.CommonPasswordValidator):
+    """
+    Django's validator reads and decompresses its 20,000-entry list each time
+    it is instantiated; this one shares a single frozenset per list file.
+    """
+
+    def __init__(self, password_list_path=DEFAULT_PASSWORD_LIST):
+        self.password_list_path = Path(password_list_path)
+
+    @property
+    def passwords(self):
+        return common_passwords(self.password_list_path)
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+from collections import defaultdict
+from functools import cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# ----------------------------
+# Message Pub/Sub
+# ----------------------------
+# New messages are published to "thread:<disaster_id>" and
+# "inbox:<recipient_id>" channels and pushed to open event streams. The broker
+# class is chosen by settings.MESSAGE_BROKER so the in-process one can be
+# replaced by a broker shared between worker processes.
+
+
+class Subscription:
+    """One listener's queue on a channel, owned by the event loop that created it."""
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self, payload):
+        # publish() may run in a sync view's thread; hand over to our loop
+        try:
+            self.loop.call_soon_threadsafe(self._put, payload)
+        except RuntimeError:
+            # The loop has shut down; close() will follow
+            pass
+
+    def _put(self, payload):
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # A stalled client must not grow memory; it can resync via Last-Event-ID
+            pass
+
+    async def get(self, timeout=None):
+        """Next payload, or None if nothing arrived within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Fan-out to subscribers in this process only."""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channel, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(payload)
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._subscribers.get(channel, ()))
+            return sum(len(subs) for subs in self._subscribers.values())
+
+
+@cache
+def get_broker():
+    broker_class = getattr(settings, 'MESSAGE_BROKER', 'core.pubsub.InProcessBroker')
+    return import_string(broker_class)()
+
+
+def thread_channel(disaster_id):
+    return f'thread:{disaster_id}'
+
+
+def inbox_channel(user_id):
+    return f'inbox:{user_id}'
+
+
+def message_payload(message):
+    return {
+        'id': message.pk,
+        'disaster_id': message.disaster_id,
+        'disaster': message.disaster.title,
+        'sender': message.sender.username,
+        'content': message.content,
+        'timestamp': message.timestamp.isoformat(),
+    }
@@ -0,0 +1,80 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+
+from .caching import bump
+
+# ----------------------------
+# Disaster Priority Ranking
+# ----------------------------
+# The donor feed is ordered by Disaster.priority_score, which combines urgency,
+# how recently the appeal was posted or last saw a donation or message, and how
+# little it has raised so far. The score lives in the log domain and decays
+# from a fixed epoch instead of from "now": an appeal's score grows with its
+# posting time rather than shrinking with age, so the order between two
+# disasters stays correct as time passes. A score therefore only has to be
+# recomputed when its own inputs change. Writes mark the disaster with
+# score_dirty, and rescore_dirty() (run by `manage.py update_priority_scores`)
+# recomputes just those.
+#
+# With the weights below, a high urgency appeal ranks like a low urgency one
+# posted two half-lives later, and every ₹FUNDING_SCALE already raised counts
+# about as much as being one half-life older.
+
+URGENCY_WEIGHTS = {'high': 4.0, 'medium': 2.0, 'low': 1.0}
+HALF_LIFE = timedelta(days=3)
+# Fresh activity ranks an appeal like a repost this much older than the activity
+ACTIVITY_LAG = timedelta(days=1)
+FUNDING_SCALE = 10_000
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def priority_score(urgency_level, posted_at, total_raised=0, last_activity_at=None):
+    freshness = posted_at
+    if last_activity_at is not None:
+        freshness = max(freshness, last_activity_at - ACTIVITY_LAG)
+    half_lives = (freshness - EPOCH) / HALF_LIFE
+    return (
+        half_lives * math.log(2)
+        + math.log(URGENCY_WEIGHTS.get(urgency_level, 1.0))
+        - math.log1p(float(total_raised) / FUNDING_SCALE)
+    )
+
+
+def rescore_dirty(batch_size=500):
+    """Recompute priority_score for every disaster marked score_dirty; return how many."""
+    Disaster = apps.get_model('core', 'Disaster')
+    Message = apps.get_model('core', 'Message')
+    last_message = Subquery(
+        Message.objects.filter(disaster=OuterRef('pk')).order_by().values('disaster')
+        .annotate(last=Max('timestamp')).values('last')
+    )
+    rescored = 0
+    while True:
+        with transaction.atomic():
+            ids = list(Disaster.objects.filter(score_dirty=True).values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                if rescored:
+                    # Cached feed pages are ranked by the old scores
+                    bump('disasters')
+                return rescored
+            # Cleared before reading, so a write that lands after the read marks it dirty again
+            Disaster.objects.filter(pk__in=ids).update(score_dirty=False)
+            rows = (
+                Disaster.objects.filter(pk__in=ids)
+                .annotate(last_message_at=last_message)
+                .only('urgency_level', 'posted_at', 'total_raised', 'last_donation_at')
+            )
+            changed = []
+            for disaster in rows:
+                activity = [at for at in (disaster.last_donation_at, disaster.last_message_at) if at]
+                disaster.priority_score = priority_score(
+                    disaster.urgency_level, disaster.posted_at, disaster.total_raised,
+                    max(activity) if activity else None,
+                )
+                changed.append(disaster)
+            Disaster.objects.bulk_update(changed, ['priority_score'])
+        rescored += len(ids)
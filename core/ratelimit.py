@@ -0,0 +1,152 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import cache, wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+from .caching import get_cache
+
+# ----------------------------
+# Write Rate Limiting
+# ----------------------------
+# Views that write rows (donations, messages, feedback) are wrapped in
+# @ratelimit('<url name>'). Each write takes one token from a bucket per user
+# and one from a bucket per client IP, or none if either is empty.
+# settings.RATELIMITS gives the rate for each as "count/period", with period
+# s, m, h or d. A full bucket allows a burst of `count` writes, then refills at
+# count/period per second. When a bucket is empty the view is not called and a
+# 429 with Retry-After is returned.
+#
+# Buckets live in the class named by settings.RATELIMIT_STORE: in process
+# memory by default (each worker limits on its own), or in the Django cache
+# with CacheBucketStore to share them between workers.
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@cache
+def parse_rate(rate):
+    """'10/m' -> (capacity 10, refill 10/60 tokens per second)."""
+    count, _, period = rate.partition('/')
+    seconds = PERIODS[period[-1]] * int(period[:-1] or 1)
+    return int(count), int(count) / seconds
+
+
+def _refill(state, capacity, refill, now):
+    """Tokens in a bucket whose last (tokens, stamp) was ``state``, as of ``now``."""
+    if state is None:
+        return capacity
+    return min(capacity, state[0] + (now - state[1]) * refill)
+
+
+def _take(states, buckets, now):
+    """
+    Take a token from every bucket, or from none if any is empty. Returns the
+    new (tokens, stamp) states and the seconds to wait (0 if taken).
+    """
+    levels = [_refill(state, capacity, refill, now) for state, (_, capacity, refill) in zip(states, buckets)]
+    wait = max(((1 - tokens) / refill for tokens, (_, _, refill) in zip(levels, buckets) if tokens < 1), default=0)
+    spent = 0 if wait else 1
+    return [(tokens - spent, now) for tokens in levels], wait
+
+
+class LocalBucketStore:
+    """Buckets in a dict in this process; the least recently used are dropped past max_keys."""
+
+    max_keys = 100_000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def take(self, buckets):
+        """Spend a token from each (key, capacity, refill) bucket; return the seconds to wait, 0 if spent."""
+        now = time.monotonic()
+        with self._lock:
+            states, wait = _take([self._buckets.get(key) for key, _, _ in buckets], buckets, now)
+            for (key, _, _), state in zip(buckets, states):
+                self._buckets[key] = state
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Buckets in the default cache, shared by every worker using it. The read and
+    write are not atomic, so concurrent requests can occasionally both spend
+    the last token.
+    """
+
+    prefix = 'ratelimit'
+
+    def take(self, buckets):
+        cache = get_cache()
+        keys = [f'{self.prefix}:{key}' for key, _, _ in buckets]
+        stored = cache.get_many(keys)
+        states, wait = _take([stored.get(key) for key in keys], buckets, time.time())
+        # An idle bucket is full again after capacity / refill seconds
+        timeout = max(math.ceil(capacity / refill) for _, capacity, refill in buckets) + 1
+        cache.set_many(dict(zip(keys, states)), timeout=timeout)
+        return wait
+
+    def clear(self):
+        pass
+
+
+@cache
+def get_store():
+    store_class = getattr(settings, 'RATELIMIT_STORE', 'core.ratelimit.LocalBucketStore')
+    return import_string(store_class)()
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR') or 'unknown'
+
+
+def check(request, route):
+    """Seconds until ``request`` may write to ``route`` again, or 0 if it may now."""
+    limits = settings.RATELIMITS.get(route) if getattr(settings, 'RATELIMIT_ENABLED', True) else None
+    if not limits:
+        return 0
+    keys = {'ip': client_ip(request)}
+    if request.user.is_authenticated:
+        keys['user'] = request.user.pk
+    buckets = []
+    for scope, identity in keys.items():
+        rate = limits.get(scope)
+        if rate:
+            buckets.append((f'{route}:{scope}:{identity}', *parse_rate(rate)))
+    return get_store().take(buckets) if buckets else 0
+
+
+def too_many_requests(wait):
+    response = HttpResponse(
+        "Too many submissions in a short time. Please wait a moment and try again.",
+        status=429, content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+def ratelimit(route, methods=('POST',)):
+    """Throttle ``methods`` requests to the decorated view by settings.RATELIMITS[route]."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                wait = check(request, route)
+                if wait:
+                    return too_many_requests(wait)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
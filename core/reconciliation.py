@@ -0,0 +1,168 @@
+import csv
+import io
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.utils import timezone
+
+from .models import Donation, normalize_transaction_id
+
+# ----------------------------
+# Bank Statement Reconciliation
+# ----------------------------
+# A statement is read one CSV row at a time and matched in batches of
+# batch_size rows: each batch looks up only the donations in scope that claim
+# one of its references (transaction_ref__in, served by the donation_unique_txn
+# index) and writes its status changes back with one bulk_update. Queries grow
+# with the number of batches, memory with the batch size.
+#
+# A reference is unique per payment channel, so when the statement has a
+# channel column a row matches the donation on that channel. Without one, a
+# reference claimed on more than one channel is reported as ambiguous and left
+# alone.
+
+TRANSACTION_COLUMNS = ('transaction id', 'utr', 'utr no', 'utr number', 'reference', 'ref no',
+                       'reference no', 'transaction reference', 'txn id')
+AMOUNT_COLUMNS = ('amount', 'credit', 'credit amount', 'deposit', 'deposit amount', 'amount (inr)')
+CHANNEL_COLUMNS = ('channel', 'payment channel', 'payment mode', 'mode', 'transfer type')
+CHANNEL_ALIASES = {
+    'upi': 'upi',
+    'bank transfer': 'bank_transfer', 'neft': 'bank_transfer', 'imps': 'bank_transfer', 'rtgs': 'bank_transfer',
+}
+UNMATCHED_SAMPLE = 50
+
+
+class StatementError(ValueError):
+    """The statement file could not be read as a bank/UPI CSV export."""
+
+
+@dataclass
+class ReconciliationResult:
+    rows: int = 0
+    verified: int = 0
+    amount_mismatch: int = 0
+    already_verified: int = 0
+    repeated: int = 0
+    unmatched: int = 0
+    ambiguous: int = 0
+    invalid: int = 0
+    unmatched_sample: list = field(default_factory=list)
+    ambiguous_sample: list = field(default_factory=list)
+
+
+def _header_key(header):
+    return ' '.join(header.replace('_', ' ').lower().split())
+
+
+def _find_column(headers, candidates, explicit=None, required=True):
+    normalized = {_header_key(header): header for header in headers if header}
+    if explicit:
+        if _header_key(explicit) not in normalized:
+            raise StatementError(f"Column '{explicit}' not found in statement")
+        return normalized[_header_key(explicit)]
+    for candidate in candidates:
+        if candidate in normalized:
+            return normalized[candidate]
+    if not required:
+        return None
+    raise StatementError(f"None of the columns {', '.join(candidates)} found in statement")
+
+
+def _parse_amount(value):
+    cleaned = (value or '').replace(',', '').replace('₹', '').replace('INR', '').strip()
+    try:
+        return Decimal(cleaned)
+    except InvalidOperation:
+        return None
+
+
+def _parse_channel(value):
+    """Donation.payment_channel for a statement's channel text, or None if unknown."""
+    return CHANNEL_ALIASES.get(_header_key(value or ''))
+
+
+def open_statement(binary_file):
+    """Text view of an uploaded or opened binary CSV, decoded as it is read."""
+    return io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+
+
+def reconcile(text_file, donations=None, *, txn_column=None, amount_column=None,
+              channel_column=None, batch_size=1000, dry_run=False):
+    """
+    Match statement rows against ``donations`` (default: all) by normalized
+    transaction id, and channel when the statement has one, and mark them
+    verified or amount_mismatch.
+    """
+    reader = csv.DictReader(text_file)
+    if not reader.fieldnames:
+        raise StatementError("Statement is empty")
+    txn_key = _find_column(reader.fieldnames, TRANSACTION_COLUMNS, txn_column)
+    amount_key = _find_column(reader.fieldnames, AMOUNT_COLUMNS, amount_column)
+    channel_key = _find_column(reader.fieldnames, CHANNEL_COLUMNS, channel_column, required=False)
+
+    if donations is None:
+        donations = Donation.objects.all()
+
+    result = ReconciliationResult()
+    now = timezone.now()
+    batch, seen = [], set()
+
+    def flush():
+        claims = defaultdict(list)
+        matches = donations.filter(transaction_ref__in={ref for ref, *_ in batch}).values_list(
+            'pk', 'payment_channel', 'transaction_ref', 'amount', 'verification_status'
+        )
+        for pk, channel, ref, expected, status in matches:
+            claims[ref].append((pk, channel, expected, status))
+
+        pending = []
+        for ref, channel, amount, reference in batch:
+            candidates = [claim for claim in claims[ref] if channel is None or claim[1] == channel]
+            if not candidates:
+                result.unmatched += 1
+                if len(result.unmatched_sample) < UNMATCHED_SAMPLE:
+                    result.unmatched_sample.append(reference)
+                continue
+            if len(candidates) > 1:
+                result.ambiguous += 1
+                if len(result.ambiguous_sample) < UNMATCHED_SAMPLE:
+                    result.ambiguous_sample.append(reference)
+                continue
+
+            pk, _, expected, status = candidates[0]
+            if pk in seen:
+                result.repeated += 1
+                continue
+            seen.add(pk)
+            if status == 'verified':
+                result.already_verified += 1
+                continue
+
+            if amount == expected:
+                result.verified += 1
+                pending.append(Donation(pk=pk, verification_status='verified', verified_at=now))
+            else:
+                result.amount_mismatch += 1
+                pending.append(Donation(pk=pk, verification_status='amount_mismatch', verified_at=None))
+
+        if pending and not dry_run:
+            Donation.objects.bulk_update(pending, ['verification_status', 'verified_at'])
+        batch.clear()
+
+    for row in reader:
+        result.rows += 1
+        ref = normalize_transaction_id(row.get(txn_key) or '')
+        amount = _parse_amount(row.get(amount_key))
+        if not ref or amount is None:
+            result.invalid += 1
+            continue
+
+        channel = _parse_channel(row.get(channel_key)) if channel_key else None
+        batch.append((ref, channel, amount, row.get(txn_key)))
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+    return result
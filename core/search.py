@@ -0,0 +1,103 @@
+import re
+
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Disaster, Message
+
+# ----------------------------
+# Full-text Search (SQLite FTS5)
+# ----------------------------
+# core_disaster_fts and core_message_fts (migration 0015) index the text
+# columns and are kept in sync by triggers. A search is a single MATCH against
+# the inverted index ranked by bm25, instead of an icontains scan over every
+# row. Highlights are marked with control characters inside SQLite and only
+# turned into <mark> tags after the user's text has been HTML-escaped.
+
+SEARCH_PAGE_SIZE = 20
+SNIPPET_TOKENS = 24
+# bm25 column weights for title, description, location
+DISASTER_WEIGHTS = (10.0, 1.0, 5.0)
+
+_START, _END = '\x02', '\x03'
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+def match_expression(text):
+    """
+    Turn free text into an FTS5 query: every word must appear, the last one
+    as a prefix so results show up while the user is still typing. Quoting
+    each term keeps FTS5 operators in user input from being interpreted.
+    """
+    terms = _TERM.findall(text or '')[:10]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def highlighted(value):
+    """HTML-escape an FTS5 highlight/snippet and turn its markers into <mark>."""
+    return mark_safe(escape(value or '').replace(_START, '<mark>').replace(_END, '</mark>'))
+
+
+def _page(raw_queryset):
+    rows = list(raw_queryset)
+    has_next = len(rows) > SEARCH_PAGE_SIZE
+    return rows[:SEARCH_PAGE_SIZE], has_next
+
+
+def search_disasters(text, page=1):
+    """Return (disasters, has_next) for one page of ranked matches."""
+    expression = match_expression(text)
+    if expression is None:
+        return [], False
+    title_weight, description_weight, location_weight = DISASTER_WEIGHTS
+    disasters = Disaster.objects.raw(
+        f"""
+        SELECT d.id, d.title, d.location, d.urgency_level, d.posted_at,
+               highlight(core_disaster_fts, 0, %s, %s) AS title_match,
+               snippet(core_disaster_fts, 1, %s, %s, '…', {SNIPPET_TOKENS}) AS description_match,
+               highlight(core_disaster_fts, 2, %s, %s) AS location_match
+        FROM core_disaster_fts
+        JOIN core_disaster d ON d.id = core_disaster_fts.rowid
+        WHERE core_disaster_fts MATCH %s
+        ORDER BY bm25(core_disaster_fts, {title_weight}, {description_weight}, {location_weight}), d.id DESC
+        LIMIT %s OFFSET %s
+        """,
+        [_START, _END] * 3 + [expression, SEARCH_PAGE_SIZE + 1, (page - 1) * SEARCH_PAGE_SIZE],
+    )
+    rows, has_next = _page(disasters)
+    for disaster in rows:
+        disaster.title_match = highlighted(disaster.title_match)
+        disaster.description_match = highlighted(disaster.description_match)
+        disaster.location_match = highlighted(disaster.location_match)
+    return rows, has_next
+
+
+def search_messages(user, text, page=1):
+    """Return (messages, has_next) for one page of ranked matches the user sent or received."""
+    expression = match_expression(text)
+    if expression is None:
+        return [], False
+    messages = Message.objects.raw(
+        f"""
+        SELECT m.id, m.disaster_id, m.sender_id, m.recipient_id, m.timestamp,
+               d.title AS disaster_title, u.username AS sender_name,
+               snippet(core_message_fts, 0, %s, %s, '…', {SNIPPET_TOKENS}) AS content_match
+        FROM core_message_fts
+        JOIN core_message m ON m.id = core_message_fts.rowid
+        JOIN core_disaster d ON d.id = m.disaster_id
+        JOIN core_user u ON u.id = m.sender_id
+        WHERE core_message_fts MATCH %s AND (m.sender_id = %s OR m.recipient_id = %s)
+        ORDER BY bm25(core_message_fts), m.id DESC
+        LIMIT %s OFFSET %s
+        """,
+        [_START, _END, expression, user.pk, user.pk, SEARCH_PAGE_SIZE + 1, (page - 1) * SEARCH_PAGE_SIZE],
+    )
+    rows, has_next = _page(messages)
+    for message in rows:
+        message.content_match = highlighted(message.content_match)
+    return rows, has_next
+
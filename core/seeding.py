@@ -0,0 +1,226 @@
+import functools
+import math
+import random
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from . import geo
+from .caching import bump
+from .ranking import rescore_dirty
+from .models import User, Disaster, Donation, Message, Feedback, OrganiserSummary, Conversation, normalize_transaction_id
+
+# ----------------------------
+# Synthetic Data Seeding
+# ----------------------------
+# Rows are generated from a seeded random.Random and written with batched
+# bulk_create, one transaction per table, so the same arguments always give
+# the same data. All users share one precomputed password hash, since hashing
+# a password per user would take longer than everything else together.
+# Timestamps are spread over the year before a fixed anchor afterwards,
+# because auto_now_add stamps every bulk-created row with the same instant.
+# bulk_create skips Disaster.save(), so disasters are given coordinates
+# scattered around a gazetteer place directly, and it skips the signal
+# handlers, so disaster totals are recounted, conversations built (with
+# nothing unread), priority scores computed, organiser summaries rebuilt and
+# the public feed's cache version bumped at the end.
+
+SEED_PASSWORD = 'benchmark-pass'
+DEFAULT_ANCHOR = datetime(2025, 1, 1, tzinfo=timezone.utc)
+# Seeded disasters lie up to this far north/south and east/west of their place
+SCATTER_KM = 30
+MESSAGES = [
+    'Any update on supplies?',
+    'Blankets and water reached the camp today.',
+    'Can volunteers join the rescue boats?',
+    'Thank you for the quick response.',
+]
+TIMESTAMP_COLUMNS = [
+    (Disaster, 'posted_at'),
+    (Donation, 'donated_at'),
+    (Message, 'timestamp'),
+    (Feedback, 'submitted_at'),
+]
+
+# Durability and integrity checks that are safe to drop while one process
+# writes generated rows; the previous values are restored afterwards. SQLite
+# ignores or rejects these inside a transaction, so a caller's atomic block
+# (a test case, say) keeps the defaults.
+RELAXED_PRAGMAS = {
+    'synchronous': 'OFF',
+    'cache_size': '-262144',
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'OFF',
+}
+
+
+@contextmanager
+def relaxed_pragmas():
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        previous = {}
+        for pragma, value in RELAXED_PRAGMAS.items():
+            previous[pragma] = cursor.execute(f'PRAGMA {pragma}').fetchone()[0]
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for pragma, value in previous.items():
+                cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+@functools.cache
+def _places():
+    return sorted(set(geo.gazetteer().values()))
+
+
+def scattered_location(rng, spread_km=SCATTER_KM):
+    """Disaster location fields for a random gazetteer place, moved up to spread_km in each direction."""
+    place = rng.choice(_places())
+    latitude = place.latitude + rng.uniform(-spread_km, spread_km) / geo.KM_PER_DEGREE
+    longitude = place.longitude + rng.uniform(-spread_km, spread_km) / (
+        geo.KM_PER_DEGREE * math.cos(math.radians(place.latitude))
+    )
+    return dict(location=place.name, latitude=latitude, longitude=longitude,
+                geohash=geo.encode(latitude, longitude))
+
+
+def _ids_after(model, last_pk):
+    return list(model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True))
+
+
+def _last_pk(model):
+    return model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def bulk_insert(model, rows, batch_size):
+    """
+    bulk_create ``rows`` one batch_size chunk at a time. bulk_create turns its
+    argument into a list first, so handing it a generator alone would still
+    hold the whole table in memory.
+    """
+    rows = iter(rows)
+    while chunk := list(islice(rows, batch_size)):
+        model.objects.bulk_create(chunk, batch_size=batch_size)
+
+
+def seed_reference(prefix, seed, i):
+    """Transaction id of the i-th seeded donation."""
+    return f'{prefix}UTR{seed:03d}{i:012d}'.upper()
+
+
+def seed_relief_data(organisers=50, donors=2000, disasters=5000, donations=200_000, messages=100_000,
+                     feedback=20_000, batch_size=5000, seed=1, anchor=DEFAULT_ANCHOR, prefix='',
+                     progress=None):
+    """
+    Bulk-insert linked users, disasters, donations, messages and feedback and
+    return (organiser_ids, donor_ids) of the users created.
+    """
+    rng = random.Random(seed)
+    report = progress or (lambda model, count: None)
+    password = make_password(SEED_PASSWORD, salt='seedreliefdata')
+    urgencies = [value for value, _ in Disaster.URGENCY_CHOICES]
+    first_pk = {model: _last_pk(model) for model, _ in TIMESTAMP_COLUMNS}
+
+    with relaxed_pragmas():
+        with transaction.atomic():
+            last_user = _last_pk(User)
+            User.objects.bulk_create(
+                [User(username=f'{prefix}organiser{i}', role='organiser', password=password)
+                 for i in range(organisers)]
+                + [User(username=f'{prefix}donor{i}', role='donor', password=password) for i in range(donors)],
+                batch_size=batch_size,
+            )
+            user_ids = _ids_after(User, last_user)
+            organiser_ids, donor_ids = user_ids[:organisers], user_ids[organisers:]
+        report(User, organisers + donors)
+
+        with transaction.atomic():
+            bulk_insert(
+                Disaster,
+                (Disaster(
+                    organiser_id=rng.choice(organiser_ids),
+                    title=f'Appeal {i}',
+                    description='Relief needed for affected families. ' * 10,
+                    urgency_level=rng.choice(urgencies),
+                    bank_account_name='Relief Fund',
+                    bank_account_number='000111222333',
+                    ifsc_code='SBIN0000001',
+                    **scattered_location(rng),
+                ) for i in range(disasters)),
+                batch_size,
+            )
+            disaster_rows = list(
+                Disaster.objects.filter(pk__gt=first_pk[Disaster]).order_by('pk').values_list('pk', 'organiser_id')
+            )
+        report(Disaster, disasters)
+
+        with transaction.atomic():
+            references = (seed_reference(prefix, seed, i) for i in range(donations))
+            bulk_insert(
+                Donation,
+                (Donation(
+                    donor_id=rng.choice(donor_ids),
+                    disaster_id=rng.choice(disaster_rows)[0],
+                    amount=rng.randint(1, 500) * 10,
+                    transaction_id=reference,
+                    transaction_ref=normalize_transaction_id(reference),
+                ) for reference in references),
+                batch_size,
+            )
+        report(Donation, donations)
+
+        def thread():
+            disaster_id, organiser_id = rng.choice(disaster_rows)
+            donor_id = rng.choice(donor_ids)
+            if rng.random() < 0.5:
+                return dict(sender_id=donor_id, recipient_id=organiser_id, disaster_id=disaster_id)
+            return dict(sender_id=organiser_id, recipient_id=donor_id, disaster_id=disaster_id)
+
+        with transaction.atomic():
+            bulk_insert(
+                Message,
+                (Message(content=rng.choice(MESSAGES), **thread()) for _ in range(messages)),
+                batch_size,
+            )
+        report(Message, messages)
+
+        def rated():
+            disaster_id, organiser_id = rng.choice(disaster_rows)
+            return dict(donor_id=rng.choice(donor_ids), organiser_id=organiser_id, disaster_id=disaster_id)
+
+        with transaction.atomic():
+            bulk_insert(
+                Feedback,
+                (Feedback(rating=rng.randint(1, 5), comment='Thank you', **rated()) for _ in range(feedback)),
+                batch_size,
+            )
+        report(Feedback, feedback)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model, column in TIMESTAMP_COLUMNS:
+                cursor.execute(
+                    f"UPDATE {model._meta.db_table} SET {column} = "
+                    f"strftime('%%Y-%%m-%%d %%H:%%M:%%f', %s, '-' || ((id * 7919) %% 525600) || ' minutes') "
+                    f"WHERE id > %s",
+                    [anchor.strftime('%Y-%m-%d %H:%M:%S'), first_pk[model]],
+                )
+            # After the timestamps move, so last_donation_at and last_message_at match them
+            Disaster.objects.filter(pk__gt=first_pk[Disaster]).update(**Disaster.donation_totals())
+            bulk_insert(
+                Conversation, Conversation.from_messages(Message.objects.filter(pk__gt=first_pk[Message])), batch_size,
+            )
+            cursor.execute('ANALYZE')
+
+    rescore_dirty(batch_size)
+    with transaction.atomic():
+        for organiser_id in organiser_ids:
+            OrganiserSummary.rebuild(organiser_id)
+    bump('disasters')
+    return organiser_ids, donor_ids
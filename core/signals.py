@@ -0,0 +1,281 @@
+from django.db import transaction
+from django.db.models import F, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import User, Disaster, Donation, Message, Feedback, OrganiserSummary, Conversation
+from .auth import forget_user
+from .caching import bump
+from .images import IMAGE_FIELDS, is_processed, schedule
+from .pubsub import get_broker, inbox_channel, message_payload, thread_channel
+
+# ----------------------------
+# Organiser Summary Maintenance
+# ----------------------------
+# New rows bump the organiser's counters with a single F() update. Edits and
+# disaster deletions are rare, so those recount the organiser from scratch.
+# Updates only touch existing summary rows; a missing row is built on first
+# read by OrganiserSummary.for_organiser.
+
+
+def _origin_model(origin):
+    """Model class a delete() started from (an instance or a queryset)."""
+    if origin is None:
+        return None
+    return origin._meta.model if hasattr(origin, '_meta') else origin.model
+
+
+def _bump(organiser_filter, **deltas):
+    OrganiserSummary.objects.filter(**organiser_filter).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+@receiver(post_save, sender=Disaster)
+def disaster_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        _bump(
+            {'organiser_id': instance.organiser_id},
+            disaster_count=1,
+            high_urgency_count=int(instance.urgency_level == 'high'),
+        )
+    else:
+        OrganiserSummary.rebuild(instance.organiser_id)
+
+
+@receiver(post_delete, sender=Disaster)
+def disaster_deleted(sender, instance, origin=None, **kwargs):
+    # Deleting the organiser removes their summary along with everything else
+    if _origin_model(origin) is User:
+        return
+    # Cascaded donations and feedback skip their own updates; recount once here
+    OrganiserSummary.rebuild(instance.organiser_id)
+
+
+@receiver(post_save, sender=Donation)
+def donation_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        _bump({'organiser__disaster': instance.disaster_id}, donation_count=1, donation_total=instance.amount)
+    else:
+        _rebuild_for_disaster(instance.disaster_id)
+
+
+@receiver(post_delete, sender=Donation)
+def donation_deleted(sender, instance, origin=None, **kwargs):
+    if _origin_model(origin) is Disaster:
+        return
+    _bump({'organiser__disaster': instance.disaster_id}, donation_count=-1, donation_total=-instance.amount)
+
+
+@receiver(post_save, sender=Feedback)
+def feedback_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        _bump({'organiser_id': instance.organiser_id}, rating_count=1, rating_sum=instance.rating)
+    else:
+        OrganiserSummary.rebuild(instance.organiser_id)
+
+
+@receiver(post_delete, sender=Feedback)
+def feedback_deleted(sender, instance, origin=None, **kwargs):
+    if _origin_model(origin) is Disaster:
+        return
+    _bump({'organiser_id': instance.organiser_id}, rating_count=-1, rating_sum=-instance.rating)
+
+
+def _rebuild_for_disaster(disaster_id):
+    organiser_id = Disaster.objects.filter(pk=disaster_id).values_list('organiser_id', flat=True).first()
+    if organiser_id is not None:
+        OrganiserSummary.rebuild(organiser_id)
+
+
+# ----------------------------
+# Disaster Donation Totals
+# ----------------------------
+# Disaster.total_raised, donation_count and last_donation_at follow each
+# donation with one F() update of the disaster row. Donation.save() and
+# deletes are atomic, so the row and the totals commit together. Edits that
+# change the amount or disaster recount the (current) disaster; the
+# check_disaster_totals command reports and repairs any drift. The same
+# updates, and new messages, mark the disaster's priority score for
+# recomputing (see core/ranking.py).
+
+
+@receiver(post_save, sender=Donation, dispatch_uid='totals:donation_saved')
+def donation_totals_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    disaster = Disaster.objects.filter(pk=instance.disaster_id)
+    if created:
+        donated_at = Value(instance.donated_at)
+        disaster.update(
+            total_raised=F('total_raised') + instance.amount,
+            donation_count=F('donation_count') + 1,
+            last_donation_at=Greatest(Coalesce('last_donation_at', donated_at), donated_at),
+            score_dirty=True,
+        )
+    elif update_fields is None or {'amount', 'disaster'} & set(update_fields):
+        disaster.update(**Disaster.donation_totals(), score_dirty=True)
+
+
+@receiver(post_delete, sender=Donation, dispatch_uid='totals:donation_deleted')
+def donation_totals_deleted(sender, instance, origin=None, **kwargs):
+    if _origin_model(origin) is Disaster:
+        return
+    Disaster.objects.filter(pk=instance.disaster_id).update(
+        total_raised=F('total_raised') - instance.amount,
+        donation_count=F('donation_count') - 1,
+        last_donation_at=Subquery(
+            Donation.objects.filter(disaster_id=instance.disaster_id)
+            .order_by('-donated_at').values('donated_at')[:1]
+        ),
+        score_dirty=True,
+    )
+
+
+@receiver(post_save, sender=Message, dispatch_uid='ranking:message_saved')
+def message_marks_score_dirty(sender, instance, created, raw=False, **kwargs):
+    # A new message is recent activity for the disaster's priority score
+    if created and not raw:
+        Disaster.objects.filter(pk=instance.disaster_id, score_dirty=False).update(score_dirty=True)
+
+
+# ----------------------------
+# Conversations & Unread Counts
+# ----------------------------
+# Each new message moves its conversation's latest message and bumps the
+# recipient's unread counters on the conversation and the user row, inside
+# Message.save()'s transaction. Opening a thread clears them again (see
+# Conversation.mark_read). When a disaster or user is deleted, the other
+# side's unread total is recounted from the conversations that remain.
+
+
+@receiver(post_save, sender=Message, dispatch_uid='inbox:message_saved')
+def conversation_message_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Conversation.record(instance)
+        # The sidebar badge reads the unread count from the cached user
+        forget_user(instance.recipient_id)
+
+
+@receiver(post_delete, sender=Conversation, dispatch_uid='inbox:conversation_deleted')
+def conversation_deleted(sender, instance, **kwargs):
+    if instance.donor_unread or instance.organiser_unread:
+        User.objects.filter(pk__in=[instance.donor_id, instance.organiser_id]).update(
+            unread_messages=Conversation.unread_total()
+        )
+        forget_user(instance.donor_id, instance.organiser_id)
+
+
+# ----------------------------
+# Fragment Cache Invalidation
+# ----------------------------
+# Versions are bumped right away, so the writing request sees its change, and
+# again after commit, so a fragment another request rendered from the old rows
+# in between is not served under the new version.
+
+
+def _invalidate(scope, *owners):
+    bump(scope, *owners)
+    transaction.on_commit(lambda: bump(scope, *owners))
+
+
+@receiver(post_save, sender=Disaster, dispatch_uid='cache:disaster_saved')
+def invalidate_disaster_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    _invalidate('disasters')
+    _invalidate('disasters', instance.organiser_id)
+    _invalidate('funding')
+    if not created:
+        # Donation histories depend on the version of each disaster they show;
+        # the organiser's inbox shows the titles too
+        _invalidate('disaster', instance.pk)
+        _invalidate('messages', instance.organiser_id)
+
+
+@receiver(post_delete, sender=Disaster, dispatch_uid='cache:disaster_deleted')
+def invalidate_disaster_deleted(sender, instance, **kwargs):
+    # Cascaded donations, messages and feedback invalidate their own scopes
+    _invalidate('disasters')
+    _invalidate('disasters', instance.organiser_id)
+    _invalidate('funding')
+
+
+@receiver(post_save, sender=Donation, dispatch_uid='cache:donation_saved')
+@receiver(post_delete, sender=Donation, dispatch_uid='cache:donation_deleted')
+def invalidate_donation(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _invalidate('donations', instance.donor_id)
+        # Feed pages read their totals fresh; only the least-funded order moves
+        _invalidate('funding')
+
+
+@receiver(post_save, sender=Feedback, dispatch_uid='cache:feedback_saved')
+@receiver(post_delete, sender=Feedback, dispatch_uid='cache:feedback_deleted')
+def invalidate_feedback(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _invalidate('feedback', instance.organiser_id)
+
+
+@receiver(post_save, sender=Message, dispatch_uid='cache:message_saved')
+@receiver(post_delete, sender=Message, dispatch_uid='cache:message_deleted')
+def invalidate_message(sender, instance, raw=False, **kwargs):
+    if not raw:
+        # Both inboxes show the conversation's latest message
+        _invalidate('messages', instance.recipient_id, instance.sender_id)
+
+
+# ----------------------------
+# Signed-in User Cache Invalidation
+# ----------------------------
+
+@receiver(post_save, sender=User, dispatch_uid='auth:user_saved')
+@receiver(post_delete, sender=User, dispatch_uid='auth:user_deleted')
+def user_changed(sender, instance, **kwargs):
+    # Covers password changes, deactivation, profile edits and last_login on sign-in
+    forget_user(instance.pk)
+
+
+# ----------------------------
+# Real-time Message Delivery
+# ----------------------------
+
+@receiver(post_save, sender=Message)
+def message_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    payload = message_payload(instance)
+
+    def publish():
+        broker = get_broker()
+        broker.publish(thread_channel(instance.disaster_id), payload)
+        broker.publish(inbox_channel(instance.recipient_id), payload)
+
+    # Only announce messages that actually committed
+    transaction.on_commit(publish)
+
+
+# ----------------------------
+# Uploaded Image Processing
+# ----------------------------
+
+def image_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    label = sender._meta.label
+    field_name = IMAGE_FIELDS[label]
+    name = getattr(instance, field_name).name
+    if name and not is_processed(name):
+        # The worker reads the row back, so wait until it is committed
+        transaction.on_commit(lambda: schedule(label, instance.pk, field_name))
+
+
+for _label in IMAGE_FIELDS:
+    post_save.connect(image_saved, sender=_label, dispatch_uid=f'image_saved:{_label}')
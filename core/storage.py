@@ -0,0 +1,43 @@
+import hashlib
+import re
+from pathlib import PurePosixPath
+
+from django.core.files.storage import FileSystemStorage
+
+# ----------------------------
+# Content-addressed Media Storage
+# ----------------------------
+# Uploads are stored as <upload_to>/<sha256><ext>, so identical files (the same
+# payment screenshot uploaded twice, a reused appeal image) share one file on
+# disk. Files are never reference-counted on write; rows simply point at the
+# same name and `manage.py collect_media_garbage` removes names no row uses.
+
+_HEX = re.compile(r'^[0-9a-f]{16,64}$')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    chunk_size = 64 * 1024
+
+    def content_digest(self, content):
+        """SHA-256 of an upload, read in chunks so large files are never held in memory."""
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks(self.chunk_size):
+            digest.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        return digest.hexdigest()
+
+    def _save(self, name, content):
+        digest = self.content_digest(content)
+        path = PurePosixPath(name)
+        # Names that already start a prefix of their own digest (e.g. processed
+        # images named by the image pipeline) are content addresses already
+        if _HEX.match(path.stem) and digest.startswith(path.stem):
+            target = name
+        else:
+            target = str(path.with_name(f'{digest}{path.suffix.lower()}'))
+        if self.exists(target):
+            return target
+        return super()._save(target, content)
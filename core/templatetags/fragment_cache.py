@@ -0,0 +1,68 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.caching import depends_on, get_or_compute
+
+register = template.Library()
+
+
+class CacheFragmentNode(template.Node):
+    def __init__(self, nodelist, name, scope, owner, vary):
+        self.nodelist = nodelist
+        self.name = name
+        self.scope = scope
+        self.owner = owner
+        self.vary = vary
+
+    def render(self, context):
+        owner = self.owner.resolve(context) if self.owner else None
+        return mark_safe(get_or_compute(
+            self.name.resolve(context),
+            self.scope.resolve(context),
+            lambda: str(self.nodelist.render(context)),
+            owner=owner,
+            vary=[value.resolve(context) for value in self.vary],
+        ))
+
+
+@register.tag
+def cachefragment(parser, token):
+    """
+    Cache the enclosed template until its scope version is bumped:
+
+        {% cachefragment "donor_feed" "disasters" vary selected_urgency cursor %}
+        {% cachefragment "organiser_feedback" "feedback" request.user.pk %}
+
+    The optional third argument is the user whose scope the fragment belongs
+    to; values after ``vary`` are added to the key.
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes at least a name and a scope")
+    vary = []
+    if 'vary' in bits:
+        position = bits.index('vary')
+        bits, vary = bits[:position], bits[position + 1:]
+    if len(bits) > 4:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a name, a scope and an optional owner before 'vary'")
+
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    return CacheFragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        parser.compile_filter(bits[3]) if len(bits) == 4 else None,
+        [parser.compile_filter(bit) for bit in vary],
+    )
+
+
+@register.simple_tag
+def cachedepends(scope, owner=None):
+    """
+    Inside a cachefragment, also invalidate it when this scope is bumped:
+
+        {% cachedepends "disaster" donation.disaster_id %}
+    """
+    depends_on(scope, owner)
+    return ''
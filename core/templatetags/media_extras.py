@@ -0,0 +1,31 @@
+from django import template
+
+from core.images import is_processed, thumbnail_name, thumbnail_storage
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_url(field_file, width, extension='webp'):
+    """
+    URL of a resized copy of an uploaded image, or of the upload itself while
+    it is still waiting for the processing worker.
+    """
+    if not field_file:
+        return ''
+    if not is_processed(field_file.name):
+        return field_file.url
+    return thumbnail_storage().url(thumbnail_name(field_file.name, width, extension))
+
+
+@register.inclusion_tag('core/picture.html')
+def picture(field_file, width, css_class='', alt=''):
+    """<picture> with WebP and JPEG thumbnails, or the plain upload if unprocessed."""
+    processed = bool(field_file) and is_processed(field_file.name)
+    return {
+        'processed': processed,
+        'webp': thumbnail_url(field_file, width) if processed else '',
+        'src': thumbnail_url(field_file, width, 'jpg'),
+        'css_class': css_class,
+        'alt': alt,
+    }
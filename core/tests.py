@@ -1,3 +1,1651 @@
-from django.test import TestCase
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import PurePosixPath
+from types import SimpleNamespace
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher, make_password,
+)
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, models, transaction
+from django.core.cache import cache, caches
+from django.test import TestCase as DjangoTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, resolve, reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import geo
+from .auth import forget_user
+from .caching import cache_stats, reset_stats
+from .images import THUMBNAIL_WIDTHS, is_processed, process_instance, thumbnail_name
+from .metrics import _view_name, slow_requests, store as metrics_store
+from .models import (
+    User, Disaster, Donation, Message, Feedback, OrganiserSummary, Conversation, normalize_transaction_id,
+)
+from .passwords import (
+    CommonPasswordValidator, TunedArgon2PasswordHasher, TunedPBKDF2PasswordHasher, TunedScryptPasswordHasher,
+)
+from .ranking import ACTIVITY_LAG, FUNDING_SCALE, HALF_LIFE, priority_score, rescore_dirty
+from .pagination import decode_cursor, encode_cursor
+from .pubsub import get_broker, inbox_channel, thread_channel
+from .ratelimit import CacheBucketStore, get_store as get_rate_store, parse_rate
+from .reconciliation import StatementError, reconcile
+from .seeding import scattered_location
+
+
+class TestCase(DjangoTestCase):
+    @classmethod
+    def _pre_setup(cls):
+        super()._pre_setup()
+        # Cached fragments would outlive each test's rolled-back transaction
+        cache.clear()
+        caches['sessions'].clear()
+        get_rate_store().clear()
+
+
+def make_disaster(organiser, **kwargs):
+    fields = {
+        'title': 'Flood',
+        'description': 'River overflow',
+        'location': 'Mysuru',
+        'urgency_level': 'high',
+        'bank_account_name': 'Relief Fund',
+        'bank_account_number': '1234567890',
+        'ifsc_code': 'SBIN0000001',
+    }
+    fields.update(kwargs)
+    return Disaster.objects.create(organiser=organiser, **fields)
+
+
+# ----------------------------
+# Donor Disaster Feed
+# ----------------------------
+
+class DonorFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+        now = timezone.now()
+        for i in range(45):
+            disaster = make_disaster(
+                cls.organiser,
+                title=f'Disaster {i}',
+                urgency_level='high' if i % 3 == 0 else 'low',
+                location='Kodagu' if i % 2 == 0 else 'Udupi',
+            )
+            # auto_now_add ignores explicit values, so spread timestamps afterwards;
+            # every pair shares a timestamp to exercise the id tie-breaker
+            Disaster.objects.filter(pk=disaster.pk).update(posted_at=now - timedelta(minutes=i // 2))
+
+    def setUp(self):
+        self.client.force_login(self.donor)
+
+    def walk_feed(self, **params):
+        titles, cursor = [], None
+        while True:
+            query = dict(params, cursor=cursor) if cursor else params
+            data = self.client.get(reverse('donor_disaster_feed'), query).json()
+            titles += [row['title'] for row in data['results']]
+            cursor = data['next_cursor']
+            if not cursor:
+                return titles
+
+    def test_cursor_round_trip(self):
+        posted_at = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor(posted_at, 42)), (posted_at, 42))
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+
+    def test_non_finite_cursors_are_malformed(self):
+        for value, parse in [('NaN', Decimal), ('sNaN', Decimal), ('-Infinity', Decimal), ('nan', float), ('inf', float)]:
+            cursor = encode_cursor(value, 1)
+            self.assertIsNone(decode_cursor(cursor, parse), value)
+        cursor = encode_cursor('NaN', 1)
+        for url in (reverse('donor_dashboard'), reverse('donor_disaster_feed')):
+            for sort in ('least_funded', 'priority'):
+                response = self.client.get(url, {'sort': sort, 'cursor': cursor})
+                self.assertEqual(response.status_code, 200, (url, sort))
+
+    def test_dashboard_renders_first_page_only(self):
+        response = self.client.get(reverse('donor_dashboard'))
+        self.assertEqual(len(response.context['feed'].disasters), 20)
+        self.assertIsNotNone(response.context['feed'].next_cursor)
+
+    def test_feed_walks_every_disaster_once_in_order(self):
+        expected = list(
+            Disaster.objects.order_by('-posted_at', '-id').values_list('title', flat=True)
+        )
+        self.assertEqual(self.walk_feed(sort='newest'), expected)
+
+    def test_feed_ranked_by_priority_by_default(self):
+        call_command('update_priority_scores', '--all', stdout=io.StringIO())
+        expected = list(Disaster.objects.order_by('-priority_score', '-id').values_list('title', flat=True))
+        titles = self.walk_feed()
+        self.assertEqual(titles, expected)
+        # Timestamps come in pairs of two minutes apart; high urgency outranks that gap
+        self.assertEqual(titles[0], 'Disaster 0')
+        self.assertLess(titles.index('Disaster 3'), titles.index('Disaster 1'))
+
+    def test_feed_filters(self):
+        titles = self.walk_feed(urgency='high', location='kodagu')
+        expected = set(
+            Disaster.objects.filter(urgency_level='high', location='Kodagu').values_list('title', flat=True)
+        )
+        self.assertEqual(set(titles), expected)
+        self.assertEqual(len(titles), len(expected))
+
+    def test_feed_sorted_by_funding(self):
+        for i, pk in enumerate(Disaster.objects.order_by('pk').values_list('pk', flat=True)):
+            # Pairs share a total to exercise the id tie-breaker
+            Disaster.objects.filter(pk=pk).update(total_raised=(i * 7 % 45) // 2 * 100)
+        expected = list(Disaster.objects.order_by('total_raised', 'id').values_list('title', flat=True))
+        self.assertEqual(self.walk_feed(sort='least_funded'), expected)
+
+    def test_feed_is_for_donors_only(self):
+        self.client.force_login(self.organiser)
+        self.assertEqual(self.client.get(reverse('donor_disaster_feed')).status_code, 403)
+
+
+# ----------------------------
+# Organiser Donations
+# ----------------------------
+
+class OrganiserDonationsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+        cls.flood = make_disaster(cls.organiser, title='Flood')
+        cls.quake = make_disaster(cls.organiser, title='Quake')
+        other = User.objects.create_user('other', password='adminpass123', role='organiser')
+        make_disaster(other, title='Not mine')
+        for i in range(25):
+            Donation.objects.create(donor=cls.donor, disaster=cls.flood, amount=10, transaction_id=f'TXN{i:08d}')
+        Donation.objects.create(donor=cls.donor, disaster=cls.quake, amount=500, transaction_id='UTR00000001')
+
+    def setUp(self):
+        self.client.force_login(self.organiser)
+
+    def groups(self, **params):
+        response = self.client.get(reverse('organiser_donations'), params)
+        return {d.title: d for d in response.context['disasters']}, response
+
+    def test_groups_carry_database_totals(self):
+        groups, response = self.groups()
+        self.assertEqual(set(groups), {'Flood', 'Quake'})
+        self.assertEqual(groups['Flood'].total_raised, 250)
+        self.assertEqual(groups['Flood'].donation_count, 25)
+        self.assertEqual(groups['Quake'].total_raised, 500)
+        self.assertEqual(response.context['donation_count'], 26)
+        self.assertEqual(response.context['amount_raised'], 750)
+
+    def test_each_group_is_paged(self):
+        groups, _ = self.groups()
+        self.assertEqual(len(groups['Flood'].page_donations), 10)
+        self.assertTrue(groups['Flood'].has_next)
+        self.assertFalse(groups['Quake'].has_next)
+
+        groups, _ = self.groups(disaster=self.flood.pk, page=3)
+        self.assertEqual(len(groups['Flood'].page_donations), 5)
+        self.assertTrue(groups['Flood'].has_previous)
+        self.assertFalse(groups['Flood'].has_next)
+        self.assertEqual(len(groups['Quake'].page_donations), 1)
+
+    def test_pages_are_newest_first(self):
+        flood = Donation.objects.filter(disaster=self.flood).order_by('-donated_at', '-id')
+        groups, _ = self.groups()
+        self.assertEqual(groups['Flood'].page_donations, list(flood[:10]))
+
+        # The focused group is fetched at its own offset, the others keep their first page
+        groups, _ = self.groups(disaster=self.flood.pk, page=2)
+        self.assertEqual(groups['Flood'].page_donations, list(flood[10:20]))
+        self.assertEqual([d.transaction_id for d in groups['Quake'].page_donations], ['UTR00000001'])
+
+
+# ----------------------------
+# Organiser Summary
+# ----------------------------
+
+class OrganiserSummaryTests(TestCase):
+    FIELDS = [
+        'disaster_count', 'high_urgency_count', 'donation_count',
+        'donation_total', 'rating_sum', 'rating_count',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+        OrganiserSummary.rebuild(cls.organiser.pk)
+
+    def assertSummaryConsistent(self):
+        stored = OrganiserSummary.objects.get(organiser=self.organiser)
+        fresh = OrganiserSummary.compute(self.organiser.pk)
+        for field in self.FIELDS:
+            self.assertEqual(getattr(stored, field), getattr(fresh, field), field)
+        return stored
+
+    def test_counters_follow_writes(self):
+        flood = make_disaster(self.organiser, urgency_level='high')
+        quake = make_disaster(self.organiser, urgency_level='low')
+        Donation.objects.create(donor=self.donor, disaster=flood, amount=100, transaction_id='TXN00000001')
+        donation = Donation.objects.create(donor=self.donor, disaster=quake, amount=40, transaction_id='TXN00000002')
+        Feedback.objects.create(donor=self.donor, organiser=self.organiser, disaster=flood, rating=5)
+        Feedback.objects.create(donor=self.donor, organiser=self.organiser, disaster=quake, rating=2)
+        summary = self.assertSummaryConsistent()
+        self.assertEqual(summary.donation_total, 140)
+        self.assertEqual(summary.avg_rating, 3.5)
+
+        quake.urgency_level = 'high'
+        quake.save()
+        donation.delete()
+        summary = self.assertSummaryConsistent()
+        self.assertEqual(summary.high_urgency_count, 2)
+
+        flood.delete()
+        summary = self.assertSummaryConsistent()
+        self.assertEqual(summary.disaster_count, 1)
+        self.assertEqual(summary.donation_count, 0)
+
+        self.donor.delete()
+        self.assertSummaryConsistent()
+
+    def test_dashboard_builds_missing_summary(self):
+        make_disaster(self.organiser)
+        OrganiserSummary.objects.all().delete()
+        self.client.force_login(self.organiser)
+        response = self.client.get(reverse('organiser_dashboard'))
+        self.assertEqual(response.context['total_count'], 1)
+        self.assertTrue(OrganiserSummary.objects.filter(organiser=self.organiser).exists())
+
+    def test_rebuild_command(self):
+        make_disaster(self.organiser)
+        OrganiserSummary.objects.filter(organiser=self.organiser).update(disaster_count=99)
+        call_command('rebuild_organiser_summaries', stdout=io.StringIO())
+        self.assertEqual(self.assertSummaryConsistent().disaster_count, 1)
+
+
+# ----------------------------
+# Message Thread Polling
+# ----------------------------
+
+class MessageThreadPollTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+        cls.disaster = make_disaster(cls.organiser)
+        Message.objects.bulk_create([
+            Message(sender=cls.donor, recipient=cls.organiser, disaster=cls.disaster, content=f'msg {i}')
+            for i in range(60)
+        ])
+        cls.ids = list(Message.objects.order_by('id').values_list('id', flat=True))
+
+    def setUp(self):
+        self.client.force_login(self.donor)
+        self.poll_url = reverse('message_thread_poll', args=[self.disaster.pk])
+
+    def test_thread_renders_latest_window(self):
+        response = self.client.get(reverse('message_thread', args=[self.disaster.pk]))
+        self.assertEqual([m.pk for m in response.context['messages']], self.ids[-50:])
+        self.assertEqual(response.context['older_before'], self.ids[-50])
+
+        response = self.client.get(reverse('message_thread', args=[self.disaster.pk]), {'before': self.ids[-50]})
+        self.assertEqual([m.pk for m in response.context['messages']], self.ids[:10])
+        self.assertIsNone(response.context['older_before'])
+
+    def test_poll_returns_only_newer_messages(self):
+        data = self.client.get(self.poll_url, {'since_id': self.ids[-3]}).json()
+        self.assertEqual([m['id'] for m in data['messages']], self.ids[-2:])
+        self.assertEqual(data['messages'][0]['sender'], 'donor')
+        self.assertEqual(data['last_id'], self.ids[-1])
+
+    def test_unchanged_thread_returns_not_modified(self):
+        response = self.client.get(self.poll_url, {'since_id': self.ids[-1]})
+        self.assertEqual(response.json()['messages'], [])
+        etag = response['ETag']
+
+        response = self.client.get(self.poll_url, {'since_id': self.ids[-1]}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Message.objects.create(sender=self.organiser, recipient=self.donor, disaster=self.disaster, content='new')
+        response = self.client.get(self.poll_url, {'since_id': self.ids[-1]}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m['content'] for m in response.json()['messages']], ['new'])
+
+
+# ----------------------------
+# Real-time Message Streams
+# ----------------------------
+
+class MessageStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+        cls.disaster = make_disaster(cls.organiser)
+
+    async def test_committed_message_reaches_thread_and_inbox(self):
+        broker = get_broker()
+        thread = broker.subscribe(thread_channel(self.disaster.pk))
+        inbox = broker.subscribe(inbox_channel(self.organiser.pk))
+        try:
+            def send():
+                with self.captureOnCommitCallbacks(execute=True):
+                    Message.objects.create(
+                        sender=self.donor, recipient=self.organiser, disaster=self.disaster, content='Need water'
+                    )
+            await sync_to_async(send)()
+
+            for subscription in (thread, inbox):
+                payload = await subscription.get(timeout=1)
+                self.assertEqual(payload['content'], 'Need water')
+                self.assertEqual(payload['sender'], 'donor')
+        finally:
+            thread.close()
+            inbox.close()
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    async def test_thread_stream_pushes_events(self):
+        await self.async_client.aforce_login(self.donor)
+        response = await self.async_client.get(reverse('message_thread_stream', args=[self.disaster.pk]))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+
+        get_broker().publish(thread_channel(self.disaster.pk), {'id': 7, 'content': 'hello'})
+        self.assertEqual(await anext(chunks), b'id: 7\nevent: message\ndata: {"id": 7, "content": "hello"}\n\n')
+
+        # A client disconnect cancels the pending read, which must unsubscribe
+        pending = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0.01)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertEqual(get_broker().subscriber_count(), 0)
+
+    def test_streams_need_asgi(self):
+        self.client.force_login(self.donor)
+        self.assertEqual(self.client.get(reverse('inbox_stream')).status_code, 501)
+
+
+# ----------------------------
+# Image Processing
+# ----------------------------
+
+def make_image(size=(2000, 1500), image_format='JPEG'):
+    image = Image.new('RGB', size, 'red')
+    exif = Image.Exif()
+    exif[0x010F] = 'PhoneMaker'  # camera make
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, exif=exif)
+    return buffer.getvalue()
+
+
+@override_settings(IMAGE_PROCESSING_SYNC=True)
+class ImageProcessingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def test_upload_is_stripped_hashed_and_thumbnailed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            disaster = make_disaster(
+                self.organiser, image=SimpleUploadedFile('IMG_0001.jpg', make_image(), 'image/jpeg')
+            )
+        disaster.refresh_from_db()
+        storage = disaster.image.storage
+
+        self.assertTrue(is_processed(disaster.image.name))
+        # The raw upload is only removed by the garbage collector
+        raw_uploads = [name for name in storage.listdir('disaster_images')[1] if not is_processed(name)]
+        self.assertEqual(len(raw_uploads), 1)
+        call_command('collect_media_garbage', grace_minutes=0, stdout=io.StringIO())
+        self.assertFalse(storage.exists(f'disaster_images/{raw_uploads[0]}'))
+        self.assertTrue(storage.exists(disaster.image.name))
+        with Image.open(storage.path(disaster.image.name)) as stored:
+            self.assertFalse(stored.getexif())
+        for width in THUMBNAIL_WIDTHS:
+            with Image.open(storage.path(thumbnail_name(disaster.image.name, width))) as thumb:
+                self.assertEqual(thumb.format, 'WEBP')
+                self.assertEqual(thumb.width, width)
+            self.assertTrue(storage.exists(thumbnail_name(disaster.image.name, width, 'jpg')))
+
+    def test_backfill_command_imports_legacy_uploads(self):
+        legacy_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, legacy_root)
+        os.makedirs(os.path.join(legacy_root, 'profile_pics'))
+        with open(os.path.join(legacy_root, 'profile_pics', 'me.png'), 'wb') as legacy:
+            legacy.write(make_image((100, 100), 'PNG'))
+        User.objects.filter(pk=self.organiser.pk).update(profile_picture='profile_pics/me.png')
+
+        call_command('process_images', legacy_root=legacy_root, stdout=io.StringIO())
+        self.organiser.refresh_from_db()
+        self.assertTrue(is_processed(self.organiser.profile_picture.name))
+        self.assertTrue(self.organiser.profile_picture.name.endswith('.png'))
+
+    @override_settings(AUTH_USER_CACHE_PER_PROCESS=True)
+    def test_cached_user_sees_the_processed_picture(self):
+        self.client.force_login(self.organiser)
+        with patch('core.signals.schedule'), self.captureOnCommitCallbacks(execute=True):
+            self.organiser.profile_picture = SimpleUploadedFile('me.jpg', make_image(), 'image/jpeg')
+            self.organiser.save()
+        # A request before the worker gets to it caches the user with the raw upload's name
+        raw_name = self.client.get(reverse('user_profile')).wsgi_request.user.profile_picture.name
+        self.assertFalse(is_processed(raw_name))
+
+        process_instance('core.User', self.organiser.pk, 'profile_picture')
+        user = self.client.get(reverse('user_profile')).wsgi_request.user
+        self.assertTrue(is_processed(user.profile_picture.name))
+        self.assertTrue(user.profile_picture.storage.exists(user.profile_picture.name))
+
+
+# ----------------------------
+# Content-addressed Media Storage
+# ----------------------------
+
+class MediaStorageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def donate(self, disaster, proof, name='proof.jpg'):
+        return Donation.objects.create(
+            donor=self.donor, disaster=disaster, amount=100,
+            transaction_id=f'TXN{Donation.objects.count():08d}',
+            proof_image=SimpleUploadedFile(name, proof, 'image/jpeg'),
+        )
+
+    def test_identical_uploads_share_one_file(self):
+        disaster = make_disaster(self.organiser)
+        proof = make_image((50, 50))
+        first = self.donate(disaster, proof, 'screenshot.jpg')
+        second = self.donate(disaster, proof, 'screenshot (1).jpg')
+        third = self.donate(disaster, make_image((60, 60)))
+
+        self.assertEqual(first.proof_image.name, second.proof_image.name)
+        self.assertNotEqual(first.proof_image.name, third.proof_image.name)
+        self.assertEqual(PurePosixPath(first.proof_image.name).stem, hashlib.sha256(proof).hexdigest())
+        self.assertEqual(len(first.proof_image.storage.listdir('donation_proofs')[1]), 2)
+
+    def test_garbage_collection_removes_only_orphans(self):
+        flood = make_disaster(self.organiser, title='Flood')
+        quake = make_disaster(self.organiser, title='Quake')
+        shared, orphaned = make_image((50, 50)), make_image((70, 70))
+        kept = self.donate(quake, shared)
+        self.donate(flood, shared)
+        lost = self.donate(flood, orphaned)
+        storage = kept.proof_image.storage
+
+        flood.delete()
+        call_command('collect_media_garbage', grace_minutes=0, stdout=io.StringIO())
+
+        self.assertTrue(storage.exists(kept.proof_image.name))
+        self.assertFalse(storage.exists(lost.proof_image.name))
+
+
+# ----------------------------
+# Donation Export
+# ----------------------------
+
+class DonationExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+        cls.flood = make_disaster(cls.organiser, title='Flood')
+        cls.quake = make_disaster(cls.organiser, title='Quake')
+        other = make_disaster(User.objects.create_user('other', role='organiser'), title='Not mine')
+        for i, disaster in enumerate([cls.flood, cls.flood, cls.quake, other]):
+            Donation.objects.create(donor=cls.donor, disaster=disaster, amount=100 + i, transaction_id=f'UTR{i:08d}')
+        old = Donation.objects.get(transaction_id='UTR00000000')
+        Donation.objects.filter(pk=old.pk).update(donated_at=timezone.now() - timedelta(days=30))
+
+    def setUp(self):
+        self.client.force_login(self.organiser)
+
+    def export(self, **params):
+        response = self.client.get(reverse('organiser_donations_export'), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        rows = list(csv.reader(io.StringIO(self.export())))
+        self.assertEqual(rows[0][:6], ['donation_id', 'disaster_id', 'disaster', 'donor', 'amount', 'transaction_id'])
+        self.assertEqual([row[5] for row in rows[1:]], ['UTR00000000', 'UTR00000001', 'UTR00000002'])
+        self.assertEqual(rows[1][4], '100.00')
+
+    def test_jsonl_export_with_filters(self):
+        today = timezone.localdate().isoformat()
+        lines = self.export(format='jsonl', disaster=self.flood.pk, **{'from': today, 'to': today}).splitlines()
+        self.assertEqual([json.loads(line)['transaction_id'] for line in lines], ['UTR00000001'])
+
+    def test_rejects_bad_filters(self):
+        response = self.client.get(reverse('organiser_donations_export'), {'from': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+# ----------------------------
+# Statement Reconciliation
+# ----------------------------
+
+class StatementReconciliationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+        disaster = make_disaster(cls.organiser)
+        other = make_disaster(User.objects.create_user('other', role='organiser'), title='Not mine')
+        for i, amount in enumerate([500, 250, 100]):
+            Donation.objects.create(donor=cls.donor, disaster=disaster, amount=amount, transaction_id=f'UTR{i:08d}')
+        Donation.objects.create(donor=cls.donor, disaster=other, amount=900, transaction_id='UTR99999999')
+
+    def statement(self, rows, header='Date,UTR No,Narration,Credit Amount'):
+        return io.StringIO('\n'.join([header, *rows]) + '\n')
+
+    def status(self, txn_id):
+        return Donation.objects.get(transaction_id=txn_id).verification_status
+
+    def status_on(self, txn_id, channel):
+        return Donation.objects.get(transaction_id=txn_id, payment_channel=channel).verification_status
+
+    def test_matches_by_normalized_utr_and_amount(self):
+        result = reconcile(self.statement([
+            '01/10/2026,utr-0000-0000,UPI credit,"500.00"',
+            '01/10/2026,UTR00000001,UPI credit,"1,000.00"',
+            '01/10/2026,UTR12345678,UPI credit,75',
+            '01/10/2026,,Cash deposit,20',
+            '01/10/2026,UTR00000000,UPI credit,500',
+        ]))
+        self.assertEqual(
+            (result.rows, result.verified, result.amount_mismatch, result.unmatched, result.invalid, result.repeated),
+            (5, 1, 1, 1, 1, 1),
+        )
+        self.assertEqual(result.unmatched_sample, ['UTR12345678'])
+        self.assertEqual(self.status('UTR00000000'), 'verified')
+        self.assertIsNotNone(Donation.objects.get(transaction_id='UTR00000000').verified_at)
+        self.assertEqual(self.status('UTR00000001'), 'amount_mismatch')
+        self.assertEqual(self.status('UTR00000002'), 'pending')
+
+    def test_query_count_does_not_grow_with_statement(self):
+        def queries(rows):
+            Donation.objects.update(verification_status='pending', verified_at=None)
+            with CaptureQueriesContext(connection) as ctx:
+                reconcile(self.statement(rows), Donation.objects.all(), batch_size=1000)
+            return len(ctx)
+
+        small = queries(['x,UTR00000000,y,500'])
+        large = queries([f'x,UTR{i:08d},y,{amount}' for i, amount in enumerate([500, 250, 100])]
+                        + [f'x,NOPE{i:08d},y,1' for i in range(200)])
+        self.assertEqual(small, large)
+
+    def test_same_reference_on_two_channels(self):
+        Donation.objects.create(donor=self.donor, disaster=Disaster.objects.get(title='Not mine'), amount=40,
+                                payment_channel='upi', transaction_id='UTR00000002')
+        result = reconcile(self.statement(['x,UTR00000002,y,100']))
+        self.assertEqual((result.ambiguous, result.verified), (1, 0))
+        self.assertEqual(result.ambiguous_sample, ['UTR00000002'])
+        self.assertEqual(self.status_on('UTR00000002', 'bank_transfer'), 'pending')
+
+        result = reconcile(self.statement(['UTR00000002,UPI,40', 'UTR00000002,NEFT,100'], header='UTR,Mode,Amount'))
+        self.assertEqual((result.ambiguous, result.verified), (0, 2))
+        self.assertEqual(self.status_on('UTR00000002', 'upi'), 'verified')
+        self.assertEqual(self.status_on('UTR00000002', 'bank_transfer'), 'verified')
+
+    def test_batches_look_up_only_their_references(self):
+        rows = [f'x,UTR{i:08d},y,{amount}' for i, amount in enumerate([500, 250, 100])]
+        with CaptureQueriesContext(connection) as ctx:
+            result = reconcile(self.statement(rows), Donation.objects.all(), batch_size=2)
+        self.assertEqual(result.verified, 3)
+        lookups = [q['sql'] for q in ctx if q['sql'].startswith('SELECT')]
+        self.assertEqual(len(lookups), 2)
+        self.assertTrue(all('"transaction_ref" IN' in sql for sql in lookups))
+
+    def test_unknown_columns_are_rejected(self):
+        with self.assertRaises(StatementError):
+            reconcile(self.statement(['a,b'], header='Foo,Bar'))
+
+    def test_command_scopes_to_organiser(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write('Reference,Amount\nUTR00000002,100\nUTR99999999,900\n')
+        self.addCleanup(os.remove, handle.name)
+        out = io.StringIO()
+        call_command('reconcile_statement', handle.name, organiser=self.organiser.pk, stdout=out)
+        self.assertIn('1 verified', out.getvalue())
+        self.assertEqual(self.status('UTR00000002'), 'verified')
+        self.assertEqual(self.status('UTR99999999'), 'pending')
+
+    def test_upload_from_organiser_page(self):
+        self.client.force_login(self.organiser)
+        upload = SimpleUploadedFile('statement.csv', '﻿Transaction ID,Amount\nUTR00000001,250\n'.encode())
+        response = self.client.post(reverse('reconcile_statement'), {'statement': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].verified, 1)
+        self.assertEqual(self.status('UTR00000001'), 'verified')
+
+
+# ----------------------------
+# Duplicate Transaction IDs
+# ----------------------------
+
+class DuplicateTransactionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+        cls.disaster = make_disaster(cls.organiser)
+        cls.first = Donation.objects.create(
+            donor=cls.donor, disaster=cls.disaster, amount=100, payment_channel='upi', transaction_id='utr 1234-5678',
+        )
+
+    def donate(self, **data):
+        self.client.force_login(self.donor)
+        fields = {'amount': '100', 'payment_channel': 'upi', 'transaction_id': 'UTR12345678', 'message': ''}
+        fields.update(data)
+        return self.client.post(reverse('donate_to_disaster', args=[self.disaster.pk]), fields)
+
+    def test_reference_is_normalized_and_unique_per_channel(self):
+        self.assertEqual(self.first.transaction_ref, 'UTR12345678')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Donation.objects.create(donor=self.donor, disaster=self.disaster, amount=100,
+                                    payment_channel='upi', transaction_id='UTR12345678')
+        Donation.objects.create(donor=self.donor, disaster=self.disaster, amount=100,
+                                payment_channel='bank_transfer', transaction_id='UTR12345678')
+
+    def test_form_rejects_reused_transaction_id(self):
+        response = self.donate(transaction_id='UTR-1234-5678')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('transaction_id', response.context['form'].errors)
+        self.assertEqual(Donation.objects.count(), 1)
+
+        self.assertRedirects(self.donate(payment_channel='bank_transfer'), reverse('donor_dashboard'),
+                             fetch_redirect_response=False)
+
+    def test_command_reports_existing_duplicates(self):
+        # Rows recorded before the constraint existed carry no reference
+        for txn_id in ['UTR12345678', 'UTR00000001', 'UTR00000002']:
+            donation = Donation.objects.create(donor=self.donor, disaster=self.disaster, amount=50,
+                                               payment_channel='bank_transfer', transaction_id=txn_id)
+        Donation.objects.filter(pk=donation.pk).update(payment_channel='upi', transaction_id='utr12345678',
+                                                        transaction_ref=None)
+        out = io.StringIO()
+        call_command('find_duplicate_transactions', batch_size=2, stdout=out)
+        output = out.getvalue()
+        self.assertIn('UTR12345678 (upi): 2 donations', output)
+        self.assertIn(f'#{donation.pk} ', output)
+        self.assertIn('Scanned 4 donations: 1 transaction ids', output)
+
+    def test_legacy_duplicates_can_still_be_saved(self):
+        # Migration 0014 leaves every claim after the first without a reference
+        legacy = Donation.objects.create(donor=self.donor, disaster=self.disaster, amount=50,
+                                         payment_channel='upi', transaction_id='UTR00000009')
+        Donation.objects.filter(pk=legacy.pk).update(transaction_id='UTR1234 5678', transaction_ref=None)
+        legacy.refresh_from_db()
+        legacy.verification_status = 'verified'
+        legacy.save()
+        legacy.refresh_from_db()
+        self.assertIsNone(legacy.transaction_ref)
+
+        # Once it no longer collides it gets its reference back
+        legacy.transaction_id = 'UTR00000010'
+        legacy.save()
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.transaction_ref, 'UTR00000010')
+
+
+# ----------------------------
+# Full-text Search
+# ----------------------------
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+        cls.flood = make_disaster(cls.organiser, title='Flooding in Kodagu', location='Kodagu',
+                                  description='Heavy rains flooded villages.')
+        cls.quake = make_disaster(cls.organiser, title='Earthquake relief', location='Shimla',
+                                  description='Shelter for families after the flooding <script>.')
+        Message.objects.create(sender=cls.donor, recipient=cls.organiser, disaster=cls.flood,
+                               content='Are blankets reaching Kodagu?')
+        Message.objects.create(sender=cls.organiser, recipient=User.objects.create_user('other', role='donor'),
+                               disaster=cls.flood, content='Blankets for someone else')
+
+    def setUp(self):
+        self.client.force_login(self.donor)
+
+    def search(self, **params):
+        response = self.client.get(reverse('search'), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_ranks_title_matches_first_and_highlights(self):
+        results = self.search(q='flood').context['results']
+        self.assertEqual([d.pk for d in results], [self.flood.pk, self.quake.pk])
+        self.assertEqual(results[0].title_match, '<mark>Flooding</mark> in Kodagu')
+        # Stored text is escaped before highlights are added
+        self.assertIn('<mark>flooding</mark> &lt;script&gt;', results[1].description_match)
+
+    def test_index_follows_updates_and_deletes(self):
+        Disaster.objects.filter(pk=self.quake.pk).update(description='Shelter for families.')
+        self.assertEqual([d.pk for d in self.search(q='flood').context['results']], [self.flood.pk])
+        self.flood.delete()
+        self.assertEqual(list(self.search(q='flood').context['results']), [])
+
+    def test_messages_are_limited_to_the_user(self):
+        results = self.search(q='blanket', type='messages').context['results']
+        self.assertEqual([m.sender_name for m in results], ['donor'])
+        self.assertIn('<mark>blankets</mark>', results[0].content_match)
+
+    def test_operators_in_input_are_treated_as_text(self):
+        self.assertEqual([d.pk for d in self.search(q='kodagu" NEAR(').context['results']], [])
+        self.assertEqual([d.pk for d in self.search(q='"kodagu -').context['results']], [self.flood.pk])
+        self.assertEqual(list(self.search(q='***').context['results']), [])
+
+    @patch('core.search.SEARCH_PAGE_SIZE', 1)
+    def test_pagination(self):
+        response = self.search(q='flood')
+        self.assertTrue(response.context['has_next'])
+        second = self.search(q='flood', page=2)
+        self.assertEqual([d.pk for d in second.context['results']], [self.quake.pk])
+        self.assertFalse(second.context['has_next'])
+
+
+# ----------------------------
+# Fragment Caching
+# ----------------------------
+
+class FragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+        cls.other_donor = User.objects.create_user('other', password='donorpass123', role='donor')
+        cls.disaster = make_disaster(cls.organiser, title='Flood')
+        Feedback.objects.create(donor=cls.donor, organiser=cls.organiser, disaster=cls.disaster,
+                                rating=4, comment='Quick response')
+
+    def setUp(self):
+        reset_stats()
+
+    def get(self, user, name):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode(), [query['sql'] for query in queries.captured_queries]
+
+    def test_feedback_cards_are_cached_until_feedback_changes(self):
+        self.get(self.organiser, 'organiser_feedback')
+        html, queries = self.get(self.organiser, 'organiser_feedback')
+        self.assertIn('Quick response', html)
+        self.assertFalse(any('core_feedback' in sql for sql in queries))
+        self.assertEqual(cache_stats()['organiser_feedback'], {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+        Feedback.objects.create(donor=self.other_donor, organiser=self.organiser, disaster=self.disaster,
+                                rating=5, comment='Thank you all')
+        html, _ = self.get(self.organiser, 'organiser_feedback')
+        self.assertIn('Thank you all', html)
+
+    def test_feed_fragment_skips_the_feed_query(self):
+        self.get(self.donor, 'donor_dashboard')
+        html, queries = self.get(self.donor, 'donor_dashboard')
+        self.assertIn('Flood', html)
+        # Only the totals of the rows shown are read
+        self.assertEqual([sql for sql in queries if 'core_disaster' in sql and 'ORDER BY' in sql], [])
+
+        make_disaster(self.organiser, title='Cyclone')
+        html, _ = self.get(self.donor, 'donor_dashboard')
+        self.assertIn('Cyclone', html)
+
+    def test_donations_keep_the_feed_cached(self):
+        for name in ('donor_dashboard', 'donor_disaster_feed'):
+            self.get(self.donor, name)
+        reset_stats()
+        Donation.objects.create(donor=self.other_donor, disaster=self.disaster, amount=75, transaction_id='UTR00000001')
+
+        html, _ = self.get(self.donor, 'donor_dashboard')
+        self.assertIn('₹75.00 raised from 1 donation', html)
+        self.client.force_login(self.donor)
+        self.assertEqual(self.client.get(reverse('donor_disaster_feed')).json()['results'][0]['total_raised'], '75.00')
+        self.assertEqual(cache_stats()['donor_feed'], {'hits': 2, 'misses': 0, 'hit_ratio': 1.0})
+
+    def test_editing_a_disaster_only_invalidates_histories_showing_it(self):
+        quake = make_disaster(self.organiser, title='Quake')
+        Donation.objects.create(donor=self.donor, disaster=self.disaster, amount=75, transaction_id='UTR00000001')
+        Donation.objects.create(donor=self.other_donor, disaster=quake, amount=50, transaction_id='UTR00000002')
+        for user in (self.donor, self.other_donor):
+            self.get(user, 'user_profile')
+        reset_stats()
+
+        self.disaster.title = 'Flash flood'
+        self.disaster.save()
+        donor_html, _ = self.get(self.donor, 'user_profile')
+        other_html, _ = self.get(self.other_donor, 'user_profile')
+        self.assertIn('Flash flood', donor_html)
+        self.assertIn('Quake', other_html)
+        self.assertEqual(cache_stats()['profile_donations'], {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_writes_only_invalidate_the_affected_user(self):
+        for user in (self.donor, self.other_donor, self.donor, self.other_donor):
+            self.get(user, 'user_profile')
+        Donation.objects.create(donor=self.donor, disaster=self.disaster, amount=75, transaction_id='UTR00000001')
+        reset_stats()
+
+        donor_html, _ = self.get(self.donor, 'user_profile')
+        self.get(self.other_donor, 'user_profile')
+        self.assertIn('₹75', donor_html)
+        self.assertEqual(cache_stats()['profile_donations'], {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def test_stats_endpoint_is_staff_only(self):
+        self.get(self.organiser, 'organiser_feedback')
+        staff = User.objects.create_user('staff', password='staffpass123', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('fragment_cache_stats'))
+        self.assertEqual(response.json()['fragments']['organiser_feedback']['misses'], 1)
+
+        self.client.force_login(self.organiser)
+        self.assertEqual(self.client.get(reverse('fragment_cache_stats')).status_code, 302)
+
+
+# ----------------------------
+# Request Metrics
+# ----------------------------
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.staff = User.objects.create_user('staff', password='staffpass123', is_staff=True)
+        make_disaster(cls.organiser)
+
+    def setUp(self):
+        metrics_store.reset()
+        slow_requests.reset()
+
+    def scrape(self, **headers):
+        response = self.client.get('/metrics', **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode()
+
+    def sample(self, text, metric):
+        for line in text.splitlines():
+            if line.startswith(metric + ' '):
+                return float(line.rsplit(' ', 1)[1])
+        self.fail(f"{metric} not in metrics:\n{text}")
+
+    def test_records_queries_templates_and_size_per_view(self):
+        self.client.force_login(self.organiser)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('organiser_feedback'))
+        query_count = len(queries)
+
+        self.client.force_login(self.staff)
+        text = self.scrape()
+        labels = '{view="organiser_feedback",method="GET"}'
+        self.assertEqual(self.sample(text, 'relief_requests_total{view="organiser_feedback",method="GET",status="200"}'), 1)
+        self.assertEqual(self.sample(text, f'relief_request_db_queries_sum{labels}'), query_count)
+        self.assertEqual(self.sample(text, f'relief_response_size_bytes_sum{labels}'), len(response.content))
+        self.assertGreater(self.sample(text, f'relief_request_template_duration_seconds_sum{labels}'), 0)
+        self.assertEqual(
+            self.sample(text, 'relief_request_duration_seconds_bucket{view="organiser_feedback",method="GET",le="+Inf"}'),
+            1,
+        )
+
+    def test_unnamed_routes_are_labelled_by_pattern(self):
+        def view(request, pk):
+            pass
+
+        class urlconf:
+            urlpatterns = [
+                path('disasters/<int:pk>/', view),
+                path('named/<int:pk>/', view, name='named'),
+            ]
+
+        request = SimpleNamespace(resolver_match=resolve('/disasters/1/', urlconf))
+        self.assertEqual(_view_name(request), 'disasters/<int:pk>/')
+        request.resolver_match = resolve('/named/1/', urlconf)
+        self.assertEqual(_view_name(request), 'named')
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_endpoint_needs_staff_or_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertIn('relief_requests_total', self.scrape(HTTP_AUTHORIZATION='Bearer scrape-token'))
+        self.client.force_login(self.organiser)
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICS_SLOW_REQUESTS=1)
+    def test_logs_slowest_requests_with_sql(self):
+        self.client.force_login(self.organiser)
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            self.client.get(reverse('organiser_feedback'))
+        self.assertIn('Slow request GET /organiser/feedback/ (organiser_feedback)', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+
+# ----------------------------
+# Synthetic Data Seeding
+# ----------------------------
+
+class SeedReliefDataTests(TestCase):
+    VOLUMES = dict(organisers=3, donors=5, disasters=8, donations=40, messages=20, feedback=10, batch_size=7)
+
+    def seed(self, *args, **options):
+        out = io.StringIO()
+        call_command('seed_relief_data', *args, stdout=out, **{**self.VOLUMES, **options})
+        return out.getvalue()
+
+    def snapshot(self):
+        return {
+            'disasters': list(Disaster.objects.order_by('pk').values_list(
+                'organiser__username', 'title', 'location', 'urgency_level', 'posted_at')),
+            'donations': list(Donation.objects.order_by('pk').values_list(
+                'donor__username', 'disaster__title', 'amount', 'transaction_ref', 'donated_at')),
+            'messages': list(Message.objects.order_by('pk').values_list(
+                'sender__username', 'recipient__username', 'disaster__title', 'content', 'timestamp')),
+            'feedback': list(Feedback.objects.order_by('pk').values_list(
+                'donor__username', 'organiser__username', 'disaster__title', 'rating', 'submitted_at')),
+        }
+
+    def test_same_seed_produces_the_same_rows(self):
+        with transaction.atomic():
+            self.assertIn('Seeded 86 rows', self.seed())
+            first = self.snapshot()
+            transaction.set_rollback(True)
+        with transaction.atomic():
+            self.seed(seed=2)
+            self.assertNotEqual(self.snapshot()['donations'], first['donations'])
+            transaction.set_rollback(True)
+        self.seed()
+        self.assertEqual(self.snapshot(), first)
+        self.assertEqual(len(first['donations']), 40)
+
+    def test_links_rows_shares_one_hash_and_rebuilds_summaries(self):
+        self.seed('--anchor=2024-06-01')
+        organisers = User.objects.filter(role='organiser')
+        self.assertEqual(len(set(User.objects.values_list('password', flat=True))), 1)
+        self.assertTrue(organisers.first().check_password('benchmark-pass'))
+        self.assertFalse(Feedback.objects.exclude(organiser=models.F('disaster__organiser')).exists())
+        self.assertLess(Donation.objects.latest('donated_at').donated_at.year, 2025)
+        for organiser in organisers:
+            self.assertEqual(
+                OrganiserSummary.objects.get(organiser=organiser).donation_count,
+                Donation.objects.filter(disaster__organiser=organiser).count(),
+            )
+
+    def test_refuses_to_reuse_usernames(self):
+        self.seed(donations=0, messages=0, feedback=0)
+        with self.assertRaisesMessage(CommandError, 'pass another --prefix'):
+            self.seed()
+        self.seed(prefix='b-', donations=5)
+        donations = Donation.objects.filter(transaction_id__startswith='B-UTR')
+        self.assertEqual(donations.count(), 5)
+        # Stored the way the donation form and the duplicate finder look them up
+        for transaction_id, transaction_ref in donations.values_list('transaction_id', 'transaction_ref'):
+            self.assertEqual(transaction_ref, normalize_transaction_id(transaction_id))
+            self.assertTrue(transaction_ref.startswith('BUTR'))
+        with self.assertRaisesMessage(CommandError, 'Donation BUTR'):
+            self.seed(prefix='b', donations=5)
+
+
+# ----------------------------
+# Write Rate Limiting
+# ----------------------------
+
+@override_settings(RATELIMITS={
+    'submit_feedback': {'user': '2/m', 'ip': '3/m'},
+    'message_thread': {'user': '1/m'},
+})
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+        cls.other = User.objects.create_user('other', password='otherpass123', role='donor')
+        cls.disaster = make_disaster(cls.organiser)
+
+    def feedback(self, user=None, **extra):
+        self.client.force_login(user or self.donor)
+        return self.client.post(
+            reverse('submit_feedback', args=[self.disaster.pk]), {'rating': 5, 'comment': 'Thanks'}, **extra
+        )
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/m'), (10, 10 / 60))
+        self.assertEqual(parse_rate('30/10s'), (30, 3.0))
+
+    def test_user_bucket_returns_429_with_retry_after(self):
+        self.assertEqual(self.feedback().status_code, 302)
+        self.assertEqual(self.feedback().status_code, 302)
+        response = self.feedback()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(Feedback.objects.count(), 2)
+        # Only writes are throttled
+        self.assertEqual(self.client.get(reverse('submit_feedback', args=[self.disaster.pk])).status_code, 200)
+
+    def test_ip_bucket_is_shared_between_users(self):
+        self.feedback()
+        self.feedback()
+        self.assertEqual(self.feedback(self.other).status_code, 302)
+        self.assertEqual(self.feedback(self.other).status_code, 429)
+        self.assertEqual(self.feedback(self.other, REMOTE_ADDR='10.0.0.9').status_code, 302)
+
+    def test_bucket_refills_over_time(self):
+        with patch('core.ratelimit.time.monotonic', return_value=1000.0):
+            self.feedback()
+            self.feedback()
+            self.assertEqual(self.feedback().status_code, 429)
+        with patch('core.ratelimit.time.monotonic', return_value=1030.0):
+            self.assertEqual(self.feedback().status_code, 302)
+            self.assertEqual(self.feedback().status_code, 429)
+
+    def test_routes_and_switch(self):
+        self.client.force_login(self.donor)
+        url = reverse('message_thread', args=[self.disaster.pk])
+        self.assertEqual(self.client.post(url, {'content': 'Hello'}).status_code, 302)
+        self.assertEqual(self.client.post(url, {'content': 'Again'}).status_code, 429)
+        with override_settings(RATELIMIT_ENABLED=False):
+            self.assertEqual(self.client.post(url, {'content': 'Again'}).status_code, 302)
+
+    def test_cache_store_shares_buckets(self):
+        first, second = CacheBucketStore(), CacheBucketStore()
+        self.assertEqual(first.take([('route:user:1', 1, 0.5)]), 0)
+        self.assertAlmostEqual(second.take([('route:user:1', 1, 0.5)]), 2, places=1)
+
+
+# ----------------------------
+# Password Hashing
+# ----------------------------
+
+@override_settings(PASSWORD_HASHERS=[
+    'core.passwords.TunedScryptPasswordHasher',
+    'core.passwords.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+])
+class PasswordHashingTests(TestCase):
+    def test_register_hashes_the_password_once(self):
+        with patch('django.contrib.auth.base_user.make_password', side_effect=make_password) as hashed:
+            response = self.client.post(reverse('register'), {
+                'username': 'newdonor', 'email': 'new@example.com', 'phone': '9876543210', 'role': 'donor',
+                'password1': 'river-camp-2024', 'password2': 'river-camp-2024',
+            })
+        self.assertRedirects(response, reverse('donor_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(hashed.call_count, 1)
+        self.assertTrue(User.objects.get(username='newdonor').check_password('river-camp-2024'))
+
+    def test_login_rehashes_old_hashes_with_the_preferred_hasher(self):
+        user = User.objects.create_user('donor', role='donor')
+        user.password = make_password('donorpass123', hasher='pbkdf2_sha1')
+        user.save()
+
+        response = self.client.post(reverse('login'), {'username': 'donor', 'password': 'donorpass123'})
+        self.assertEqual(response.status_code, 302)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$16384$'))
+
+        with self.settings(PASSWORD_SCRYPT_WORK_FACTOR=2 ** 15):
+            self.client.post(reverse('login'), {'username': 'donor', 'password': 'donorpass123'})
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$32768$'))
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=600_000, PASSWORD_HASHERS=[
+        'core.passwords.TunedPBKDF2PasswordHasher', 'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    ])
+    def test_pbkdf2_never_weakens_stored_hashes(self):
+        default = PBKDF2PasswordHasher.iterations
+        encoded = make_password('donorpass123', hasher='pbkdf2_sha256')
+        self.assertTrue(encoded.startswith(f'pbkdf2_sha256${default}$'))
+        self.assertFalse(TunedPBKDF2PasswordHasher().must_update(encoded))
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=default + 1):
+            self.assertTrue(TunedPBKDF2PasswordHasher().must_update(encoded))
+
+    @override_settings(
+        PASSWORD_SCRYPT_WORK_FACTOR=2 ** 10, PASSWORD_SCRYPT_PARALLELISM=1,
+        PASSWORD_ARGON2_TIME_COST=1, PASSWORD_ARGON2_MEMORY_COST=19456, PASSWORD_ARGON2_PARALLELISM=1,
+    )
+    def test_scrypt_and_argon2_costs_never_drop_below_djangos(self):
+        scrypt = TunedScryptPasswordHasher()
+        self.assertEqual(scrypt.work_factor, ScryptPasswordHasher.work_factor)
+        self.assertEqual(scrypt.parallelism, ScryptPasswordHasher.parallelism)
+        self.assertFalse(scrypt.must_update(make_password('donorpass123', hasher=ScryptPasswordHasher())))
+
+        argon2 = TunedArgon2PasswordHasher()
+        self.assertEqual(argon2.time_cost, Argon2PasswordHasher.time_cost)
+        self.assertEqual(argon2.memory_cost, Argon2PasswordHasher.memory_cost)
+        self.assertEqual(argon2.parallelism, Argon2PasswordHasher.parallelism)
+
+    def test_common_password_list_is_loaded_once(self):
+        first, second = CommonPasswordValidator(), CommonPasswordValidator()
+        self.assertIs(first.passwords, second.passwords)
+        self.assertIsInstance(first.passwords, frozenset)
+        with self.assertRaises(ValidationError):
+            second.validate('Password123')
+
+
+# ----------------------------
+# Disaster Donation Totals
+# ----------------------------
+
+class DisasterTotalsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+
+    def setUp(self):
+        self.disaster = make_disaster(self.organiser)
+
+    def donate(self, amount, txn):
+        return Donation.objects.create(donor=self.donor, disaster=self.disaster, amount=amount, transaction_id=txn)
+
+    def assertTotals(self, total, count, last):
+        self.disaster.refresh_from_db()
+        self.assertEqual(
+            (self.disaster.total_raised, self.disaster.donation_count, self.disaster.last_donation_at),
+            (total, count, last and last.donated_at),
+        )
+
+    def test_totals_follow_donations(self):
+        first = self.donate(100, 'TXN00000001')
+        second = self.donate('50.50', 'TXN00000002')
+        self.assertTotals(Decimal('150.50'), 2, second)
+
+        second.amount = 80
+        second.save()
+        self.assertTotals(Decimal('180.00'), 2, second)
+
+        second.delete()
+        self.assertTotals(Decimal('100.00'), 1, first)
+        self.donor.delete()
+        self.assertTotals(0, 0, None)
+
+    def test_saving_a_stale_disaster_keeps_the_totals(self):
+        stale = Disaster.objects.get(pk=self.disaster.pk)
+        self.donate(100, 'TXN00000001')
+        stale.title = 'Flood relief'
+        stale.save()
+        self.assertTotals(Decimal('100.00'), 1, Donation.objects.get())
+        self.assertEqual(self.disaster.title, 'Flood relief')
+
+    def test_feed_shows_progress(self):
+        self.donate(100, 'TXN00000001')
+        self.client.force_login(self.donor)
+        self.assertContains(self.client.get(reverse('donor_dashboard')), '₹100.00 raised from 1 donation<')
+        self.donate(25, 'TXN00000002')
+        self.assertContains(self.client.get(reverse('donor_dashboard')), '₹125.00 raised from 2 donations')
+        row = self.client.get(reverse('donor_disaster_feed')).json()['results'][0]
+        self.assertEqual((row['total_raised'], row['donation_count']), ('125.00', 2))
+
+    def test_check_command_reports_and_fixes_drift(self):
+        self.donate(100, 'TXN00000001')
+        healthy = make_disaster(self.organiser, title='Quake')
+        Disaster.objects.filter(pk=self.disaster.pk).update(total_raised=5, donation_count=3)
+
+        out = io.StringIO()
+        call_command('check_disaster_totals', stdout=out)
+        self.assertIn('total_raised 5.00 (should be 100)', out.getvalue())
+        self.assertIn('Checked 2 disasters: 1 with wrong donation totals.', out.getvalue())
+
+        call_command('check_disaster_totals', '--fix', stdout=io.StringIO())
+        self.assertTotals(Decimal('100.00'), 1, Donation.objects.get())
+        healthy.refresh_from_db()
+        self.assertEqual((healthy.total_raised, healthy.donation_count), (0, 0))
+
+
+# ----------------------------
+# Priority Ranking
+# ----------------------------
+
+class PriorityRankingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+
+    def test_score_weighs_urgency_recency_funding_and_activity(self):
+        now = timezone.now()
+        base = priority_score('low', now)
+        self.assertAlmostEqual(priority_score('high', now - 2 * HALF_LIFE), base)
+        self.assertAlmostEqual(priority_score('low', now, FUNDING_SCALE), priority_score('low', now - HALF_LIFE))
+        self.assertAlmostEqual(
+            priority_score('low', now - 5 * HALF_LIFE, last_activity_at=now), priority_score('low', now - ACTIVITY_LAG)
+        )
+        # Activity older than the lag does not count against the posting time
+        self.assertAlmostEqual(priority_score('low', now, last_activity_at=now), base)
+
+    def test_new_disasters_are_ranked_on_creation(self):
+        low = make_disaster(self.organiser, urgency_level='low')
+        high = make_disaster(self.organiser, urgency_level='high')
+        self.assertFalse(Disaster.objects.filter(score_dirty=True).exists())
+        self.assertGreater(
+            Disaster.objects.get(pk=high.pk).priority_score, Disaster.objects.get(pk=low.pk).priority_score
+        )
+
+    def test_only_changed_disasters_are_rescored(self):
+        flood = make_disaster(self.organiser, urgency_level='high')
+        quiet = make_disaster(self.organiser, urgency_level='high')
+        chatty = make_disaster(self.organiser, urgency_level='high')
+        Disaster.objects.update(posted_at=timezone.now() - 10 * HALF_LIFE, score_dirty=True)
+        self.assertEqual(rescore_dirty(), 3)
+        Donation.objects.create(donor=self.donor, disaster=flood, amount=100, transaction_id='TXN00000001')
+        Message.objects.create(sender=self.donor, recipient=self.organiser, disaster=chatty, content='Hi')
+
+        self.assertEqual(set(Disaster.objects.filter(score_dirty=True).values_list('pk', flat=True)), {flood.pk, chatty.pk})
+        self.assertEqual(rescore_dirty(batch_size=1), 2)
+        scores = dict(Disaster.objects.values_list('pk', 'priority_score'))
+        self.assertGreater(scores[chatty.pk], scores[flood.pk])
+        self.assertGreater(scores[flood.pk], scores[quiet.pk])
+
+        flood.urgency_level = 'low'
+        flood.save()
+        self.assertTrue(Disaster.objects.get(pk=flood.pk).score_dirty)
+        out = io.StringIO()
+        call_command('update_priority_scores', stdout=out)
+        self.assertIn('Rescored 1 disasters.', out.getvalue())
+
+
+# ----------------------------
+# Nearby Disasters
+# ----------------------------
+
+class NearbyDisasterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+
+    def test_locations_resolve_through_the_gazetteer(self):
+        self.assertEqual(geo.resolve('Mysore').name, 'Mysuru')
+        self.assertEqual(geo.resolve('Madikeri, Coorg, Karnataka').name, 'Kodagu')
+        self.assertEqual(geo.resolve('Landslides near Port Blair harbour').name, 'Port Blair')
+        self.assertIsNone(geo.resolve('Atlantis'))
+        self.assertIsNone(geo.resolve(''))
+
+    def test_geohash_cells(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        cells = geo.covering_cells(12.2958, 76.6394, 50)
+        self.assertLessEqual(len(cells), geo.MAX_COVER_CELLS)
+        self.assertIn(geo.encode(12.2958, 76.6394)[:len(cells[0])], cells)
+
+    def test_saving_stores_coordinates(self):
+        disaster = make_disaster(self.organiser, location='Mysore')
+        self.assertEqual((disaster.latitude, disaster.longitude), (12.2958, 76.6394))
+        self.assertEqual(disaster.geohash, geo.encode(12.2958, 76.6394))
+
+        disaster.location = 'Chennai'
+        disaster.save(update_fields=['location'])
+        self.assertEqual(Disaster.objects.get(pk=disaster.pk).latitude, 13.0827)
+
+        disaster.location = 'Somewhere unmapped'
+        disaster.save()
+        self.assertEqual(
+            Disaster.objects.filter(pk=disaster.pk).values_list('latitude', 'longitude', 'geohash').get(),
+            (None, None, None),
+        )
+
+    def test_nearby_matches_a_full_scan(self):
+        rng = random.Random(7)
+        Disaster.objects.bulk_create([
+            Disaster(organiser=self.organiser, title=f'Appeal {i}', description='Relief needed', urgency_level='low',
+                     bank_account_name='Relief Fund', bank_account_number='000111222333', ifsc_code='SBIN0000001',
+                     **scattered_location(rng, spread_km=300))
+            for i in range(400)
+        ])
+        points = list(Disaster.objects.values_list('pk', 'latitude', 'longitude'))
+        for latitude, longitude, radius in [(12.97, 77.59, 25), (12.97, 77.59, 200), (26.14, 91.74, 80), (8.0, 77.0, 500)]:
+            expected = sorted(
+                (geo.distance_km(latitude, longitude, lat, lon), pk) for pk, lat, lon in points
+                if geo.distance_km(latitude, longitude, lat, lon) <= radius
+            )
+            self.assertEqual(geo.nearby(Disaster.objects.all(), latitude, longitude, radius), expected)
+            self.assertEqual(geo.nearby(Disaster.objects.all(), latitude, longitude, radius, limit=5), expected[:5])
+
+    def test_nearby_page(self):
+        mysuru = make_disaster(self.organiser, title='Mysuru floods', location='Mysuru')
+        kodagu = make_disaster(self.organiser, title='Kodagu landslide', location='Madikeri, Kodagu')
+        make_disaster(self.organiser, title='Chennai cyclone', location='Chennai')
+        self.client.login(username='donor', password='donorpass123')
+
+        response = self.client.get(reverse('nearby_disasters'), {'near': 'Mysore', 'radius': 150})
+        self.assertEqual([d.pk for d in response.context['results']], [mysuru.pk, kodagu.pk])
+        self.assertContains(response, '99 km away')
+
+        response = self.client.get(reverse('nearby_disasters'), {'lat': '12.30', 'lon': '76.64', 'radius': 10})
+        self.assertEqual([d.pk for d in response.context['results']], [mysuru.pk])
+
+        response = self.client.get(reverse('nearby_disasters'), {'near': 'Atlantis'})
+        self.assertContains(response, 'know where "Atlantis" is')
+
+    def test_locate_disasters_command(self):
+        make_disaster(self.organiser, location='Wayanad')
+        make_disaster(self.organiser, location='Atlantis')
+        Disaster.objects.update(latitude=None, longitude=None, geohash=None)
+        out = io.StringIO()
+        call_command('locate_disasters', stdout=out)
+        self.assertIn('Placed 1 of 2 disasters.', out.getvalue())
+        self.assertEqual(Disaster.objects.filter(geohash__isnull=False).get().location, 'Wayanad')
+
+
+# ----------------------------
+# Conversations & Unread Counts
+# ----------------------------
+
+class ConversationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+        cls.other = User.objects.create_user('other', password='otherpass123', role='donor')
+        cls.flood = make_disaster(cls.organiser, title='Flood')
+        cls.quake = make_disaster(cls.organiser, title='Quake')
+
+    def send(self, sender, recipient, disaster, content='Hello'):
+        return Message.objects.create(sender=sender, recipient=recipient, disaster=disaster, content=content)
+
+    def unread(self, user):
+        return User.objects.get(pk=user.pk).unread_messages
+
+    def test_messages_update_their_conversation(self):
+        self.send(self.donor, self.organiser, self.flood, 'Need tents')
+        self.send(self.donor, self.organiser, self.flood, 'And water')
+        reply = self.send(self.organiser, self.donor, self.flood, 'On the way')
+        self.send(self.other, self.organiser, self.flood)
+
+        conversation = Conversation.objects.get(disaster=self.flood, donor=self.donor)
+        self.assertEqual(conversation.organiser, self.organiser)
+        self.assertEqual(conversation.last_message, reply)
+        self.assertEqual((conversation.organiser_unread, conversation.donor_unread), (2, 1))
+        self.assertEqual(Conversation.objects.count(), 2)
+        self.assertEqual((self.unread(self.organiser), self.unread(self.donor)), (3, 1))
+
+    def test_inboxes_list_conversations(self):
+        self.send(self.donor, self.organiser, self.flood, 'Need tents')
+        self.send(self.donor, self.organiser, self.quake, 'Need doctors')
+        self.send(self.donor, self.organiser, self.flood, 'And water')
+        self.send(self.organiser, self.other, self.quake, 'Thanks for helping')
+
+        self.client.login(username='org', password='adminpass123')
+        response = self.client.get(reverse('organiser_messages'))
+        rows = [(c.disaster_id, c.donor_id, c.organiser_unread) for c in response.context['inbox'].conversations]
+        self.assertEqual(rows, [(self.quake.pk, self.other.pk, 0), (self.flood.pk, self.donor.pk, 2),
+                                (self.quake.pk, self.donor.pk, 1)])
+        self.assertContains(response, 'And water')
+        self.assertNotContains(response, 'Need tents')
+        self.assertContains(response, '<span class="badge bg-primary">3</span>', html=True)
+
+        self.client.login(username='other', password='otherpass123')
+        response = self.client.get(reverse('donor_messages'))
+        self.assertEqual([c.disaster_id for c in response.context['inbox'].conversations], [self.quake.pk])
+        self.assertContains(response, 'Thanks for helping')
+
+    def test_opening_a_thread_marks_it_read(self):
+        self.send(self.donor, self.organiser, self.flood)
+        self.send(self.other, self.organiser, self.flood)
+        self.send(self.donor, self.organiser, self.quake)
+        self.send(self.organiser, self.donor, self.flood)
+
+        self.client.login(username='org', password='adminpass123')
+        self.client.get(reverse('organiser_messages'))
+        self.client.get(reverse('message_thread', args=[self.flood.pk]))
+        self.assertEqual(self.unread(self.organiser), 1)
+        self.assertEqual(Conversation.objects.filter(disaster=self.flood, organiser_unread__gt=0).count(), 0)
+        # The cached inbox shows the new counts
+        response = self.client.get(reverse('organiser_messages'))
+        self.assertEqual([c.organiser_unread for c in response.context['inbox'].conversations], [0, 1, 0])
+        # The donor's side is untouched
+        self.assertEqual(self.unread(self.donor), 1)
+
+        self.client.login(username='donor', password='donorpass123')
+        last_id = Message.objects.order_by('id').last().pk
+        self.client.get(reverse('message_thread_poll', args=[self.flood.pk]), {'since_id': last_id})
+        self.assertEqual(self.unread(self.donor), 1)
+        self.client.get(reverse('message_thread_poll', args=[self.flood.pk]), {'since_id': last_id - 1})
+        self.assertEqual(self.unread(self.donor), 0)
+
+    def test_inboxes_are_keyset_paged(self):
+        disasters = [make_disaster(self.organiser, title=f'Appeal {i}') for i in range(25)]
+        for disaster in disasters:
+            self.send(self.donor, self.organiser, disaster)
+        # Shared timestamps exercise the id tie-breaker
+        Conversation.objects.filter(disaster__in=disasters[:10]).update(last_message_at=timezone.now())
+        expected = list(
+            Conversation.objects.filter(organiser=self.organiser)
+            .order_by('-last_message_at', '-id').values_list('pk', flat=True)
+        )
+
+        self.client.login(username='org', password='adminpass123')
+        seen, cursor = [], ''
+        while True:
+            response = self.client.get(reverse('organiser_messages'), {'cursor': cursor} if cursor else {})
+            inbox = response.context['inbox']
+            seen += [c.pk for c in inbox.conversations]
+            cursor = inbox.next_cursor
+            if not cursor:
+                break
+            self.assertContains(response, f'?cursor={cursor}')
+        self.assertEqual(seen, expected)
+
+        self.client.login(username='donor', password='donorpass123')
+        response = self.client.get(reverse('donor_messages'))
+        self.assertEqual(len(response.context['inbox'].conversations), 20)
+
+    def test_deleting_a_disaster_recounts_unread(self):
+        self.send(self.donor, self.organiser, self.flood)
+        self.send(self.donor, self.organiser, self.quake)
+        self.flood.delete()
+        self.assertEqual(self.unread(self.organiser), 1)
+        self.assertEqual(Conversation.objects.get().disaster_id, self.quake.pk)
+
+    def test_from_messages_matches_recorded_conversations(self):
+        for sender, recipient, disaster in [
+            (self.donor, self.organiser, self.flood), (self.organiser, self.donor, self.flood),
+            (self.other, self.organiser, self.flood), (self.organiser, self.other, self.quake),
+        ]:
+            self.send(sender, recipient, disaster)
+        fields = ('disaster_id', 'donor_id', 'organiser_id', 'last_message_id', 'last_message_at')
+        built = Conversation.from_messages(Message.objects.all())
+        self.assertEqual(
+            sorted(tuple(getattr(c, f) for f in fields) for c in built),
+            sorted(Conversation.objects.values_list(*fields)),
+        )
+
+
+# ----------------------------
+# Sessions & Signed-in User Cache
+# ----------------------------
+
+@override_settings(AUTH_USER_CACHE_PER_PROCESS=True)
+class SessionAuthTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+        cls.flood = make_disaster(cls.organiser, title='Flood')
+
+    def user_lookups(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, sum('FROM "core_user" WHERE "core_user"."id" =' in q['sql'] for q in queries)
+
+    def test_cached_user_skips_the_user_query(self):
+        self.client.login(username='donor', password='donorpass123')
+        response, lookups = self.user_lookups(reverse('user_profile'))
+        self.assertEqual((response.status_code, lookups), (200, 1))
+        response, lookups = self.user_lookups(reverse('user_profile'))
+        self.assertEqual((response.status_code, lookups), (200, 0))
+        self.assertEqual(response.wsgi_request.user.role, 'donor')
+
+        with override_settings(AUTH_USER_CACHE_TIMEOUT=0):
+            self.assertEqual(self.user_lookups(reverse('user_profile'))[1], 1)
+
+    @override_settings(AUTH_USER_CACHE_PER_PROCESS=False)
+    def test_per_process_cache_needs_a_single_worker(self):
+        self.client.login(username='donor', password='donorpass123')
+        self.client.get(reverse('user_profile'))
+        self.assertEqual(self.user_lookups(reverse('user_profile'))[1], 1)
+
+        # A cache every worker shares is used, and forgetting a user reaches all of them
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        shared = {**settings.CACHES, 'sessions': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }}
+        with override_settings(CACHES=shared):
+            self.client.get(reverse('user_profile'))
+            self.assertEqual(self.user_lookups(reverse('user_profile'))[1], 0)
+            User.objects.filter(pk=self.donor.pk).update(is_active=False)
+            forget_user(self.donor.pk)
+            response = self.client.get(reverse('user_profile'))
+            self.assertEqual(response.status_code, 302)
+
+    def test_password_change_ends_other_sessions(self):
+        self.client.login(username='donor', password='donorpass123')
+        self.client.get(reverse('user_profile'))
+        self.donor.set_password('newdonorpass123')
+        self.donor.save()
+        response = self.client.get(reverse('user_profile'))
+        self.assertRedirects(response, f"{reverse('login')}?next={reverse('user_profile')}", fetch_redirect_response=False)
+
+    def test_saving_a_user_drops_the_cached_copy(self):
+        self.client.login(username='donor', password='donorpass123')
+        self.client.get(reverse('user_profile'))
+        self.donor.email = 'donor@example.com'
+        self.donor.save()
+        response, lookups = self.user_lookups(reverse('user_profile'))
+        self.assertEqual(lookups, 1)
+        self.assertEqual(response.wsgi_request.user.email, 'donor@example.com')
+
+    def test_unread_badge_stays_current(self):
+        self.client.login(username='org', password='adminpass123')
+        self.client.get(reverse('organiser_messages'))
+        Message.objects.create(sender=self.donor, recipient=self.organiser, disaster=self.flood, content='Hello')
+        response = self.client.get(reverse('organiser_messages'))
+        self.assertContains(response, 'Messages <span class="badge bg-primary">1</span>')
+
+        self.client.get(reverse('message_thread', args=[self.flood.pk]))
+        response = self.client.get(reverse('organiser_messages'))
+        self.assertNotContains(response, 'Messages <span class="badge')
+
+    def test_session_backends(self):
+        for engine in ['django.contrib.sessions.backends.cached_db', 'django.contrib.sessions.backends.signed_cookies']:
+            with self.subTest(engine=engine), override_settings(SESSION_ENGINE=engine):
+                # SessionMiddleware picks its engine once, so each needs a new client
+                self.client = self.client_class()
+                self.assertTrue(self.client.login(username='donor', password='donorpass123'))
+                self.assertEqual(self.client.get(reverse('user_profile')).status_code, 200)
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(reverse('user_profile'))
+                self.assertFalse(any('core_user' in q['sql'] or 'django_session' in q['sql'] for q in queries))
+                self.client.post(reverse('logout'))
+                self.assertEqual(self.client.get(reverse('user_profile')).status_code, 302)
+
+
+# ----------------------------
+# Query Budgets
+# ----------------------------
+# Each list view must cost a fixed number of queries however many rows it
+# shows. The budgets include the session and user lookups made by the auth
+# middleware; a per-row lazy load shows up as a failure when rows are added.
+
+class QueryBudgetTests(TestCase):
+    ROWS = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organiser = User.objects.create_user('org', password='adminpass123', role='organiser')
+        cls.donor = User.objects.create_user('donor', password='donorpass123', role='donor')
+        cls.disaster = make_disaster(cls.organiser)
+        OrganiserSummary.rebuild(cls.organiser.pk)
+
+    def seed(self, rows):
+        for i in range(rows):
+            donor = User.objects.create_user(f'donor-{User.objects.count()}', role='donor')
+            disaster = make_disaster(self.organiser, title=f'Appeal {i}')
+            Donation.objects.create(donor=self.donor, disaster=disaster, amount=100, transaction_id=f'TXN{donor.pk:08d}')
+            Donation.objects.create(donor=donor, disaster=self.disaster, amount=50, transaction_id=f'UTR{donor.pk:08d}')
+            Message.objects.create(sender=donor, recipient=self.organiser, disaster=disaster, content='Need update')
+            Message.objects.create(sender=self.organiser, recipient=self.donor, disaster=self.disaster, content='Update')
+            Feedback.objects.create(donor=donor, organiser=self.organiser, disaster=disaster, rating=4)
+            Feedback.objects.create(donor=self.donor, organiser=self.organiser, disaster=disaster, rating=5)
+
+    def assertQueryBudget(self, user, url, budget):
+        self.client.force_login(user)
+        for _ in range(2):
+            self.seed(self.ROWS)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                len(queries), budget,
+                f"{url} ran {len(queries)} queries, budget is {budget}:\n"
+                + "\n".join(q['sql'] for q in queries.captured_queries),
+            )
+
+    def test_organiser_dashboard(self):
+        self.assertQueryBudget(self.organiser, reverse('organiser_dashboard'), 5)
+
+    def test_organiser_donations(self):
+        self.assertQueryBudget(self.organiser, reverse('organiser_donations'), 4)
+
+    def test_organiser_messages(self):
+        self.assertQueryBudget(self.organiser, reverse('organiser_messages'), 3)
+
+    def test_organiser_feedback(self):
+        self.assertQueryBudget(self.organiser, reverse('organiser_feedback'), 3)
+
+    def test_organiser_profile(self):
+        self.assertQueryBudget(self.organiser, reverse('user_profile'), 3)
+
+    def test_donor_dashboard(self):
+        # The feed page's totals are read on every request, cached or not
+        self.assertQueryBudget(self.donor, reverse('donor_dashboard'), 5)
+
+    def test_donor_donations(self):
+        self.assertQueryBudget(self.donor, reverse('donor_donations'), 3)
+
+    def test_donor_feedback(self):
+        self.assertQueryBudget(self.donor, reverse('donor_feedback'), 3)
+
+    def test_donor_messages(self):
+        self.assertQueryBudget(self.donor, reverse('donor_messages'), 3)
+
+    def test_donor_profile(self):
+        self.assertQueryBudget(self.donor, reverse('user_profile'), 3)
+
+    def test_message_thread(self):
+        # seed() leaves the donor unread messages here: 3 more to mark them read
+        self.assertQueryBudget(self.donor, reverse('message_thread', args=[self.disaster.pk]), 7)
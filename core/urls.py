@@ -17,6 +17,11 @@ urlpatterns = [
     path('dashboard/', views.dashboard, name='dashboard'),
     path('organiser/dashboard/', views.organiser_dashboard, name='organiser_dashboard'),
     path('donor/dashboard/', views.donor_dashboard, name='donor_dashboard'),
+    path('donor/dashboard/feed/', views.donor_disaster_feed, name='donor_disaster_feed'),
+    path('search/', views.search, name='search'),
+    path('disasters/nearby/', views.nearby_disasters, name='nearby_disasters'),
+    path('cache/stats/', views.fragment_cache_stats, name='fragment_cache_stats'),
+    path('metrics', views.metrics, name='metrics'),
 
     # ----------------------------
     # Disaster Management (Organiser)
@@ -28,6 +33,8 @@ urlpatterns = [
     path('organiser/messages/', views.organiser_messages, name='organiser_messages'),
     path('organiser/feedback/', views.organiser_feedback, name='organiser_feedback'),
     path('organiser/donations/', views.organiser_donations, name='organiser_donations'),
+    path('organiser/donations/export/', views.organiser_donations_export, name='organiser_donations_export'),
+    path('organiser/donations/reconcile/', views.reconcile_statement, name='reconcile_statement'),
 
     # ----------------------------
     # Donation & Interaction (Donor)
@@ -41,6 +48,9 @@ urlpatterns = [
     # Shared Features
     # ----------------------------
     path('messages/<int:disaster_id>/', views.message_thread, name='message_thread'),
+    path('messages/<int:disaster_id>/poll/', views.message_thread_poll, name='message_thread_poll'),
+    path('messages/<int:disaster_id>/stream/', views.message_thread_stream, name='message_thread_stream'),
+    path('messages/inbox/stream/', views.inbox_stream, name='inbox_stream'),
     path('feedback/<int:disaster_id>/submit/', views.submit_feedback, name='submit_feedback'),
     path('profile/', views.user_profile, name='user_profile'),
 ]
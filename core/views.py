@@ -1,13 +1,54 @@
-from django.shortcuts import render, redirect, get_object_or_404
+import csv
+import json
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .forms import UserRegistrationForm, DisasterForm
 from .models import User, Disaster
-from .models import User, Disaster, Donation, Message, Feedback
+from .models import User, Disaster, Donation, Message, Feedback, OrganiserSummary, Conversation
 from .forms import UserRegistrationForm, DisasterForm, DonationForm
-from .forms import MessageForm, FeedbackForm
-from django.db.models import Avg
+from .forms import MessageForm, FeedbackForm, StatementUploadForm
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber, Substr
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import (
+    HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse,
+)
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from django.urls import reverse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.http import condition
+from . import geo
+from .auth import forget_user
+from .caching import bump, cache_stats, get_or_compute
+from .metrics import store as metrics_store
+from .pagination import FEED_ORDERS, INBOX_ORDERS, keyset_page
+from .ratelimit import ratelimit
+from .pubsub import get_broker, inbox_channel, message_payload, thread_channel
+from .reconciliation import StatementError, open_statement, reconcile
+from .search import search_disasters, search_messages
+
+FEED_PAGE_SIZE = 20
+FEED_SUMMARY_LENGTH = 300
+RECENT_FEEDBACK_COUNT = 5
+THREAD_WINDOW = 50
+THREAD_POLL_LIMIT = 200
+STREAM_HEARTBEAT_SECONDS = 15
+NEARBY_LIMIT = 50
+NEARBY_DEFAULT_RADIUS_KM = 50
+NEARBY_RADIUS_CHOICES_KM = [10, 25, 50, 100, 250, 500]
+INBOX_PAGE_SIZE = 20
+
+FeedPage = namedtuple('FeedPage', 'disasters next_cursor')
+InboxPage = namedtuple('InboxPage', 'conversations next_cursor')
 
 # ----------------------------
 # Role Selection and Registration
@@ -24,14 +65,14 @@ def register(request):
     if request.method == 'POST':
         form = UserRegistrationForm(request.POST)
         if form.is_valid():
-            user = form.save(commit=False)
-            user.role = role
             password = form.cleaned_data.get('password1')
 
             if role == 'organiser' and not password.startswith('admin'):
                 form.add_error('password1', "Organiser password must start with 'admin'")
             else:
-                user.set_password(password)
+                # The form hashes password1 itself; hashing it again here doubled the cost
+                user = form.save(commit=False)
+                user.role = role
                 user.save()
                 login(request, user)
 
@@ -72,19 +113,22 @@ def organiser_dashboard(request):
     if request.user.role != 'organiser':
         return redirect('dashboard')
 
-    disasters = Disaster.objects.filter(organiser=request.user)
-    active_disasters = disasters.filter(urgency_level='high')
-    donations = Donation.objects.filter(disaster__organiser=request.user)
-    feedbacks = Feedback.objects.filter(organiser=request.user)
-    avg_rating = feedbacks.aggregate(Avg('rating'))['rating__avg']
+    # Counters are maintained incrementally, so the stats cost one row read
+    summary = OrganiserSummary.for_organiser(request.user)
+    disasters = Disaster.objects.filter(organiser=request.user).order_by('-priority_score')
+    feedbacks = (
+        Feedback.objects.filter(organiser=request.user)
+        .select_related('donor')
+        .order_by('-submitted_at')[:RECENT_FEEDBACK_COUNT]
+    )
 
     context = {
         'disasters': disasters,
-        'active_count': active_disasters.count(),
-        'total_count': disasters.count(),
-        'donation_count': donations.count(),
+        'active_count': summary.high_urgency_count,
+        'total_count': summary.disaster_count,
+        'donation_count': summary.donation_count,
         'volunteer_count': 5,  # Placeholder
-        'avg_rating': round(avg_rating or 0, 1),
+        'avg_rating': round(summary.avg_rating, 1),
         'feedbacks': feedbacks,
     }
     return render(request, 'core/organiser_dashboard.html', context)
@@ -93,28 +137,196 @@ def organiser_dashboard(request):
 # Donor Dashboard
 # ----------------------------
 
+def _donor_feed(request):
+    """Apply the feed filters from the query string and return one keyset page."""
+    disasters = (
+        Disaster.objects
+        .defer('description')
+        .annotate(summary=Substr('description', 1, FEED_SUMMARY_LENGTH))
+    )
+
+    urgency = request.GET.get('urgency')
+    if urgency in dict(Disaster.URGENCY_CHOICES):
+        disasters = disasters.filter(urgency_level=urgency)
+
+    location = request.GET.get('location', '').strip()
+    if location:
+        disasters = disasters.filter(location__iexact=location)
+
+    return keyset_page(disasters, request.GET.get('cursor'), FEED_PAGE_SIZE, _feed_order(request))
+
+def _feed_order(request):
+    # Ranked by priority score unless the donor picks another order
+    order = request.GET.get('sort')
+    return order if order in FEED_ORDERS else 'priority'
+
+def _cached_feed(request):
+    """
+    One feed page, cached under the "disasters" scope ("funding" when sorted by
+    amount raised). Donations do not invalidate it, so each disaster's totals
+    are read fresh for the rows shown.
+    """
+    vary = [request.GET.get(param, '') for param in ('urgency', 'location', 'sort', 'cursor')]
+    scope = 'funding' if _feed_order(request) == 'least_funded' else 'disasters'
+    page = get_or_compute('donor_feed', scope, lambda: FeedPage(*_donor_feed(request)), vary=vary)
+    if page.disasters:
+        totals = Disaster.objects.filter(pk__in=[d.pk for d in page.disasters]).values_list(
+            'pk', 'total_raised', 'donation_count',
+        )
+        totals = {pk: (total_raised, count) for pk, total_raised, count in totals}
+        for disaster in page.disasters:
+            if disaster.pk in totals:
+                disaster.total_raised, disaster.donation_count = totals[disaster.pk]
+    return page
+
 @login_required
 def donor_dashboard(request):
     # Ensure only donors access this view
     if request.user.role != 'donor':
         return redirect('dashboard')
 
-    # Load all disasters for donor to view and act on
-    disasters = Disaster.objects.all().order_by('-posted_at')
+    # One page of disasters, most urgent first; deeper pages are fetched by cursor
+    feed = _cached_feed(request)
 
     # Load donor's donation history
-    donations = Donation.objects.filter(donor=request.user).order_by('-donated_at')
+    donations = (
+        Donation.objects.filter(donor=request.user)
+        .select_related('disaster')
+        .order_by('-donated_at')
+    )
 
     # Optional: preload messages or feedback if needed later
     # messages = Message.objects.filter(recipient=request.user)
     # feedbacks = Feedback.objects.filter(donor=request.user)
 
     return render(request, 'core/donor_dashboard.html', {
-        'disasters': disasters,
+        'feed': feed,
+        'cursor': request.GET.get('cursor', ''),
+        'urgency_choices': Disaster.URGENCY_CHOICES,
+        'selected_urgency': request.GET.get('urgency', ''),
+        'selected_location': request.GET.get('location', ''),
+        'selected_sort': request.GET.get('sort', ''),
         'donations': donations,
         # 'messages': messages,
         # 'feedbacks': feedbacks,
     })
+
+@login_required
+def donor_disaster_feed(request):
+    """JSON "load more" endpoint for the donor dashboard feed."""
+    if request.user.role != 'donor':
+        return JsonResponse({'error': 'Only donors can view the disaster feed.'}, status=403)
+
+    disasters, next_cursor = _cached_feed(request)
+    return JsonResponse({
+        'results': [
+            {
+                'id': disaster.pk,
+                'title': disaster.title,
+                'location': disaster.location,
+                'urgency_level': disaster.urgency_level,
+                'summary': disaster.summary,
+                'posted_at': disaster.posted_at.isoformat(),
+                'total_raised': str(disaster.total_raised),
+                'donation_count': disaster.donation_count,
+                'donate_url': reverse('donate_to_disaster', args=[disaster.pk]),
+                'message_url': reverse('message_thread', args=[disaster.pk]),
+                'feedback_url': reverse('submit_feedback', args=[disaster.pk]),
+            }
+            for disaster in disasters
+        ],
+        'next_cursor': next_cursor,
+    })
+
+# ----------------------------
+# Search
+# ----------------------------
+
+@login_required
+def search(request):
+    """Ranked full-text search over disasters, or over the user's own messages."""
+    query = request.GET.get('q', '').strip()
+    kind = 'messages' if request.GET.get('type') == 'messages' else 'disasters'
+    page = max(_parse_id(request.GET.get('page')) or 1, 1)
+
+    if kind == 'messages':
+        results, has_next = search_messages(request.user, query, page)
+    else:
+        results, has_next = search_disasters(query, page)
+
+    return render(request, 'core/search.html', {
+        'query': query,
+        'kind': kind,
+        'results': results,
+        'page': page,
+        'has_next': has_next,
+    })
+
+# ----------------------------
+# Nearby Disasters
+# ----------------------------
+
+def _parse_coordinate(value, limit):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if -limit <= value <= limit else None
+
+@login_required
+def nearby_disasters(request):
+    """Disasters within a radius of a named place or of the browser's position, nearest first."""
+    near = request.GET.get('near', '').strip()
+    radius = min(_parse_id(request.GET.get('radius')) or NEARBY_DEFAULT_RADIUS_KM, geo.MAX_RADIUS_KM)
+    latitude = _parse_coordinate(request.GET.get('lat'), 90)
+    longitude = _parse_coordinate(request.GET.get('lon'), 180)
+
+    # A typed place name takes precedence over coordinates from the browser
+    place = geo.resolve(near) if near else None
+    if near:
+        latitude, longitude = (place.latitude, place.longitude) if place else (None, None)
+
+    results = []
+    if latitude is not None and longitude is not None:
+        hits = geo.nearby(Disaster.objects.all(), latitude, longitude, radius, limit=NEARBY_LIMIT)
+        disasters = Disaster.objects.defer('description').in_bulk([pk for _, pk in hits])
+        for distance, pk in hits:
+            if pk in disasters:  # unless deleted in between
+                disasters[pk].distance_km = distance
+                results.append(disasters[pk])
+
+    return render(request, 'core/nearby.html', {
+        'near': near,
+        'place': place,
+        # Kept so changing the radius searches around the same position again
+        'lat': '' if near or latitude is None else latitude,
+        'lon': '' if near or longitude is None else longitude,
+        'radius': radius,
+        'radius_choices': NEARBY_RADIUS_CHOICES_KM,
+        'place_names': geo.place_names(),
+        'searched': bool(near) or latitude is not None,
+        'results': results,
+    })
+
+# ----------------------------
+# Cache Statistics & Metrics
+# ----------------------------
+
+@staff_member_required
+def fragment_cache_stats(request):
+    """Per-fragment cache hit/miss counters for this worker process."""
+    return JsonResponse({'fragments': cache_stats()})
+
+def metrics(request):
+    """Request metrics in the Prometheus text format, for staff or a bearer token."""
+    token = settings.METRICS_TOKEN
+    authorized = request.user.is_staff or bool(token) and constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    )
+    if not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(metrics_store.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # ----------------------------
 # Disaster CRUD (Create, View, Edit, Delete)
 # ----------------------------
@@ -233,6 +445,7 @@ def message_thread(request, disaster_id):
     })
 
 @login_required
+@ratelimit('submit_feedback')
 def submit_feedback(request, disaster_id):
     disaster = get_object_or_404(Disaster, pk=disaster_id)
     organiser = disaster.organiser
@@ -260,17 +473,31 @@ def submit_feedback(request, disaster_id):
     })
 from .models import Message
 
+def _inbox_stream_url(request):
+    return reverse('inbox_stream') if hasattr(request, 'scope') else None
+
+def _inbox(request, conversations):
+    """
+    Context for one keyset page of an inbox. The page is only queried when the
+    cached inbox fragment is stale, and only the first page follows the stream.
+    """
+    cursor = request.GET.get('cursor', '')
+    return {
+        'inbox': SimpleLazyObject(lambda: InboxPage(*keyset_page(
+            conversations, cursor, INBOX_PAGE_SIZE, 'recent', INBOX_ORDERS,
+        ))),
+        'cursor': cursor,
+        'stream_url': None if cursor else _inbox_stream_url(request),
+    }
+
 @login_required
 def organiser_messages(request):
     if request.user.role != 'organiser':
         return redirect('dashboard')
 
-    # Get all messages where the organiser is the recipient
-    messages_qs = Message.objects.filter(recipient=request.user).order_by('-timestamp')
-
-    return render(request, 'core/organiser_messages.html', {
-        'messages': messages_qs
-    })
+    # One row per donor and disaster, latest activity first
+    conversations = Conversation.objects.filter(organiser=request.user).select_related('donor', 'disaster', 'last_message')
+    return render(request, 'core/organiser_messages.html', _inbox(request, conversations))
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
@@ -279,9 +506,14 @@ from .models import Disaster, Message
 from .forms import MessageForm
 
 @login_required
+@ratelimit('message_thread')
 def message_thread(request, disaster_id):
     disaster = get_object_or_404(Disaster, pk=disaster_id)
-    thread_messages = Message.objects.filter(disaster=disaster).order_by('timestamp')
+    thread_messages = (
+        Message.objects.filter(disaster=disaster)
+        .select_related('sender')
+        .order_by('timestamp')
+    )
 
     if request.method == 'POST':
         form = MessageForm(request.POST)
@@ -308,19 +540,175 @@ def message_thread(request, disaster_id):
     else:
         form = MessageForm()
 
+    # Only the latest window is rendered; older messages load on request
+    window, older_before = _thread_window(disaster, request.GET.get('before'))
+    _mark_thread_read(request, disaster)
+
     return render(request, 'core/message_thread.html', {
         'disaster': disaster,
-        'messages': thread_messages,
+        'messages': window,
+        'older_before': older_before,
+        'last_id': window[-1].pk if window else 0,
+        'stream_url': reverse('message_thread_stream', args=[disaster.pk]) if hasattr(request, 'scope') else None,
         'form': form
     })
 
+def _parse_id(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+def _mark_thread_read(request, disaster):
+    # Free when the user has nothing unread anywhere, which is the common case
+    if Conversation.mark_read(request.user, disaster):
+        bump('messages', request.user.pk)
+        forget_user(request.user.pk)
+
+def _thread_window(disaster, before=None):
+    """
+    Return (messages, older_before): up to THREAD_WINDOW messages, oldest
+    first, that precede message id ``before`` (or the newest ones), and the
+    id to pass as ``before`` for the next older window, or None if there is none.
+    """
+    window = Message.objects.filter(disaster=disaster).select_related('sender').order_by('-id')
+    before = _parse_id(before)
+    if before:
+        window = window.filter(id__lt=before)
+    window = list(window[:THREAD_WINDOW + 1])
+    older_before = None
+    if len(window) > THREAD_WINDOW:
+        window = window[:THREAD_WINDOW]
+        older_before = window[-1].pk
+    window.reverse()
+    return window, older_before
+
+def _thread_head(request, disaster_id):
+    """(id, timestamp) of the newest message in the thread, looked up once per request."""
+    if not hasattr(request, '_thread_head'):
+        request._thread_head = (
+            Message.objects.filter(disaster_id=disaster_id)
+            .order_by('-id')
+            .values_list('id', 'timestamp')
+            .first()
+        ) or (0, None)
+    return request._thread_head
+
+def _thread_etag(request, disaster_id):
+    return f'"thread-{disaster_id}-{_thread_head(request, disaster_id)[0]}"'
+
+def _thread_last_modified(request, disaster_id):
+    return _thread_head(request, disaster_id)[1]
+
+@login_required
+@condition(etag_func=_thread_etag, last_modified_func=_thread_last_modified)
+def message_thread_poll(request, disaster_id):
+    """
+    JSON messages for a thread. ``since_id`` returns messages newer than that
+    id (for polling), ``before`` returns the window older than that id (for
+    "load older"). Unchanged threads answer 304 to conditional requests.
+    """
+    disaster = get_object_or_404(Disaster, pk=disaster_id)
+    since_id = _parse_id(request.GET.get('since_id'))
+
+    if since_id is not None:
+        rows = list(
+            Message.objects.filter(disaster=disaster, id__gt=since_id)
+            .order_by('id')
+            .values('id', 'sender__username', 'content', 'timestamp')[:THREAD_POLL_LIMIT]
+        )
+        older_before = None
+        if rows:
+            # The open thread is showing them, so they are read
+            _mark_thread_read(request, disaster)
+    else:
+        window, older_before = _thread_window(disaster, request.GET.get('before'))
+        rows = [
+            {'id': m.pk, 'sender__username': m.sender.username, 'content': m.content, 'timestamp': m.timestamp}
+            for m in window
+        ]
+
+    return JsonResponse({
+        'messages': [
+            {
+                'id': row['id'],
+                'sender': row['sender__username'],
+                'content': row['content'],
+                'timestamp': row['timestamp'].isoformat(),
+            }
+            for row in rows
+        ],
+        'last_id': rows[-1]['id'] if rows else since_id,
+        'older_before': older_before,
+    })
+
+# ----------------------------
+# Real-time Message Streams (ASGI)
+# ----------------------------
+# Server-sent events fed by core.pubsub. These hold the connection open, so
+# they only make sense under the ASGI application; under WSGI each stream
+# would pin a worker thread.
+
+def _sse(payload):
+    return f"id: {payload['id']}\nevent: message\ndata: {json.dumps(payload)}\n\n"
+
+async def _event_stream(channel, backlog_qs, last_event_id):
+    subscription = get_broker().subscribe(channel)
+    try:
+        # Replay what the client missed while reconnecting, then go live;
+        # live messages already covered by the replay are skipped
+        replayed_through = last_event_id or 0
+        if last_event_id is not None:
+            backlog = backlog_qs.filter(id__gt=last_event_id).select_related('sender', 'disaster').order_by('id')
+            async for message in backlog[:THREAD_POLL_LIMIT]:
+                yield _sse(message_payload(message))
+                replayed_through = message.pk
+        yield "retry: 3000\n\n"
+        while True:
+            payload = await subscription.get(timeout=STREAM_HEARTBEAT_SECONDS)
+            if payload is None:
+                yield ": keepalive\n\n"
+            elif payload['id'] > replayed_through:
+                yield _sse(payload)
+    finally:
+        subscription.close()
+
+def _stream_response(request, channel, backlog_qs):
+    if not hasattr(request, 'scope'):
+        return HttpResponse("Event streams require the ASGI server.", status=501)
+    response = StreamingHttpResponse(
+        _event_stream(channel, backlog_qs, _parse_id(request.headers.get('Last-Event-ID') or request.GET.get('last_id'))),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@login_required
+async def message_thread_stream(request, disaster_id):
+    disaster = await aget_object_or_404(Disaster, pk=disaster_id)
+    return _stream_response(
+        request, thread_channel(disaster.pk), Message.objects.filter(disaster=disaster)
+    )
+
+@login_required
+async def inbox_stream(request):
+    user = await request.auser()
+    return _stream_response(
+        request, inbox_channel(user.pk), Message.objects.filter(recipient=user)
+    )
+
 from .models import Feedback
 
 @login_required
 def organiser_feedback(request):
     if request.user.role != 'organiser':
         return redirect('dashboard')
-    feedbacks = Feedback.objects.filter(organiser=request.user).order_by('-submitted_at')
+    feedbacks = (
+        Feedback.objects.filter(organiser=request.user)
+        .select_related('donor')
+        .order_by('-submitted_at')
+    )
     return render(request, 'core/organiser_feedback.html', {'feedbacks': feedbacks})
 
 
@@ -328,20 +716,168 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
 from .models import Donation, Disaster
 
+DONATIONS_PER_GROUP = 10
+
+
+def _first_pages(disaster_ids, size):
+    """
+    Ids of the newest `size` donations of each disaster. The row number runs
+    over ids alone, so SQLite walks donation_disaster_idx without touching
+    the donation rows themselves.
+    """
+    return (
+        Donation.objects.filter(disaster_id__in=disaster_ids)
+        .annotate(row=Window(
+            RowNumber(), partition_by='disaster_id',
+            order_by=(F('donated_at').desc(), F('id').desc()),
+        ))
+        .filter(row__lte=size)
+        .values('pk')
+    )
+
 @login_required
 def organiser_donations(request):
     if request.user.role != 'organiser':
         return redirect('dashboard')
 
-    disasters = Disaster.objects.filter(organiser=request.user)
-    donations = Donation.objects.filter(disaster__organiser=request.user).order_by('-donated_at')
+    # ?disaster=<id>&page=<n> pages through a single group
+    try:
+        focus_id = int(request.GET.get('disaster', ''))
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        focus_id, page = None, 1
+
+    group_donations = Donation.objects.select_related('donor').order_by('-donated_at', '-id')
+
+    # Totals are the ones kept on each disaster; each group carries only its first page of rows
+    disasters = list(
+        Disaster.objects.filter(organiser=request.user)
+        .defer('description')
+        .order_by('-posted_at')
+    )
+    pages = {disaster.pk: [] for disaster in disasters}
+    first_page_ids = [pk for pk in pages if not (pk == focus_id and page > 1)]
+    if first_page_ids:
+        for donation in group_donations.filter(pk__in=_first_pages(first_page_ids, DONATIONS_PER_GROUP)):
+            pages[donation.disaster_id].append(donation)
+
+    for disaster in disasters:
+        disaster.page_donations = pages[disaster.pk]
+        disaster.page_number = 1
+        if disaster.pk == focus_id and page > 1:
+            offset = (page - 1) * DONATIONS_PER_GROUP
+            disaster.page_donations = list(
+                group_donations.filter(disaster=disaster)[offset:offset + DONATIONS_PER_GROUP]
+            )
+            disaster.page_number = page
+        disaster.has_previous = disaster.page_number > 1
+        disaster.has_next = disaster.page_number * DONATIONS_PER_GROUP < disaster.donation_count
 
     return render(request, 'core/organiser_donations.html', {
-        'donations': donations,
         'disasters': disasters,
-        'donation_count': donations.count()
+        'donation_count': sum(d.donation_count for d in disasters),
+        'amount_raised': sum(d.total_raised for d in disasters),
     })
 
+# ----------------------------
+# Donation Export (Reconciliation)
+# ----------------------------
+
+EXPORT_COLUMNS = [
+    'id', 'disaster_id', 'disaster__title', 'donor__username',
+    'amount', 'transaction_id', 'donated_at', 'message',
+]
+EXPORT_HEADER = [
+    'donation_id', 'disaster_id', 'disaster', 'donor',
+    'amount', 'transaction_id', 'donated_at', 'message',
+]
+EXPORT_CHUNK_SIZE = 2000
+
+class _Echo:
+    """csv.writer target that hands each formatted row straight back."""
+    def write(self, value):
+        return value
+
+def _export_rows(rows, fmt):
+    """Yield the export in blocks of EXPORT_CHUNK_SIZE rows, header first."""
+    writer = csv.writer(_Echo())
+
+    def encode(row):
+        if fmt == 'csv':
+            return writer.writerow([value.isoformat() if hasattr(value, 'isoformat') else value for value in row])
+        return json.dumps(dict(zip(EXPORT_HEADER, row)), cls=DjangoJSONEncoder) + '\n'
+
+    if fmt == 'csv':
+        yield writer.writerow(EXPORT_HEADER)
+
+    block = []
+    for row in rows:
+        block.append(encode(row))
+        if len(block) >= EXPORT_CHUNK_SIZE:
+            yield ''.join(block)
+            block = []
+    if block:
+        yield ''.join(block)
+
+def _day_start(value):
+    return timezone.make_aware(datetime.combine(date.fromisoformat(value), datetime.min.time()))
+
+@login_required
+def organiser_donations_export(request):
+    """
+    Stream the organiser's donations as CSV (default) or JSONL for bank
+    reconciliation. Optional filters: ?disaster=<id>&from=YYYY-MM-DD&to=YYYY-MM-DD
+    (both dates inclusive).
+    """
+    if request.user.role != 'organiser':
+        return redirect('dashboard')
+
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in ('csv', 'jsonl'):
+        return HttpResponseBadRequest("format must be csv or jsonl")
+
+    donations = Donation.objects.filter(disaster__organiser=request.user)
+    try:
+        if request.GET.get('disaster'):
+            donations = donations.filter(disaster_id=int(request.GET['disaster']))
+        # Compare against day boundaries so the donated_at index stays usable
+        if request.GET.get('from'):
+            donations = donations.filter(donated_at__gte=_day_start(request.GET['from']))
+        if request.GET.get('to'):
+            donations = donations.filter(donated_at__lt=_day_start(request.GET['to']) + timedelta(days=1))
+    except ValueError:
+        return HttpResponseBadRequest("disaster must be an id and dates must be YYYY-MM-DD")
+
+    rows = donations.order_by('id').values_list(*EXPORT_COLUMNS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    response = StreamingHttpResponse(
+        _export_rows(rows, fmt),
+        content_type='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+    )
+    filename = f"donations-{timezone.localdate().isoformat()}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@login_required
+def reconcile_statement(request):
+    if request.user.role != 'organiser':
+        return redirect('dashboard')
+
+    result = None
+    if request.method == 'POST':
+        form = StatementUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                result = reconcile(
+                    open_statement(form.cleaned_data['statement'].file),
+                    Donation.objects.filter(disaster__organiser=request.user),
+                )
+            except (StatementError, UnicodeDecodeError) as exc:
+                form.add_error('statement', str(exc))
+    else:
+        form = StatementUploadForm()
+
+    return render(request, 'core/reconcile_statement.html', {'form': form, 'result': result})
+
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from .models import Disaster, Donation
@@ -373,7 +909,7 @@ def user_profile(request):
     if user.role == 'organiser':
         context['disasters'] = Disaster.objects.filter(organiser=user)
     elif user.role == 'donor':
-        context['donations'] = Donation.objects.filter(donor=user)
+        context['donations'] = Donation.objects.filter(donor=user).select_related('disaster')
 
     return render(request, 'core/user_profile.html', context)
 
@@ -383,22 +919,31 @@ from .models import Donation, Feedback, Message
 
 @login_required
 def donor_donations(request):
-    donations = Donation.objects.filter(donor=request.user).order_by('-donated_at')
+    donations = (
+        Donation.objects.filter(donor=request.user)
+        .select_related('disaster')
+        .order_by('-donated_at')
+    )
     return render(request, 'core/donor_donations.html', {'donations': donations})
 
 @login_required
 def donor_feedback(request):
-    feedbacks = Feedback.objects.filter(donor=request.user).order_by('-submitted_at')
+    feedbacks = (
+        Feedback.objects.filter(donor=request.user)
+        .select_related('disaster', 'organiser')
+        .order_by('-submitted_at')
+    )
     return render(request, 'core/donor_feedback.html', {'feedbacks': feedbacks})
 
 @login_required
 def donor_messages(request):
-    messages_qs = Message.objects.filter(recipient=request.user).order_by('-timestamp')
-    return render(request, 'core/donor_messages.html', {'messages': messages_qs})
+    conversations = Conversation.objects.filter(donor=request.user).select_related('organiser', 'disaster', 'last_message')
+    return render(request, 'core/donor_messages.html', _inbox(request, conversations))
 
 from .forms import ManualDonationForm
 
 @login_required
+@ratelimit('donate_to_disaster')
 def donate_to_disaster(request, disaster_id):
     disaster = get_object_or_404(Disaster, pk=disaster_id)
 
@@ -408,9 +953,15 @@ def donate_to_disaster(request, disaster_id):
             donation = form.save(commit=False)
             donation.donor = request.user
             donation.disaster = disaster
-            donation.save()
-            messages.success(request, "Thank you! Your donation has been recorded.")
-            return redirect('donor_dashboard')
+            try:
+                with transaction.atomic():
+                    donation.save()
+            except IntegrityError:
+                # Lost a race with a concurrent submission of the same UTR
+                form.add_error('transaction_id', "A donation with this transaction ID has already been recorded.")
+            else:
+                messages.success(request, "Thank you! Your donation has been recorded.")
+                return redirect('donor_dashboard')
     else:
         form = ManualDonationForm()
 
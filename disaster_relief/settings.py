@@ -1,3 +1,5 @@
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # 🔧 Base directory
@@ -28,11 +30,12 @@ CRISPY_TEMPLATE_PACK = "bootstrap4"
 
 # 🧱 Middleware
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -49,11 +52,57 @@ DATABASES = {
     }
 }
 
-# 🔐 Password validation
+# 🚀 Production SQLite profile (opt in with DJANGO_DB_PROFILE=production)
+# WAL lets readers run alongside the single writer, IMMEDIATE transactions take
+# the write lock up front instead of failing on upgrade, and the busy timeout
+# makes writers queue instead of raising "database is locked".
+if os.environ.get('DJANGO_DB_PROFILE') == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA mmap_size=268435456;'
+                'PRAGMA cache_size=-65536;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        },
+    })
+
+# 🔑 Password hashing: PASSWORD_HASHER picks argon2 (needs argon2-cffi), scrypt
+# or pbkdf2. Each cost can be raised but never drops below Django's own
+# defaults (argon2 t=2, m=100 MiB, p=8; scrypt N=2**14, p=5; pbkdf2 1M), since
+# Django would otherwise rehash stored passwords weaker on their next login.
+# The other hashers stay listed so older hashes still verify, and a password is
+# rehashed with the chosen hasher and cost on its next login.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'argon2' if find_spec('argon2') else 'scrypt')
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 102400))  # KiB
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 8))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get('PASSWORD_SCRYPT_WORK_FACTOR', 2 ** 14))
+PASSWORD_SCRYPT_PARALLELISM = int(os.environ.get('PASSWORD_SCRYPT_PARALLELISM', 5))
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 1_000_000))
+_PASSWORD_HASHERS = {
+    'argon2': 'core.passwords.TunedArgon2PasswordHasher',
+    'scrypt': 'core.passwords.TunedScryptPasswordHasher',
+    'pbkdf2': 'core.passwords.TunedPBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+# 🔐 Password validation (the common-password list is loaded once per process)
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
-    {'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator'},
+    {'NAME': 'core.passwords.CommonPasswordValidator'},
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
@@ -70,6 +119,14 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are named by their SHA-256 so identical files are stored once;
+# thumbnails are derived files with fixed names, kept in plain storage.
+STORAGES = {
+    'default': {'BACKEND': 'core.storage.ContentAddressedStorage'},
+    'thumbnails': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
 # 👤 Custom user model
 AUTH_USER_MODEL = 'core.User'
 
@@ -84,7 +141,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # 🧠 Templates
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django's backend, timing renders for the request metrics below
+        'BACKEND': 'core.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],  # Global templates folder
         'APP_DIRS': True,
         'OPTIONS': {
@@ -96,4 +154,87 @@ TEMPLATES = [
             ],
         },
     },
-]
\ No newline at end of file
+]
+
+# 📡 Real-time messages: pub/sub broker behind the ASGI event streams.
+# The in-process broker only reaches clients connected to the same worker.
+MESSAGE_BROKER = 'core.pubsub.InProcessBroker'
+
+# 🖼️ Uploaded images are re-encoded and thumbnailed by a background thread pool.
+# Set IMAGE_PROCESSING_SYNC = True to process inline (e.g. in tests).
+IMAGE_PROCESSING_WORKERS = 2
+IMAGE_PROCESSING_SYNC = False
+
+# ⚡ Cache for rendered fragments (feed, feedback cards, profile lists, inboxes).
+# Local memory is per process; CACHE_BACKEND=file shares one cache between the
+# workers on a host. Fragments are invalidated by signals, the timeout only
+# bounds how long unused entries are kept.
+if os.environ.get('CACHE_BACKEND') == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'disaster-relief',
+        }
+    }
+FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRAGMENT_CACHE_TIMEOUT', 300))
+
+# 🍪 Sessions and the signed-in user. SESSION_BACKEND picks where sessions live:
+#   db              one session row read per request (Django's default)
+#   cached_db       the "sessions" cache below, written through to the database
+#   signed_cookies  the signed cookie itself; no storage, but a session cannot be
+#                   ended server-side before it expires (logout only clears the
+#                   cookie in that browser)
+# The "sessions" cache is an LRU of SESSION_CACHE_ENTRIES per process, so with
+# several workers a logout on one does not reach another's cached copy of the
+# session; use CACHE_BACKEND=file (shared per host) or db there. The signed-in
+# user, role and unread count included, is kept in the same cache for
+# AUTH_USER_CACHE_TIMEOUT seconds (0 to disable) and dropped when it changes.
+# A per-process cache would keep serving a user another worker changed, so the
+# user is only cached there with AUTH_USER_CACHE_PER_PROCESS=1, which declares
+# a single-worker deployment (e.g. runserver, or one gunicorn worker).
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[os.environ.get('SESSION_BACKEND', 'db')]
+if os.environ.get('CACHE_BACKEND') == 'file':
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('SESSION_CACHE_LOCATION', str(BASE_DIR / '.cache' / 'sessions')),
+    }
+else:
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'disaster-relief-sessions',
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('SESSION_CACHE_ENTRIES', 10000))},
+    }
+SESSION_CACHE_ALIAS = 'sessions'
+AUTH_USER_CACHE_ALIAS = 'sessions'
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', 60))
+AUTH_USER_CACHE_PER_PROCESS = os.environ.get('AUTH_USER_CACHE_PER_PROCESS') == '1'
+
+# 📊 Request metrics, served in Prometheus format at /metrics to staff users or
+# to scrapers sending "Authorization: Bearer $METRICS_TOKEN". Set
+# METRICS_SLOW_REQUESTS=N to log each request that is among the N slowest seen
+# so far, with its SQL.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_SLOW_REQUESTS = int(os.environ.get('METRICS_SLOW_REQUESTS', 0))
+
+# 🚦 Write throttling per URL name: token buckets per user and per client IP,
+# as "count/period" (s, m, h, d). Over the limit a POST gets 429 + Retry-After.
+# Buckets are per worker process; RATELIMIT_STORE=core.ratelimit.CacheBucketStore
+# keeps them in the cache above instead, shared when CACHE_BACKEND=file.
+RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', '1') != '0'
+RATELIMIT_STORE = os.environ.get('RATELIMIT_STORE', 'core.ratelimit.LocalBucketStore')
+RATELIMITS = {
+    'donate_to_disaster': {'user': '10/m', 'ip': '60/m'},
+    'message_thread': {'user': '30/m', 'ip': '120/m'},
+    'submit_feedback': {'user': '10/m', 'ip': '60/m'},
+}